@@ -72,6 +72,7 @@ import keyframeeditcanvas
 import kftoolmode
 import medialog
 import mltenv
+import mltenvsnapshot
 import mltfilters
 import mltplayer
 import mltprofiles
@@ -81,7 +82,6 @@ import movemodes
 import multitrimmode
 import persistance
 import positionbar
-import preferenceswindow
 import processutils
 import projectaction
 import projectdata
@@ -92,12 +92,10 @@ import render
 import renderconsumer
 import respaths
 import resync
-import rotomask
 import sequence
 import shortcuts
 import snapping
 import threading
-import titler
 import tlinerender
 import tlinewidgets
 import toolsintegration
@@ -109,6 +107,13 @@ import userfolders
 import utils
 import workflow
 
+# Tool and dialog modules are imported when first used.
+# medialog, proxyediting and render are not here because editorwindow builds their panels 
+# and project loading calls them before first frame is displayed.
+preferenceswindow = processutils.lazy_import("preferenceswindow")
+rotomask = processutils.lazy_import("rotomask")
+titler = processutils.lazy_import("titler")
+
 
 AUTOSAVE_DIR = appconsts.AUTOSAVE_DIR
 AUTOSAVE_FILE = "autosave/autosave"
@@ -116,6 +121,7 @@ instance_autosave_id_str = None
 PID_FILE = "flowbladepidfile"
 BATCH_DIR = "batchrender/"
 autosave_timeout_id = -1
+autosave_thread = None
 recovery_dialog_id = -1
 disk_cache_timeout_id = -1
 sdl2_timeout_id = -1
@@ -130,6 +136,7 @@ resize_timeout_id = -1
 
 
 _log_file = None
+_startup_profile = False
 
 assoc_file_path = None
 assoc_timeout_id = None
@@ -144,6 +151,8 @@ def main(root_path):
         log_print_output_to_file()
 
     set_quiet_if_requested()
+    set_load_timings_if_requested()
+    set_startup_profile_if_requested()
 
     print("Application version: " + editorstate.appversion)
 
@@ -250,6 +259,9 @@ def main(root_path):
     # Load filter and compositor descriptions from xml files.
     mltfilters.load_filters_xml(mltenv.services)
     mlttransitions.load_compositors_xml(mltenv.transitions)
+
+    # Save detected environment for helper processes to use.
+    mltenvsnapshot.save_snapshot()
     
     # Replace some services if better replacements available.
     mltfilters.replace_services(mltenv.services)
@@ -366,6 +378,10 @@ def main(root_path):
 
     global disk_cache_timeout_id
     disk_cache_timeout_id = GObject.timeout_add(2500, check_disk_cache_size)
+
+    # Startup profile is printed when main loop first gets to idle with window drawn.
+    if _startup_profile == True:
+        GLib.idle_add(print_startup_profile)
     
     # Launch gtk+ main loop
     Gtk.main()
@@ -406,7 +422,7 @@ def monkeypatch_callbacks():
     # Callback to reinit to change slider <-> kf editor
     propertyeditorbuilder.re_init_editors_for_slider_type_change_func = clipeffectseditor.effect_selection_changed
 
-    propertyeditorbuilder.show_rotomask_func = rotomask.show_rotomask
+    propertyeditorbuilder.show_rotomask_func = lambda *args: rotomask.show_rotomask(*args) # rotomask.py is imported on first use
     
     multitrimmode.set_default_mode_func = modesetting.set_default_edit_mode
     
@@ -453,6 +469,31 @@ def set_quiet_if_requested():
             _log_file = "/dev/null"
             log_print_output_to_file()
             
+def set_load_timings_if_requested():
+    for arg in sys.argv:
+        if arg == "--load-timings":
+            persistance.print_load_timings = True
+
+def set_startup_profile_if_requested():
+    for arg in sys.argv:
+        if arg == "--profile-startup":
+            global _startup_profile
+            _startup_profile = True
+
+def print_startup_profile():
+    launch_time = os.environ.get("FLOWBLADE_LAUNCH_TIME")
+    if launch_time != None:
+        launch_time = float(launch_time)
+    processutils.print_startup_profile_report(os.environ.get("FLOWBLADE_STARTUP_PROFILE_LOG"), launch_time)
+
+    # Launcher sent stderr to import times log, rest of session uses terminal again.
+    stderr_fd = os.environ.pop("FLOWBLADE_STARTUP_PROFILE_STDERR_FD", None)
+    if stderr_fd != None:
+        sys.stderr.flush()
+        os.dup2(int(stderr_fd), 2)
+        os.close(int(stderr_fd))
+    return False
+
 def create_gui():
     """
     Called at app start to create gui objects and handles for them.
@@ -545,7 +586,9 @@ def init_project_gui():
     gui.tline_left_corner.update_gui()
     projectinfogui.update_project_info()
 
-    titler.reset_titler()
+    # Titler has no state to reset if it has not been used.
+    if processutils.is_module_loaded(titler):
+        titler.reset_titler()
     
     # Set render folder selector to last render if prefs require 
     folder_path = editorstate.PROJECT().get_last_render_folder()
@@ -632,7 +675,8 @@ def open_project(new_project):
 
     audiomonitoring.close_audio_monitor()
     audiowaveformrenderer.clear_cache()
-    audiowaveform.frames_cache = {}
+    audiowaveform.clear_cache()
+    tlinewidgets.clear_waveform_surfaces_cache()
 
     editorstate.project = new_project
     editorstate.media_view_filter = appconsts.SHOW_ALL_FILES
@@ -697,6 +741,10 @@ def change_current_sequence(index):
     stop_autosave()
     editorstate.project.c_seq = editorstate.project.sequences[index]
 
+    # Sequences not selected after project load get their MLT objects when first selected.
+    persistance.materialize_sequence(editorstate.project, editorstate.project.c_seq)
+    persistance.sequence_changed(editorstate.project.c_seq)
+
     # Inits widgets with current sequence data
     init_sequence_gui()
     
@@ -709,6 +757,9 @@ def change_current_sequence(index):
     # Editor and modules needs to do some initializing
     init_editor_state()
 
+    # Render loaded timeline render segments without existing renders if needed.
+    tlinerender.launch_loaded_segments_update()
+
     # Display current sequence selected in gui.
     gui.sequence_list_view.fill_data_model()
     selection = gui.sequence_list_view.treeview.get_selection()
@@ -801,8 +852,8 @@ def start_autosave():
     if autosave_delay_millis > 0:
         print("Autosave started...")
         autosave_timeout_id = GObject.timeout_add(autosave_delay_millis, do_autosave)
-        autosave_file = userfolders.get_cache_dir() + get_instance_autosave_file()
-        persistance.save_project(editorstate.PROJECT(), autosave_file)
+        wait_for_autosave_write() # Previous project may still be being written in autosave file.
+        do_autosave()
     else:
         print("Autosave disabled...")
         stop_autosave()
@@ -819,10 +870,45 @@ def stop_autosave():
     autosave_timeout_id = -1
 
 def do_autosave():
+    global autosave_thread
+    if autosave_thread != None and autosave_thread.is_alive():
+        print("Autosave skipped, previous autosave still being written.")
+        return True
+
+    # Project data snapshot is created on GTK thread, pickling and writing is done in a worker thread.
+    start_time = time.monotonic()
+    save_data = persistance.get_project_save_data(editorstate.PROJECT())
+    stall_time = time.monotonic() - start_time
+
     autosave_file = userfolders.get_cache_dir() + get_instance_autosave_file()
-    persistance.save_project(editorstate.PROJECT(), autosave_file)
+    autosave_thread = AutosaveThread(save_data, autosave_file, stall_time)
+    autosave_thread.start()
     return True
 
+def wait_for_autosave_write():
+    if autosave_thread != None:
+        autosave_thread.join()
+
+
+class AutosaveThread(threading.Thread):
+    
+    def __init__(self, save_data, autosave_file, stall_time):
+        threading.Thread.__init__(self)
+        self.save_data = save_data
+        self.autosave_file = autosave_file
+        self.stall_time = stall_time
+        
+    def run(self):
+        start_time = time.monotonic()
+        try:
+            persistance.write_project_save_data(self.save_data, self.autosave_file, fsync=True)
+        except Exception as e:
+            print("Autosave FAILED:", e)
+            return
+        save_time = time.monotonic() - start_time
+        print("Autosave done, GUI stall:", round(self.stall_time * 1000.0, 1), "ms, write:", round(save_time * 1000.0, 1), "ms")
+
+
 # ------------------------------------------------- splash screen
 def show_splash_screen():
     global splash_screen
@@ -1058,6 +1144,7 @@ def _app_destroy():
          (audiowaveform.waveform_thread != None)):
         pass
     # Delete autosave file
+    wait_for_autosave_write()
     try:
         os.remove(userfolders.get_cache_dir() + get_instance_autosave_file())
     except:
@@ -152,6 +152,8 @@ PROXIES_DIR = "proxies/"
 THUMBNAILS_DIR = "thumbnails"
 RENDERED_CLIPS_DIR = "rendered_clips"
 TLINE_RENDERS_DIR = "tlinerenders"
+TLINE_RENDER_CACHE_DIR = "tline_render_cache"
+MLT_ENV_SNAPSHOT_FILE = "mlt_env_snapshot"
 GMIC_DIR = "gmic"
 PHANTOM_DIR = "phantom2d"
 PHANTOM_DISK_CACHE_DIR = "disk_cache"
@@ -62,7 +62,7 @@ class AtomicFileWriter(object):
     be preserved in its former state without modification.
     """
 
-    def __init__(self, file_path, mode, debug=False):
+    def __init__(self, file_path, mode, debug=False, fsync=False):
         """
         AtomicFileWriter constructor.
 
@@ -71,6 +71,9 @@ class AtomicFileWriter(object):
 
         Also accepts an optional debug boolean argument, which will
         print out messages for testing and troubleshooting.
+
+        Also accepts an optional fsync boolean argument, which will
+        make sure that file contents are on disk before the rename.
         """
 
         # validate file path
@@ -101,6 +104,9 @@ class AtomicFileWriter(object):
         # debugging mode
         self.debug = debug
 
+        # sync file contents to disk before rename
+        self.fsync = fsync
+
     def __enter__(self):
         """
         Context manager starting point.
@@ -182,6 +188,10 @@ class AtomicFileWriter(object):
             # flush the file buffer to disk
             self.file_obj.flush()
 
+            # wait for the file contents to be written on disk
+            if self.fsync:
+                os.fsync(self.file_obj.fileno())
+
             # close the file
             self.file_obj.close()
 
@@ -0,0 +1,505 @@
+"""
+    Flowblade Movie Editor is a nonlinear video editor.
+    Copyright 2012 Janne Liljeblad.
+
+    This file is part of Flowblade Movie Editor <http://code.google.com/p/flowblade>.
+
+    Flowblade Movie Editor is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Flowblade Movie Editor is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Flowblade Movie Editor.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""
+Module computes per-frame audio levels by decoding media audio once from start to end
+and handles the on-disk audio levels cache file format.
+
+Levels are computed with the same math as MLT "audiolevel" filter: RMS of frame samples
+on IEC scale. Decoding is done with ffmpeg into a pipe, so media seeks are never done.
+
+Levels files have a small fixed size header followed by one uint8 level value per frame
+and 4x, 16x and 64x decimated max levels. Files are memory mapped when read, so only
+the pages for drawn frames are loaded.
+Older Flowblade versions wrote pickled lists of floats, these are converted on first read.
+
+Levels files are named with a key computed from media content fingerprint and frame rate,
+so moving media or changing to a profile with same frame rate keeps the levels data usable.
+Fingerprints are kept in a keys index file to avoid reading media files on every lookup.
+
+Can also be run as a stand-alone script to benchmark sequential decode against
+MLT seek-per-frame levels extraction:
+
+    python3 audiolevels.py /path/to/media [fps_num fps_den]
+"""
+
+import hashlib
+import math
+import os
+import pickle
+import struct
+import subprocess
+import sys
+
+import numpy
+
+import appconsts
+import atomicfile
+import userfolders
+import utils
+
+SAMPLE_RATE = 48000
+CHANNELS = 2
+LEVELS_CHANNEL = 1 # Right channel, same as audiowaveformrenderer.RIGHT_CHANNEL
+BYTES_PER_SAMPLE = 2
+
+READ_FRAMES = 250 # Number of frames decoded and computed in one block
+
+LEVEL_RMS = 0
+LEVEL_PEAK = 1
+
+PROGRESS_UPDATE_FRAMES = 500
+
+LEVELS_FILE_EXTENSION = ".levels"
+LEVELS_FILE_MAGIC = b"FBAL"
+LEVELS_FILE_VERSION = 2
+# magic, version, fps_num, fps_den, frames count
+LEVELS_FILE_HEADER = struct.Struct("<4sHIIQ")
+LEVEL_MAX_VALUE = 255.0
+
+# Levels files also hold max levels pyramid for drawing zoomed out timeline.
+PYRAMID_FACTOR = 4
+PYRAMID_DECIMATIONS = [4, 16, 64]
+
+KEYS_INDEX_FILE = "keys_index"
+KEYS_INDEX_VERSION = 1
+MAX_KEYS_INDEX_ENTRIES = 10000
+
+_keys_index = None # "path|size|mtime" -> media content fingerprint
+
+
+class AudioLevelsError(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+
+def sequential_decode_available():
+    return utils.program_is_installed("ffmpeg")
+
+def iec_scale(db):
+    """
+    Vectorized version of IEC_Scale() in MLT audiolevel filter, maps dBFS values to range 0.0 - 1.0.
+    """
+    conditions = [db < -70.0,
+                  db < -60.0,
+                  db < -50.0,
+                  db < -40.0,
+                  db < -30.0,
+                  db < -20.0,
+                  numpy.abs(db) > 0.001]
+    choices = [0.0,
+               (db + 70.0) * 0.0025,
+               (db + 60.0) * 0.005 + 0.025,
+               (db + 50.0) * 0.0075 + 0.075,
+               (db + 40.0) * 0.015 + 0.15,
+               (db + 30.0) * 0.02 + 0.3,
+               (db + 20.0) * 0.025 + 0.5]
+    return numpy.select(conditions, choices, default=1.0)
+
+
+class FrameLevelsExtractor:
+    """
+    Decodes audio of a media file sequentially and computes one level value per frame.
+    """
+    def __init__(self, media_path, fps_num, fps_den, frames_count, level_type=LEVEL_RMS):
+        self.media_path = media_path
+        self.fps_num = fps_num
+        self.fps_den = fps_den
+        self.frames_count = frames_count
+        self.level_type = level_type
+        self.abort = False
+        self.process = None
+
+    def get_levels(self, progress_callback=None):
+        """
+        Returns list of float levels with length self.frames_count.
+        Frames after audio data ends get level 0.0, returns None if aborted.
+        Raises AudioLevelsError if ffmpeg fails or decodes no audio.
+        """
+        frame_levels = numpy.zeros(self.frames_count)
+
+        ffmpeg_call = ["ffmpeg", "-nostdin", "-loglevel", "error",
+                       "-i", self.media_path,
+                       "-vn",
+                       "-ac", str(CHANNELS),
+                       "-ar", str(SAMPLE_RATE),
+                       "-acodec", "pcm_s16le",
+                       "-f", "s16le",
+                       "-"]
+        try:
+            self.process = subprocess.Popen(ffmpeg_call, bufsize=-1, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except Exception as e:
+            raise AudioLevelsError("could not start ffmpeg: " + str(e))
+
+        try:
+            block_start = 0
+            while block_start < self.frames_count:
+                if self.abort:
+                    return None
+
+                block_end = min(block_start + READ_FRAMES, self.frames_count)
+                levels, complete = self._compute_block_levels(block_start, block_end)
+                frame_levels[block_start:block_start + len(levels)] = levels
+                if not complete:
+                    # Audio data ended, rest of the frames stay at 0.0 if ffmpeg exited cleanly.
+                    returncode = self.process.wait()
+                    if returncode != 0:
+                        raise AudioLevelsError("ffmpeg exited with code " + str(returncode))
+                    if block_start + len(levels) == 0:
+                        raise AudioLevelsError("ffmpeg decoded no audio samples")
+                    break
+
+                if progress_callback != None and (block_end // PROGRESS_UPDATE_FRAMES) != (block_start // PROGRESS_UPDATE_FRAMES):
+                    progress_callback(block_end, self.frames_count)
+
+                block_start = block_end
+        finally:
+            self.process.stdout.close()
+            self.process.kill()
+            self.process.wait()
+
+        return frame_levels.tolist()
+
+    def abort_extraction(self):
+        self.abort = True
+
+    def _get_frame_sample(self, frame):
+        # Same sample distribution as mlt_sample_calculator(), frames get either floor or ceil of
+        # SAMPLE_RATE / fps samples and total sample count is exact for any frame range.
+        return (frame * SAMPLE_RATE * self.fps_den) // self.fps_num
+
+    def _compute_block_levels(self, block_start, block_end):
+        first_sample = self._get_frame_sample(block_start)
+        frame_starts = numpy.array([self._get_frame_sample(f) for f in range(block_start, block_end + 1)]) - first_sample
+        samples_count = frame_starts[-1]
+
+        data = self._read_bytes(samples_count * CHANNELS * BYTES_PER_SAMPLE)
+        complete = (len(data) == samples_count * CHANNELS * BYTES_PER_SAMPLE)
+        read_samples = len(data) // (CHANNELS * BYTES_PER_SAMPLE)
+        if read_samples == 0:
+            return (numpy.zeros(0), False)
+
+        interleaved = numpy.frombuffer(data[:read_samples * CHANNELS * BYTES_PER_SAMPLE], dtype="<i2")
+        samples = interleaved[LEVELS_CHANNEL::CHANNELS].astype(numpy.float64) / 32768.0
+
+        # Drop frames that did not get any samples before data ended.
+        offsets = frame_starts[:-1]
+        offsets = offsets[offsets < read_samples]
+        counts = numpy.diff(numpy.append(offsets, read_samples))
+
+        if self.level_type == LEVEL_PEAK:
+            levels = numpy.maximum.reduceat(numpy.abs(samples), offsets)
+        else:
+            levels = numpy.sqrt(numpy.add.reduceat(samples * samples, offsets) / counts)
+
+        with numpy.errstate(divide="ignore"):
+            db = 20.0 * numpy.log10(levels)
+        return (iec_scale(db), complete)
+
+    def _read_bytes(self, count):
+        chunks = []
+        remaining = count
+        while remaining > 0:
+            chunk = self.process.stdout.read(remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+
+# --------------------------------------------------------- levels files
+def get_levels_file_path(media_file_path, profile):
+    """
+    Returns path for media levels file, levels files created with earlier naming
+    or file format are moved to returned path if found.
+    """
+    file_path = _get_levels_dir() + get_levels_key(media_file_path, profile) + LEVELS_FILE_EXTENSION
+    if not os.path.isfile(file_path):
+        try:
+            _migrate_old_name_files(media_file_path, profile, file_path)
+        except Exception as e:
+            print("Audio levels file migration failed for", media_file_path, ":", str(e))
+    return file_path
+
+def get_levels_key(media_file_path, profile):
+    stat = os.stat(media_file_path)
+    index_key = media_file_path + "|" + str(stat.st_size) + "|" + str(stat.st_mtime_ns)
+
+    keys_index = _get_keys_index()
+    try:
+        fingerprint = keys_index[index_key]
+    except KeyError:
+        fingerprint = utils.get_media_content_fingerprint(media_file_path)
+        keys_index[index_key] = fingerprint
+        _append_keys_index_record(index_key, fingerprint)
+
+    fps_str = str(profile.frame_rate_num()) + "/" + str(profile.frame_rate_den())
+    return hashlib.md5((fingerprint + fps_str).encode('utf-8')).hexdigest()
+
+def _migrate_old_name_files(media_file_path, profile, file_path):
+    old_name_path = _get_levels_dir() + utils.get_unique_name_for_audio_levels_file(media_file_path, profile)
+    if os.path.isfile(old_name_path + LEVELS_FILE_EXTENSION):
+        os.rename(old_name_path + LEVELS_FILE_EXTENSION, file_path)
+    elif os.path.isfile(old_name_path):
+        migrate_legacy_levels_file(old_name_path, file_path, profile.frame_rate_num(), profile.frame_rate_den())
+
+def _get_levels_dir():
+    return userfolders.get_cache_dir() + appconsts.AUDIO_LEVELS_DIR
+
+# Keys index file is version number followed by pickled (index key, fingerprint) records.
+# Records are appended with single writes, so GUI and levels render processes can all add keys
+# without overwriting records written by others.
+def _get_keys_index():
+    global _keys_index
+    if _keys_index == None:
+        _keys_index, records_count, index_complete = _load_keys_index()
+        # Index is rewritten if it has too many records, an unreadable record or an old format.
+        if index_complete == False or records_count > 2 * MAX_KEYS_INDEX_ENTRIES:
+            _compact_keys_index()
+    return _keys_index
+
+def _load_keys_index():
+    keys_index = {}
+    records_count = 0
+    try:
+        index_file = open(_get_levels_dir() + KEYS_INDEX_FILE, "rb")
+    except OSError:
+        return (keys_index, records_count, False)
+
+    with index_file:
+        try:
+            version = pickle.load(index_file)
+        except Exception:
+            return (keys_index, records_count, False)
+
+        if version != KEYS_INDEX_VERSION:
+            if isinstance(version, dict): # index was a single pickled dict before version 1
+                keys_index.update(version)
+            return (keys_index, records_count, False)
+
+        read_end = index_file.tell()
+        try:
+            while True:
+                index_key, fingerprint = pickle.load(index_file)
+                keys_index[index_key] = fingerprint
+                records_count += 1
+                read_end = index_file.tell()
+        except Exception:
+            pass # End of index, last record may be partially written if process was killed during write.
+
+        index_complete = (read_end == os.fstat(index_file.fileno()).st_size)
+
+    return (keys_index, records_count, index_complete)
+
+def _append_keys_index_record(index_key, fingerprint):
+    index_path = _get_levels_dir() + KEYS_INDEX_FILE
+    if not os.path.exists(index_path):
+        _compact_keys_index()
+        return
+
+    try:
+        with open(index_path, "ab", buffering=0) as index_file:
+            index_file.write(pickle.dumps((index_key, fingerprint)))
+    except Exception as e:
+        print("Audio levels keys index write failed:", str(e))
+
+def _compact_keys_index():
+    # Oldest entries are dropped first, dict keeps insertion order.
+    while len(_keys_index) > MAX_KEYS_INDEX_ENTRIES:
+        del _keys_index[next(iter(_keys_index))]
+
+    try:
+        with atomicfile.AtomicFileWriter(_get_levels_dir() + KEYS_INDEX_FILE, "wb") as afw:
+            write_file = afw.get_file()
+            pickle.dump(KEYS_INDEX_VERSION, write_file)
+            for index_key, fingerprint in _keys_index.items():
+                pickle.dump((index_key, fingerprint), write_file)
+    except Exception as e:
+        print("Audio levels keys index save failed:", str(e))
+
+def write_levels_file(file_path, frame_levels, fps_num, fps_den):
+    levels = numpy.clip(numpy.array(frame_levels, dtype=numpy.float64), 0.0, 1.0)
+    levels = numpy.rint(levels * LEVEL_MAX_VALUE).astype(numpy.uint8)
+    header = LEVELS_FILE_HEADER.pack(LEVELS_FILE_MAGIC, LEVELS_FILE_VERSION, fps_num, fps_den, len(levels))
+    with atomicfile.AtomicFileWriter(file_path, "wb") as afw:
+        write_file = afw.get_file()
+        write_file.write(header)
+        write_file.write(levels.tobytes())
+        for decimated_levels in _build_pyramid(levels):
+            write_file.write(decimated_levels.tobytes())
+
+def read_levels_file(file_path):
+    return AudioLevelsData(file_path)
+
+def migrate_legacy_levels_file(legacy_file_path, file_path, fps_num, fps_den):
+    """
+    Converts pickled list of float levels to current file format and deletes the pickle.
+    """
+    frame_levels = utils.unpickle(legacy_file_path)
+    write_levels_file(file_path, frame_levels, fps_num, fps_den)
+    os.remove(legacy_file_path)
+    print("Audio levels file converted to current format:", file_path)
+
+def _get_decimated_length(length, decimation):
+    return (length + decimation - 1) // decimation
+
+def _build_pyramid(levels):
+    # Each pyramid level holds max value of PYRAMID_FACTOR values of previous level.
+    pyramid = []
+    prev_levels = levels
+    for decimation in PYRAMID_DECIMATIONS:
+        pad = (-len(prev_levels)) % PYRAMID_FACTOR
+        padded = numpy.append(prev_levels, numpy.zeros(pad, dtype=numpy.uint8))
+        prev_levels = padded.reshape(-1, PYRAMID_FACTOR).max(axis=1)
+        pyramid.append(prev_levels)
+    return pyramid
+
+
+class AudioLevelsData:
+    """
+    Read-only memory mapped levels data, indexing with frame gives level as float in range 0.0 - 1.0.
+    """
+    def __init__(self, file_path):
+        with open(file_path, "rb") as f:
+            header_bytes = f.read(LEVELS_FILE_HEADER.size)
+        if len(header_bytes) != LEVELS_FILE_HEADER.size:
+            raise AudioLevelsError("audio levels file header missing: " + file_path)
+
+        magic, version, self.fps_num, self.fps_den, self.length = LEVELS_FILE_HEADER.unpack(header_bytes)
+        if magic != LEVELS_FILE_MAGIC or version != LEVELS_FILE_VERSION:
+            raise AudioLevelsError("unknown audio levels file format: " + file_path)
+
+        # Whole file is mapped once and pyramid levels are views into it.
+        # self._pyramid[0] is full resolution levels, following items are PYRAMID_DECIMATIONS levels.
+        self.size_bytes = os.path.getsize(file_path)
+        if self.length > 0:
+            mapped_file = numpy.memmap(file_path, dtype=numpy.uint8, mode="r")
+        else:
+            mapped_file = numpy.zeros(LEVELS_FILE_HEADER.size, dtype=numpy.uint8)
+
+        self._decimations = [1] + PYRAMID_DECIMATIONS
+        self._pyramid = []
+        offset = LEVELS_FILE_HEADER.size
+        for decimation in self._decimations:
+            decimated_length = _get_decimated_length(self.length, decimation)
+            self._pyramid.append(mapped_file[offset:offset + decimated_length])
+            offset += decimated_length
+
+        self._levels = self._pyramid[0]
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, frame):
+        return self._levels[frame] / LEVEL_MAX_VALUE
+
+    def get_levels_slice(self, first, last):
+        """
+        Returns levels for frames first - (last - 1) as numpy float array.
+        """
+        return self._levels[first:last] / LEVEL_MAX_VALUE
+
+    def get_draw_levels(self, first, last, pix_per_frame):
+        """
+        Returns (first_bar_frame, frames_per_bar, levels) for drawing frames first - (last - 1)
+        with at most one level bar per pixel. Each level is max level of frames covered by bar.
+        """
+        frames_per_bar = max(1, int(math.ceil(1.0 / pix_per_frame)))
+
+        # Use most decimated pyramid level that still has at least one value per bar.
+        level_index = 0
+        for i in range(0, len(self._decimations)):
+            if self._decimations[i] <= frames_per_bar:
+                level_index = i
+        decimation = self._decimations[level_index]
+
+        # Combine pyramid values further if needed, bars are aligned to frames_per_bar
+        # so that scrolling does not change bar values.
+        reduce_count = (frames_per_bar + decimation - 1) // decimation
+        frames_per_bar = decimation * reduce_count
+        first_bar_frame = (max(0, first) // frames_per_bar) * frames_per_bar
+
+        decimated_levels = self._pyramid[level_index]
+        start = first_bar_frame // decimation
+        end = min(_get_decimated_length(max(0, last), decimation), len(decimated_levels))
+        if start >= end:
+            return (first_bar_frame, frames_per_bar, numpy.zeros(0))
+
+        levels = decimated_levels[start:end]
+        if reduce_count > 1:
+            levels = numpy.maximum.reduceat(levels, numpy.arange(0, len(levels), reduce_count))
+
+        return (first_bar_frame, frames_per_bar, levels / LEVEL_MAX_VALUE)
+
+
+# --------------------------------------------------------- benchmark
+def _seek_loop_levels(media_path, profile):
+    import mlt
+    producer = mlt.Producer(profile, str(media_path))
+    channels = mlt.Filter(profile, "audiochannels")
+    converter = mlt.Filter(profile, "audioconvert")
+    levels = mlt.Filter(profile, "audiolevel")
+    producer.attach(channels)
+    producer.attach(converter)
+    producer.attach(levels)
+
+    frame_levels = [None] * producer.get_length()
+    for frame in range(0, len(frame_levels)):
+        producer.seek(frame)
+        mlt.frame_get_waveform(producer.get_frame(), 10, 50)
+        val = levels.get("_audio_level.1")
+        if val == None:
+            val = 0.0
+        frame_levels[frame] = float(val)
+    return frame_levels
+
+def _benchmark(media_path, fps_num, fps_den):
+    import mlt
+    mlt.Factory().init()
+    profile = mlt.Profile()
+    profile.set_frame_rate(fps_num, fps_den)
+    frames_count = mlt.Producer(profile, str(media_path)).get_length()
+    print("media:", media_path, "frames:", frames_count, "fps:", str(fps_num) + "/" + str(fps_den))
+
+    utils.start_timing("seek loop levels...")
+    seek_levels = _seek_loop_levels(media_path, profile)
+    utils.elapsed_time("seek loop:", False)
+
+    utils.start_timing("sequential decode levels...")
+    decode_levels = FrameLevelsExtractor(media_path, fps_num, fps_den, frames_count).get_levels()
+    utils.elapsed_time("sequential decode:", False)
+
+    diff = numpy.abs(numpy.array(seek_levels) - numpy.array(decode_levels))
+    print("max level difference:", diff.max(), "mean level difference:", diff.mean())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: audiolevels.py media_path [fps_num fps_den]")
+        sys.exit(1)
+    fps_num = 25
+    fps_den = 1
+    if len(sys.argv) == 4:
+        fps_num = int(sys.argv[2])
+        fps_den = int(sys.argv[3])
+    _benchmark(sys.argv[1], fps_num, fps_den)
@@ -24,25 +24,23 @@ Modules handles creating and caching audio waveform images for clips.
 
 import mlt
 import os
-import pickle
 import threading
 import time
 
 from gi.repository import Gtk, Gdk
 
-import appconsts
-import atomicfile
+import audiolevels
+import audiowaveformrenderer
 import dialogutils
 from editorstate import PROJECT
 import gui
 import guiutils
+import lrucache
 import updater
-import userfolders
-import utils
 
 # Frame level value cache for audio levels
-# path -> list of frame levels
-frames_cache = {}
+# lrucache.LRUCache path -> audiolevels.AudioLevelsData
+frames_cache = None
 
 waveform_thread = None
 
@@ -50,23 +48,34 @@ LEFT_CHANNEL = "_audio_level.0"
 RIGHT_CHANNEL = "_audio_level.1"
 
 # ------------------------------------------------- waveforms
+def clear_cache():
+    global frames_cache
+    frames_cache = lrucache.LRUCache(audiowaveformrenderer.get_memory_cache_max_bytes())
+
 def set_waveform_displayer_clip_from_popup(data):
     clip, track, item_id, item_data = data
 
-    global frames_cache
-    if clip.path in frames_cache:
-        frame_levels = frames_cache[clip.path]
+    if frames_cache == None:
+        clear_cache()
+
+    frame_levels = frames_cache.get(clip.path)
+    if frame_levels != None:
         clip.waveform_data = frame_levels
         updater.repaint_tline()
         return
 
-    cache_file_path = userfolders.get_cache_dir() + appconsts.AUDIO_LEVELS_DIR + _get_unique_name_for_media(clip.path)
+    cache_file_path = _get_levels_file_path(clip.path)
     if os.path.isfile(cache_file_path):
-        frame_levels = utils.unpickle(cache_file_path)
-        frames_cache[clip.path] = frame_levels
-        clip.waveform_data = frame_levels
-        updater.repaint_tline()
-        return
+        try:
+            frame_levels = audiolevels.read_levels_file(cache_file_path)
+            frames_cache.put(clip.path, frame_levels, frame_levels.size_bytes)
+            clip.waveform_data = frame_levels
+            updater.repaint_tline()
+            return
+        except audiolevels.AudioLevelsError as e:
+            # File written by other file format version, render again.
+            print(str(e))
+            os.remove(cache_file_path)
 
     progress_bar = Gtk.ProgressBar()
     title = _("Audio Levels Data Render")
@@ -95,8 +104,8 @@ def clear_waveform(data):
     clip.waveform_data_frame_height = -1
     updater.repaint_tline()
 
-def _get_unique_name_for_media(media_file_path):
-    return utils.get_unique_name_for_audio_levels_file(media_file_path, PROJECT().profile)
+def _get_levels_file_path(media_file_path):
+    return audiolevels.get_levels_file_path(media_file_path, PROJECT().profile)
 
 
 class WaveformCreator(threading.Thread):    
@@ -104,19 +113,16 @@ class WaveformCreator(threading.Thread):
         threading.Thread.__init__(self)
         self.clip = clip
         self.temp_clip = self._get_temp_producer(clip)
-        self.file_cache_path = userfolders.get_cache_dir() + appconsts.AUDIO_LEVELS_DIR + _get_unique_name_for_media(clip.path)
+        self.file_cache_path = _get_levels_file_path(clip.path)
         self.track_height = track_height
         self.abort = False
         self.clip_media_length = self.temp_clip.get_length()
         self.last_rendered_frame = 0
         self.stopped = False
         self.dialog = dialog
+        self.extractor = None
         
     def run(self):
-        global frames_cache
-        frame_levels = [None] * self.clip_media_length 
-        frames_cache[self.clip.path] = frame_levels
-
         Gdk.threads_enter()
         self.dialog.progress_bar.set_fraction(0.0)
         self.dialog.progress_bar.set_text(str(0) + "%")
@@ -125,40 +131,34 @@ class WaveformCreator(threading.Thread):
         Gdk.threads_leave()
         time.sleep(0.2)
 
-        for frame in range(0, len(frame_levels)):
-            if self.abort:
-                break
-            self.temp_clip.seek(frame)
-            mlt.frame_get_waveform(self.temp_clip.get_frame(), 10, 50)
-            val = self.levels.get(RIGHT_CHANNEL)
-            if val == None:
-                val = 0.0
-            frame_levels[frame] = float(val)
-            self.last_rendered_frame = frame
-            if frame % 500 == 0:
-                render_fraction = float(self.last_rendered_frame) / float(self.clip_media_length)
-                Gdk.threads_enter()
-                self.dialog.progress_bar.set_fraction(render_fraction)
-                pros = int(render_fraction * 100)
-                self.dialog.progress_bar.set_text(str(pros) + "%")
-                while(Gtk.events_pending()):
-                    Gtk.main_iteration()
-                Gdk.threads_leave()
-                time.sleep(0.1)
+        frame_levels = None
+        # Sequential decode only works for media that ffmpeg can read, others use seek loop.
+        if self.temp_clip.get("mlt_service").startswith("avformat") and audiolevels.sequential_decode_available():
+            profile = PROJECT().profile
+            self.extractor = audiolevels.FrameLevelsExtractor(self.clip.path, profile.frame_rate_num(), 
+                                                              profile.frame_rate_den(), self.clip_media_length)
+            try:
+                frame_levels = self.extractor.get_levels(self._update_progress)
+            except Exception as e:
+                print("Sequential audio levels extraction failed for", self.clip.path, ", using seek loop:", str(e))
+            self.extractor = None
+
+        if frame_levels == None and not self.abort:
+            frame_levels = [None] * self.clip_media_length 
+            self._fill_levels_with_seek(frame_levels)
 
         if not self.abort:
-            self.clip.waveform_data = frame_levels
-            with atomicfile.AtomicFileWriter(self.file_cache_path, "wb") as afw:
-                write_file = afw.get_file()
-                pickle.dump(frame_levels, write_file)
+            # Timeline draws levels data read from file, it holds decimated levels too.
+            audiolevels.write_levels_file(self.file_cache_path, frame_levels, 
+                                          PROJECT().profile.frame_rate_num(), PROJECT().profile.frame_rate_den())
+            levels_data = audiolevels.read_levels_file(self.file_cache_path)
+            frames_cache.put(self.clip.path, levels_data, levels_data.size_bytes)
+            self.clip.waveform_data = levels_data
 
             Gdk.threads_enter()
             self.dialog.progress_bar.set_fraction(1.0)
             self.dialog.progress_bar.set_text(_("Saving to Hard Drive"))
             Gdk.threads_leave()
-        
-        else:
-            frames_cache.pop(self.clip.path, None)
 
         updater.repaint_tline()
 
@@ -168,11 +168,39 @@ class WaveformCreator(threading.Thread):
         
         _waveform_render_stop(self.dialog, None)
 
+    def _fill_levels_with_seek(self, frame_levels):
+        for frame in range(0, len(frame_levels)):
+            if self.abort:
+                break
+            self.temp_clip.seek(frame)
+            mlt.frame_get_waveform(self.temp_clip.get_frame(), 10, 50)
+            val = self.levels.get(RIGHT_CHANNEL)
+            if val == None:
+                val = 0.0
+            frame_levels[frame] = float(val)
+            self.last_rendered_frame = frame
+            if frame % 500 == 0:
+                self._update_progress(frame, self.clip_media_length)
+                time.sleep(0.1)
+
+    def _update_progress(self, frame, length):
+        self.last_rendered_frame = frame
+        render_fraction = float(frame) / float(length)
+        Gdk.threads_enter()
+        self.dialog.progress_bar.set_fraction(render_fraction)
+        pros = int(render_fraction * 100)
+        self.dialog.progress_bar.set_text(str(pros) + "%")
+        while(Gtk.events_pending()):
+            Gtk.main_iteration()
+        Gdk.threads_leave()
+
     def _get_temp_producer(self, clip):
-        service = clip.get("mlt_service")
+        # Clips created at project load are cuts and media properties are in their parent producers.
+        producer = clip.parent()
+        service = producer.get("mlt_service")
         if service.startswith("xml"):
             service = "xml-nogl"
-        temp_producer = mlt.Producer(PROJECT().profile, service, clip.get("resource"))
+        temp_producer = mlt.Producer(PROJECT().profile, service, producer.get("resource"))
         channels = mlt.Filter(PROJECT().profile, "audiochannels")
         converter = mlt.Filter(PROJECT().profile, "audioconvert")
         self.levels = mlt.Filter(PROJECT().profile, "audiolevel")
@@ -184,6 +212,8 @@ class WaveformCreator(threading.Thread):
 
     def abort_rendering(self):
         self.abort = True
+        if self.extractor != None:
+            self.extractor.abort_extraction()
 
 def _waveform_render_progress_dialog(callback, title, text, progress_bar, parent_window):
     dialog = Gtk.Dialog(title,
@@ -24,8 +24,8 @@ Modules handles creating and caching audio waveform images for clips.
 
 import locale
 import mlt
+import multiprocessing
 import os
-import pickle
 import subprocess
 import sys
 import threading
@@ -35,60 +35,92 @@ gi.require_version('Gdk', '3.0')
 from gi.repository import Gdk
 
 import appconsts
-import atomicfile
+import audiolevels
 import editorpersistance
 import editorstate
-import mltenv
+import lrucache
+import mltenvsnapshot
 import mltprofiles
 import mlttransitions
-import mltfilters
 import processutils
-import renderconsumer
 import respaths
 import translations
 import updater
 import userfolders
-import utils
 
 LEFT_CHANNEL = "_audio_level.0"
 RIGHT_CHANNEL = "_audio_level.1"
 
 FILE_SEPARATOR = "#&#file:"
+LEVELS_RENDERED_MSG = "LEVELS_RENDERED:"
 
-_waveforms = {} # Memory cache for waveform data
+_waveforms = None # Memory cache for waveform data, lrucache.LRUCache media path -> audiolevels.AudioLevelsData
 _queued_waveform_renders = [] # Media queued for render during one timeline repaint
 _render_already_requested = [] # Files that have been sent to rendering since last project load
+_pending_rendered_media = "" # Files waiting for running render process to end
+_render_running = False
+_render_launch_lock = threading.Lock()
+
+_render_profile_desc = None # Set in render processes
 
 
 # ------------------------------------------------- waveform cache
 def clear_cache():
     global _waveforms, _queued_waveform_renders, _render_already_requested
 
-    _waveforms = {}
+    if _waveforms != None:
+        print("Audio levels memory cache", _waveforms.get_stats_str())
+
+    _waveforms = None
     _queued_waveform_renders = []
     _render_already_requested = []
 
-def get_waveform_data(clip):
-    # Return from memory if present
+def get_memory_cache_max_bytes():
+    return editorpersistance.prefs.audio_levels_memory_cache_mb * 1024 * 1024
+
+def _get_waveforms_cache():
     global _waveforms
-    try:
-        waveform = _waveforms[clip.path]
+    if _waveforms == None:
+        _waveforms = lrucache.LRUCache(get_memory_cache_max_bytes())
+    return _waveforms
+
+def get_clip_waveform_data(clip):
+    """
+    Returns levels data displayed for clip or None if not available.
+    """
+    # Clips have waveform_data set when user has selected levels to be displayed for individual clips.
+    if clip.waveform_data != None:
+        return clip.waveform_data
+
+    if clip.is_blanck_clip == True or editorstate.display_all_audio_levels == False \
+        or clip.media_type == appconsts.IMAGE_SEQUENCE or clip.media_type == appconsts.PATTERN_PRODUCER:
+        return None
+
+    return get_waveform_data(clip)
+
+def get_waveform_data(clip):
+    # Return from memory if present, evicted data is loaded again from disk
+    waveform = _get_waveforms_cache().get(clip.path)
+    if waveform != None:
         return waveform
-    except:
-        pass
         
     # Load from disk if found, otherwise queue for levels render
     levels_file_path = _get_levels_file_path(clip.path, editorstate.PROJECT().profile)
     if os.path.isfile(levels_file_path):
         if os.path.getsize(levels_file_path) == 0:
              print( "Size zero Audio levels file, this is error!", levels_file_path)
-        waveform = utils.unpickle(levels_file_path)
-        _waveforms[clip.path] = waveform
-        return waveform
-    else:
-        global _queued_waveform_renders
-        _queued_waveform_renders.append(clip.path)
-        return None
+        try:
+            waveform = audiolevels.read_levels_file(levels_file_path)
+            _get_waveforms_cache().put(clip.path, waveform, waveform.size_bytes)
+            return waveform
+        except audiolevels.AudioLevelsError as e:
+            # File written by other file format version, render again.
+            print(str(e))
+            os.remove(levels_file_path)
+
+    global _queued_waveform_renders
+    _queued_waveform_renders.append(clip.path)
+    return None
     
 # ------------------------------------------------- launching render
 def launch_queued_renders():
@@ -101,7 +133,10 @@ def launch_queued_renders():
     _queued_waveform_renders = []
 
 def launch_audio_levels_rendering(file_names):
-
+    """
+    Only one render process is run at a time, files requested while a render is 
+    running are rendered by next process launched when it ends.
+    """
     # Only render audio levels for media that does not have existing levels file
     rendered_media = ""
 
@@ -118,16 +153,36 @@ def launch_audio_levels_rendering(file_names):
     if rendered_media == "":
         return
     
+    global _pending_rendered_media, _render_running
+    with _render_launch_lock:
+        _pending_rendered_media = _pending_rendered_media + rendered_media
+        if _render_running == True:
+            return
+        _render_running = True
+        _launch_pending_render()
+
+def _launch_pending_render():
+    # Called with _render_launch_lock held.
+    global _pending_rendered_media
     profile_desc = editorstate.PROJECT().profile_desc
     
     # This is called from GTK thread, so we need to launch process from another thread to 
     # clean-up properly and not block GTK thread/GUI
     global single_render_launch_thread
-    single_render_launch_thread = AudioRenderLaunchThread(rendered_media, profile_desc)
+    single_render_launch_thread = AudioRenderLaunchThread(_pending_rendered_media, profile_desc)
+    _pending_rendered_media = ""
     single_render_launch_thread.start()
 
+def _render_ended():
+    global _render_running
+    with _render_launch_lock:
+        if _pending_rendered_media != "":
+            _launch_pending_render()
+        else:
+            _render_running = False
+
 def _get_levels_file_path(media_file_path, profile):
-    return userfolders.get_cache_dir() + appconsts.AUDIO_LEVELS_DIR + utils.get_unique_name_for_audio_levels_file(media_file_path, profile)
+    return audiolevels.get_levels_file_path(media_file_path, profile)
  
 
 class AudioRenderLaunchThread(threading.Thread):
@@ -142,20 +197,78 @@ class AudioRenderLaunchThread(threading.Thread):
         # Sep-2018 - SvdB - Added self. to be able to access the thread through 'process'
         self.process = subprocess.Popen([sys.executable, respaths.LAUNCH_DIR + "flowbladeaudiorender", \
                   self.rendered_media, self.profile_desc, respaths.ROOT_PATH], \
-                  stdin=FLOG, stdout=FLOG, stderr=FLOG)
+                  stdin=FLOG, stdout=subprocess.PIPE, stderr=FLOG, universal_newlines=True)
+
+        # Render process reports each completed file on its own line, we repaint
+        # timeline as levels for a file become available.
+        for line in self.process.stdout:
+            FLOG.write(line)
+            FLOG.flush()
+            if line.startswith(LEVELS_RENDERED_MSG):
+                Gdk.threads_enter()
+                updater.repaint_tline()
+                Gdk.threads_leave()
+
         self.process.wait()
+        FLOG.close()
         
         Gdk.threads_enter()
         updater.repaint_tline()
         Gdk.threads_leave()
 
+        _render_ended()
+
 
 # --------------------------------------------------------- rendering
+def get_render_processes_count(files_count):
+    processes_count = editorpersistance.prefs.audio_levels_render_processes
+    if processes_count <= 0:
+        processes_count = multiprocessing.cpu_count()
+    return max(1, min(processes_count, files_count))
+
 def main():
     # Set paths.
     root_path = sys.argv[3]
     respaths.set_paths(root_path)
 
+    # Set folders paths
+    userfolders.init()
+    
+    # Load editor prefs and list of recent projects
+    editorpersistance.load()
+
+    profile_desc = sys.argv[2]
+        
+    files_paths = sys.argv[1]
+    files_paths = files_paths.lstrip(FILE_SEPARATOR)
+    
+    files = files_paths.split(FILE_SEPARATOR)
+
+    # Render processes are forked before MLT is initialized in this process,
+    # every render process does its own MLT init in _init_render_process().
+    processes_count = get_render_processes_count(len(files))
+    print("Rendering audio levels for", len(files), "files using", processes_count, "processes")
+    sys.stdout.flush()
+
+    pool = multiprocessing.Pool(processes_count, _init_render_process, (root_path, profile_desc))
+    done_count = 0
+    for clip_path, success in pool.imap_unordered(_render_levels_file, files):
+        done_count += 1
+        if success:
+            print(LEVELS_RENDERED_MSG + str(done_count) + "/" + str(len(files)) + " " + clip_path)
+        else:
+            print("Audio levels render failed " + str(done_count) + "/" + str(len(files)) + " " + clip_path)
+        sys.stdout.flush()
+
+    pool.close()
+    pool.join()
+
+def _init_render_process(root_path, profile_desc):
+    global _render_profile_desc
+    _render_profile_desc = profile_desc
+
+    respaths.set_paths(root_path)
+
     try:
         editorstate.mlt_version = mlt.LIBMLT_VERSION
     except:
@@ -178,29 +291,22 @@ def main():
     # Set numeric locale to use "." as radix, MLT initilizes this to OS locale and this causes bugs 
     locale.setlocale(locale.LC_NUMERIC, 'C')
 
-    # Check for codecs and formats on the system
-    mltenv.check_available_features(repo)
-    renderconsumer.load_render_profiles()
-
-    # Load filter and compositor descriptions from xml files.
-    mltfilters.load_filters_xml(mltenv.services)
-    mlttransitions.load_compositors_xml(mltenv.transitions)
+    # Check for codecs and formats on the system and load filter and compositor descriptions,
+    # use snapshot saved by earlier process if still valid.
+    mltenvsnapshot.load_mlt_environment(repo)
 
     # Create list of available mlt profiles
     mltprofiles.load_profile_list()
 
-    profile_desc = sys.argv[2]
-    profile = mltprofiles.get_profile(profile_desc)
-        
-    files_paths = sys.argv[1]
-    files_paths = files_paths.lstrip(FILE_SEPARATOR)
-    
-    files = files_paths.split(FILE_SEPARATOR)
-
-    for f in files:
-       t = WaveformCreator(f, profile_desc)
-       t.start()
-       t.join()
+def _render_levels_file(clip_path):
+    # Runs in render process, a failing file must not stop rendering of other files.
+    try:
+        # run() is called on worker process thread so that its exceptions are caught here.
+        WaveformCreator(clip_path, _render_profile_desc).run()
+        return (clip_path, True)
+    except Exception as e:
+        print("Audio levels render exception for", clip_path, ":", str(e), file=sys.stderr)
+        return (clip_path, False)
 
 
 class WaveformCreator(threading.Thread):    
@@ -208,11 +314,29 @@ class WaveformCreator(threading.Thread):
         threading.Thread.__init__(self)
         self.clip_path = clip_path
         profile = mltprofiles.get_profile(profile_desc)
+        self.profile = profile
         self.temp_clip = self._get_temp_producer(clip_path, profile)
         self.file_cache_path =_get_levels_file_path(clip_path, profile)
         self.last_rendered_frame = 0
 
     def run(self):
+        frame_levels = None
+        # Sequential decode only works for media that ffmpeg can read, others use seek loop.
+        if self.temp_clip.get("mlt_service").startswith("avformat") and audiolevels.sequential_decode_available():
+            extractor = audiolevels.FrameLevelsExtractor(self.clip_path, self.profile.frame_rate_num(), 
+                                                         self.profile.frame_rate_den(), self.clip_media_length)
+            try:
+                frame_levels = extractor.get_levels()
+            except Exception as e:
+                print("Sequential audio levels extraction failed for", self.clip_path, ", using seek loop:", str(e))
+
+        if frame_levels == None:
+            frame_levels = self._get_levels_with_seek()
+
+        audiolevels.write_levels_file(self.file_cache_path, frame_levels, 
+                                      self.profile.frame_rate_num(), self.profile.frame_rate_den())
+
+    def _get_levels_with_seek(self):
         frame_levels = [None] * self.clip_media_length 
 
         for frame in range(0, len(frame_levels)):
@@ -224,9 +348,7 @@ class WaveformCreator(threading.Thread):
             frame_levels[frame] = float(val)
             self.last_rendered_frame = frame
 
-        with atomicfile.AtomicFileWriter(self.file_cache_path, "wb") as afw:
-            write_file = afw.get_file()
-            pickle.dump(frame_levels, write_file)
+        return frame_levels
 
     def _get_temp_producer(self, clip_path, profile):
         temp_producer = mlt.Producer(profile, str(clip_path))
@@ -874,6 +874,7 @@ class PropertyChangePollingThread(threading.Thread):
                 if changed:
                     global filter_changed_since_last_save
                     filter_changed_since_last_save = True
+                    tlinerender.mark_clips_changed([clip])
                     tlinerender.get_renderer().timeline_changed()
 
                 self.last_properties = new_properties
@@ -30,11 +30,11 @@ from gi.repository import Gtk
 import mlt
 from operator import itemgetter
 import os
+import processutils
 import shutil
 import time
 
 import audiowaveform
-import audiosync
 import appconsts
 import clipeffectseditor
 import compositeeditor
@@ -60,6 +60,9 @@ import updater
 import userfolders
 import utils
 
+# Tool and dialog modules are imported when first used.
+audiosync = processutils.lazy_import("audiosync")
+
 _match_frame_writer = None
 
 # ---------------------------------- clip menu
@@ -136,8 +139,10 @@ def _open_clip_in_clip_monitor(data):
 def _show_clip_info(data):
     clip, track, item_id, x = data
 
-    width = clip.get("width")
-    height = clip.get("height")
+    # Clips created at project load are cuts and media properties are in their parent producers.
+    producer = clip.parent()
+    width = producer.get("width")
+    height = producer.get("height")
     if clip.media_type == appconsts.IMAGE:
         graphic_img = Image.open(clip.path)
         width, height = graphic_img.size
@@ -147,12 +152,12 @@ def _show_clip_info(data):
     mark_in = utils.get_tc_string(clip.clip_in)
     mark_out = utils.get_tc_string(clip.clip_out + 1) # +1 out inclusive
 
-    video_index = clip.get_int("video_index")
-    audio_index = clip.get_int("audio_index")
+    video_index = producer.get_int("video_index")
+    audio_index = producer.get_int("audio_index")
     long_video_property = "meta.media." + str(video_index) + ".codec.long_name"
     long_audio_property = "meta.media." + str(audio_index) + ".codec.long_name"
-    vcodec = clip.get(str(long_video_property))
-    acodec = clip.get(str(long_audio_property))    
+    vcodec = producer.get(str(long_video_property))
+    acodec = producer.get(str(long_audio_property))    
     if vcodec == None:
         vcodec = _("N/A")
     if acodec == None:
@@ -705,7 +710,7 @@ POPUP_HANDLERS = {"set_master":syncsplitevent.init_select_master_clip,
                   "stretch_next":_stretch_next, 
                   "stretch_prev":_stretch_prev,
                   "add_autofade":_add_autofade,
-                  "set_audio_sync_clip":audiosync.init_select_tline_sync_clip,
+                  "set_audio_sync_clip":lambda popup_data:audiosync.init_select_tline_sync_clip(popup_data),
                   "re_render":_re_render_transition_or_fade,
                   "add_clip_marker":_add_clip_marker,
                   "go_to_clip_marker":_go_to_clip_marker,
@@ -39,6 +39,7 @@ import time
 import appconsts
 import atomicfile
 import blenderheadless
+import ccrutils
 import dialogutils
 import edit
 from editorstate import current_sequence
@@ -68,6 +69,8 @@ BLENDER_TYPE_ICON = None
 
 NEWLINE = '\n'
 
+STATUS_UPDATE_MIN_INTERVAL = 0.1
+
 _status_polling_thread = None
 
 # ----------------------------------------------------- interface
@@ -446,6 +449,7 @@ class GMicContainerActions(AbstractContainerActionObject):
         self.gmic_frame_offset = gmic_frame_offset
  
         gmicheadless.clear_flag_files(self.get_container_program_id())
+        gmicheadless.open_progress_channel(self.get_container_program_id())
     
         # We need data to be available for render process, 
         # create video_render_data object with default values if not available.
@@ -481,6 +485,7 @@ class GMicContainerActions(AbstractContainerActionObject):
                     
         if gmicheadless.session_render_complete(self.get_container_program_id()) == True:
             self.remove_as_status_polling_object()
+            gmicheadless.close_progress_channel(self.get_container_program_id())
             
             job_proxy = self.get_completed_job_proxy()
             jobs.update_job_queue(job_proxy)
@@ -572,6 +577,7 @@ class MLTXMLContainerActions(AbstractContainerActionObject):
         self.clip_start_offset = clip_start_offset
  
         mltxmlheadless.clear_flag_files(self.get_container_program_id())
+        mltxmlheadless.open_progress_channel(self.get_container_program_id())
     
         # We need data to be available for render process, 
         # create video_render_data object with default values if not available.
@@ -606,6 +612,7 @@ class MLTXMLContainerActions(AbstractContainerActionObject):
                     
         if mltxmlheadless.session_render_complete(self.get_container_program_id()) == True:
             self.remove_as_status_polling_object()
+            mltxmlheadless.close_progress_channel(self.get_container_program_id())
 
             job_proxy = self.get_completed_job_proxy()
             jobs.update_job_queue(job_proxy)
@@ -634,6 +641,10 @@ class MLTXMLContainerActions(AbstractContainerActionObject):
                 
         Gdk.threads_leave()
                 
+    def abort_render(self):
+        self.remove_as_status_polling_object()
+        mltxmlheadless.abort_render(self.get_container_program_id())
+
     def create_icon(self):
         return self._create_icon_default_action()
 
@@ -668,6 +679,7 @@ class BlenderContainerActions(AbstractContainerActionObject):
         self.clip_start_offset = clip_start_offset
 
         blenderheadless.clear_flag_files(self.get_container_program_id())
+        blenderheadless.open_progress_channel(self.get_container_program_id())
         # We need data to be available for render process, 
         # create video_render_data object with default values if not available.
         if self.container_data.render_data == None:
@@ -730,6 +742,7 @@ class BlenderContainerActions(AbstractContainerActionObject):
                     
         if blenderheadless.session_render_complete(self.get_container_program_id()) == True:
             self.remove_as_status_polling_object()
+            blenderheadless.close_progress_channel(self.get_container_program_id())
 
             job_proxy = self.get_completed_job_proxy()
             jobs.update_job_queue(job_proxy)
@@ -807,8 +820,10 @@ class ContainerStatusPollingThread(threading.Thread):
             for poll_obj in self.poll_objects:
                 poll_obj.update_render_status() # make sure methids enter/exit Gtk threads
                     
-                
-            time.sleep(1.0)
+            # Render processes push status messages, message files are polled once a second
+            # if progress channel is not available.
+            ccrutils.wait_for_status_message(1.0)
+            time.sleep(STATUS_UPDATE_MIN_INTERVAL) # Let bursts of messages collect into one update.
 
     def shutdown(self):
         for poll_obj in self.poll_objects:
@@ -197,6 +197,43 @@ def check_disk_cache_size():
     check_thread.start()
 
 
+def enforce_cache_dir_size(cache_dir, max_bytes, keep_paths):
+    """
+    Deletes least recently used files until files in cache_dir use at most max_bytes.
+    File modification times are used as last use times, users of cache update them.
+    Files in keep_paths are not deleted.
+    """
+    cache_files = []
+    total_size = 0
+    for f in listdir(cache_dir):
+        file_path = cache_dir + "/" + f
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        cache_files.append((stat.st_mtime, stat.st_size, file_path))
+        total_size += stat.st_size
+
+    cache_files.sort()
+    deleted_count = 0
+    for mtime, size, file_path in cache_files:
+        if total_size <= max_bytes:
+            break
+        if file_path in keep_paths:
+            continue
+        try:
+            os.remove(file_path)
+        except OSError:
+            continue
+        total_size -= size
+        deleted_count += 1
+
+    if deleted_count > 0:
+        print("Cache", cache_dir, "deleted", deleted_count, "least recently used files, size now", total_size)
+    
+    return total_size
+
+
 class DiskCacheWarningThread(threading.Thread):
     
     def __init__(self):
@@ -241,6 +278,7 @@ def _get_disk_dir_panels():
     panels.append(DiskFolderManagementPanel(userfolders.get_render_dir(), "/" + appconsts.PROXIES_DIR, _("Proxy Files"), PROJECT_DATA_WARNING))
     panels.append(DiskFolderManagementPanel(userfolders.get_data_dir(), appconsts.CONTAINER_CLIPS_DIR, _("Container Clips"), PROJECT_DATA_WARNING, True))
     panels.append(DiskFolderManagementPanel(userfolders.get_cache_dir(), appconsts.THUMBNAILS_DIR, _("Thumbnails"), RECREATE_WARNING))
+    panels.append(DiskFolderManagementPanel(userfolders.get_cache_dir(), appconsts.TLINE_RENDER_CACHE_DIR, _("Timeline Render Cache"), RECREATE_WARNING))
     panels.append(DiskFolderManagementPanel(userfolders.get_data_dir(), appconsts.USER_PROFILES_DIR_NO_SLASH, _("User Created Custom Profiles"), PROJECT_DATA_WARNING))
 
     return panels
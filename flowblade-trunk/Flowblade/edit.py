@@ -354,6 +354,8 @@ class EditAction:
             
             if self.do_restack_compositors == True:
                 current_sequence().restack_compositors()
+
+            current_sequence().timeline_changed()
                 
             self.do_restack_compositors = False  # We wish to do this only once 
              
@@ -378,6 +380,7 @@ class EditAction:
 
         resync.calculate_and_set_child_clip_sync_states()
 
+        self._mark_clips_changed()
         tlinerender.get_renderer().timeline_changed()
         
         if self.compositor_autofollow_data != None:
@@ -386,6 +389,8 @@ class EditAction:
                 do_orphaned_compositors_delete_undo(self)
                 if self.do_restack_compositors == True:
                     current_sequence().restack_compositors()
+
+        current_sequence().timeline_changed()
                 
         # HACK, see above.
         if self.stop_for_edit:
@@ -396,6 +401,16 @@ class EditAction:
         if do_gui_update:
             self._update_gui()
             
+    def _mark_clips_changed(self):
+        # Filter edits have edited clip or clips as data members.
+        changed_clips = []
+        if hasattr(getattr(self, "clip", None), "filters"):
+            changed_clips.append(self.clip)
+        clips = getattr(self, "clips", None)
+        if isinstance(clips, list):
+            changed_clips.extend([clip for clip in clips if hasattr(clip, "filters")])
+        tlinerender.mark_clips_changed(changed_clips)
+
     def redo(self):
         PLAYER().stop_playback()
 
@@ -412,6 +427,7 @@ class EditAction:
 
         resync.calculate_and_set_child_clip_sync_states()
 
+        self._mark_clips_changed()
         tlinerender.get_renderer().timeline_changed()
         
         if self.compositor_autofollow_data != None: # This is not called from do_edit() if these exist, we need to do auto follow and orphan compositos management
@@ -421,6 +437,8 @@ class EditAction:
                 if self.do_restack_compositors == True:
                     current_sequence().restack_compositors()
 
+        current_sequence().timeline_changed()
+
         tlinewidgets.set_match_frame(-1, -1, True)
 
         # HACK, see above.
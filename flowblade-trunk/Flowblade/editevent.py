@@ -31,7 +31,6 @@ from gi.repository import Gdk
 import copy
 
 import appconsts
-import audiosync
 import clipeffectseditor
 import clipenddragmode
 import compositeeditor
@@ -54,12 +53,16 @@ import modesetting
 import movemodes
 import multimovemode
 import multitrimmode
+import processutils
 import syncsplitevent
 import tlinewidgets
 import trimmodes
 import updater
 import utils
 
+# Tool and dialog modules are imported when first used.
+audiosync = processutils.lazy_import("audiosync")
+
 
 # functions are monkeypatched in at app.py 
 display_clip_menu_pop_up = None
@@ -294,7 +297,7 @@ def tline_canvas_mouse_pressed(event, frame):
 
     #  Check if compositor is hit and if so, handle compositor editing
     if editorstate.current_is_move_mode() and timeline_visible():
-        hit_compositor = tlinewidgets.compositor_hit(frame, event.x, event.y, current_sequence().compositors)
+        hit_compositor = tlinewidgets.compositor_hit(frame, event.x, event.y)
         if hit_compositor != None:
             if editorstate.get_compositing_mode() == appconsts.COMPOSITING_MODE_STANDARD_AUTO_FOLLOW:
                 compositeeditor.set_compositor(hit_compositor)
@@ -440,7 +443,7 @@ def tline_canvas_double_click(frame, x, y):
         modesetting.set_default_edit_mode()
         return
 
-    hit_compositor = tlinewidgets.compositor_hit(frame, x, y, current_sequence().compositors)
+    hit_compositor = tlinewidgets.compositor_hit(frame, x, y)
     if hit_compositor != None:
         compositeeditor.set_compositor(hit_compositor)
         return
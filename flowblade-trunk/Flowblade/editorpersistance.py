@@ -192,7 +192,7 @@ def update_prefs_from_widgets(widgets_tuples_tuple):
     window_mode_combo, full_names, double_track_hights, top_row_layout, layout_monitor = view_prefs_widgets
 
     # Jan-2017 - SvdB
-    perf_render_threads, perf_drop_frames = performance_widgets
+    perf_render_threads, perf_drop_frames, perf_audio_levels_processes, perf_waveform_cache_mb, perf_levels_cache_mb, perf_gmic_processes, perf_blender_processes, perf_media_filmstrips = performance_widgets
 
     global prefs
     prefs.open_in_last_opended_media_dir = open_in_last_opened_check.get_active()
@@ -231,6 +231,12 @@ def update_prefs_from_widgets(widgets_tuples_tuple):
     # Jan-2017 - SvdB
     prefs.perf_render_threads = int(perf_render_threads.get_adjustment().get_value())
     prefs.perf_drop_frames = perf_drop_frames.get_active()
+    prefs.audio_levels_render_processes = int(perf_audio_levels_processes.get_adjustment().get_value())
+    prefs.waveform_surfaces_cache_mb = int(perf_waveform_cache_mb.get_adjustment().get_value())
+    prefs.audio_levels_memory_cache_mb = int(perf_levels_cache_mb.get_adjustment().get_value())
+    prefs.gmic_render_processes = int(perf_gmic_processes.get_adjustment().get_value())
+    prefs.blender_render_processes = int(perf_blender_processes.get_adjustment().get_value())
+    prefs.media_filmstrips = perf_media_filmstrips.get_active()
     # Feb-2017 - SvdB - for full file names
     prefs.show_full_file_names = full_names.get_active()
     prefs.center_on_arrow_move = auto_center_on_updown.get_active()
@@ -347,6 +353,14 @@ class EditorPreferences:
         self.default_render_directory = appconsts.USER_HOME_DIR
         self.tline_render_encoding = 0 # index of available proxy encodings, timeline rendering uses same encodings.
         self.tline_render_size = appconsts.PROXY_SIZE_FULL
+        self.tline_render_processes = 2 # number of segments rendered in parallel
+        self.tline_render_cache_mb = 4000 # timeline renders kept across sessions, least recently used are deleted first
         self.open_jobs_panel_on_add = True
         self.render_jobs_sequentially = True
         self.disk_space_warning = 1 #  [off, 500MB,1GB, 2GB], see preferenceswindow.py
+        self.audio_levels_render_processes = 0 # 0 means one process per CPU core
+        self.waveform_surfaces_cache_mb = 64 # memory budget for timeline clip audio levels images
+        self.audio_levels_memory_cache_mb = 256 # memory budget for loaded audio levels data
+        self.gmic_render_processes = 0 # 0 means one gmic process per CPU core
+        self.blender_render_processes = 2 # number of frame subranges rendered in parallel by Blender
+        self.media_filmstrips = False # write filmstrip images for video media when media is added
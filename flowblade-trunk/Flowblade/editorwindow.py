@@ -30,8 +30,6 @@ from gi.repository import Pango
 import app
 import appconsts
 import audiomonitoring
-import audiosync
-import batchrendering
 import boxmove
 import clipeffectseditor
 import clipmenuaction
@@ -44,7 +42,6 @@ import dnd
 import editevent
 import editorpersistance
 import editorstate
-import exporting
 import glassbuttons
 import gmic
 import gui
@@ -52,24 +49,22 @@ import guicomponents
 import guiutils
 import jobs
 import keyevents
-import medialinker
 import medialog
 import menuactions
 import middlebar
 import modesetting
 import monitorevent
 import monitorwidget
+import processutils
 import respaths
 import render
 import rendergui
 import panels
 import patternproducer
 from positionbar import PositionBar
-import preferenceswindow
 import projectaction
 import projectinfogui
 import proxyediting
-import titler
 import tlineaction
 import tlinerender
 import tlinewidgets
@@ -78,6 +73,14 @@ import updater
 import undo
 import workflow
 
+# Tool and dialog modules are imported when first used.
+audiosync = processutils.lazy_import("audiosync")
+batchrendering = processutils.lazy_import("batchrendering")
+exporting = processutils.lazy_import("exporting")
+medialinker = processutils.lazy_import("medialinker")
+preferenceswindow = processutils.lazy_import("preferenceswindow")
+titler = processutils.lazy_import("titler")
+
 # GUI size params
 MEDIA_MANAGER_WIDTH = 110
 MONITOR_AREA_WIDTH = 600 # defines app min width with NOTEBOOK_WIDTH 400 for small
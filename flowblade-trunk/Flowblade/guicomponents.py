@@ -1277,26 +1277,10 @@ class MediaPanel():
             media_file = PROJECT().media_files[file_id]
 
             # Filter view
-            if ((editorstate.media_view_filter == appconsts.SHOW_VIDEO_FILES)
-                and (media_file.type != appconsts.VIDEO)):
-                continue
-            if ((editorstate.media_view_filter == appconsts.SHOW_AUDIO_FILES)
-                and (media_file.type != appconsts.AUDIO)):
-                continue
-            if ((editorstate.media_view_filter == appconsts.SHOW_GRAPHICS_FILES)
-                and (media_file.type != appconsts.IMAGE)):
-                continue
-            if ((editorstate.media_view_filter == appconsts.SHOW_IMAGE_SEQUENCES)
-                and (media_file.type != appconsts.IMAGE_SEQUENCE)):
-                continue
-            if ((editorstate.media_view_filter == appconsts.SHOW_PATTERN_PRODUCERS)
-                and (media_file.type != appconsts.PATTERN_PRODUCER)):
+            if self._filtered_out(media_file):
                 continue
 
-            media_object = MediaObjectWidget(media_file, self.media_object_selected, self.release_on_media_object, bin_index, self.monitor_indicator)
-            dnd.connect_media_files_object_widget(media_object.widget)
-            dnd.connect_media_files_object_cairo_widget(media_object.img)
-            self.widget_for_mediafile[media_file] = media_object
+            media_object = self._create_media_object(media_file, bin_index)
             row_box.pack_start(media_object.widget, False, False, 0)
             column += 1
             if column == self.columns:
@@ -1308,20 +1292,91 @@ class MediaPanel():
                 column = 0
             bin_index += 1
 
+        # Last row is kept for append_media_file() if it has space left.
+        self.last_row_box = None
         if column != 0:
             filler = self._get_empty_filler()
             dnd.connect_media_drop_widget(filler)
             row_box.pack_start(filler, True, True, 0)
             self.widget.pack_start(row_box, False, False, 0)
             self.row_widgets.append(row_box)
+            self.last_row_box = row_box
+            self.last_row_filler = filler
+            self.last_row_column = column
 
         filler = self._get_empty_filler()
         dnd.connect_media_drop_widget(filler)
         self.row_widgets.append(filler)
         self.widget.pack_start(filler, True, True, 0)
+        self.next_bin_index = bin_index
 
         self.widget.show_all()
 
+    def append_media_file(self, media_file):
+        """
+        Adds widget for media file that was added last into current bin without rebuilding panel.
+        """
+        if len(self.widget_for_mediafile) == 0:
+            self.fill_data_model() # Panel may be displaying empty bin info.
+            return
+
+        if self._filtered_out(media_file):
+            return
+
+        media_object = self._create_media_object(media_file, self.next_bin_index)
+        self.next_bin_index += 1
+
+        if self.last_row_box == None:
+            row_box = Gtk.HBox()
+            dnd.connect_media_drop_widget(row_box)
+            row_box.set_size_request(MEDIA_OBJECT_WIDGET_WIDTH * self.columns, MEDIA_OBJECT_WIDGET_HEIGHT)
+            # New row goes before filler at the end of panel.
+            self.widget.pack_start(row_box, False, False, 0)
+            self.widget.reorder_child(row_box, len(self.row_widgets) - 1)
+            self.row_widgets.insert(len(self.row_widgets) - 1, row_box)
+            self.last_row_column = 0
+        else:
+            row_box = self.last_row_box
+            row_box.remove(self.last_row_filler)
+
+        row_box.pack_start(media_object.widget, False, False, 0)
+        filler = self._get_empty_filler()
+        dnd.connect_media_drop_widget(filler)
+        row_box.pack_start(filler, True, True, 0)
+        row_box.show_all()
+
+        self.last_row_column += 1
+        if self.last_row_column == self.columns:
+            self.last_row_box = None
+        else:
+            self.last_row_box = row_box
+            self.last_row_filler = filler
+
+    def _create_media_object(self, media_file, bin_index):
+        media_object = MediaObjectWidget(media_file, self.media_object_selected, self.release_on_media_object, bin_index, self.monitor_indicator)
+        dnd.connect_media_files_object_widget(media_object.widget)
+        dnd.connect_media_files_object_cairo_widget(media_object.img)
+        self.widget_for_mediafile[media_file] = media_object
+        return media_object
+
+    def _filtered_out(self, media_file):
+        if ((editorstate.media_view_filter == appconsts.SHOW_VIDEO_FILES)
+            and (media_file.type != appconsts.VIDEO)):
+            return True
+        if ((editorstate.media_view_filter == appconsts.SHOW_AUDIO_FILES)
+            and (media_file.type != appconsts.AUDIO)):
+            return True
+        if ((editorstate.media_view_filter == appconsts.SHOW_GRAPHICS_FILES)
+            and (media_file.type != appconsts.IMAGE)):
+            return True
+        if ((editorstate.media_view_filter == appconsts.SHOW_IMAGE_SEQUENCES)
+            and (media_file.type != appconsts.IMAGE_SEQUENCE)):
+            return True
+        if ((editorstate.media_view_filter == appconsts.SHOW_PATTERN_PRODUCERS)
+            and (media_file.type != appconsts.PATTERN_PRODUCER)):
+            return True
+        return False
+
     def _get_empty_filler(self, widget=None):
         filler = Gtk.EventBox()
         filler.connect("button-press-event", lambda w,e: self.empty_pressed(w,e))
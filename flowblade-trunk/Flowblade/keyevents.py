@@ -45,9 +45,9 @@ import monitorevent
 import movemodes
 import multitrimmode
 # Apr-2017 - SvdB
+import processutils
 import shortcuts
 import re
-import rotomask
 import tlineaction
 import tlinerender
 import tlinewidgets
@@ -56,6 +56,8 @@ import updater
 import projectaction
 import workflow
 
+# Tool and dialog modules are imported when first used.
+rotomask = processutils.lazy_import("rotomask")
 
 
 # ------------------------------------- keyboard events
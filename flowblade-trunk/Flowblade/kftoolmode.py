@@ -27,6 +27,7 @@ import cairo
 import math
 
 import appconsts
+import audiowaveformrenderer
 import cairoarea
 import clipeffectseditor
 import dialogutils
@@ -39,6 +40,7 @@ import mltfilters
 import propertyedit
 import propertyparse
 import respaths
+import tlinerender
 import tlinewidgets
 import updater
 
@@ -438,6 +440,7 @@ class TLineKeyFrameEditor:
     # ------------------------------------------------------ value write out
     def update_property_value(self):
         edit_data["editable_property"].write_out_keyframes(self.keyframes)
+        tlinerender.mark_clips_changed([edit_data["clip"]])
 
     # ------------------------------------------------------- debug
     def print_keyframes(self):
@@ -501,7 +504,8 @@ class TLineKeyFrameEditor:
         ex, ey, ew, eh = self._get_edit_area_rect()
         
         # Maybe draw audio levels
-        if self.edit_type == VOLUME_KF_EDIT and clip.is_blanck_clip == False and clip.waveform_data != None:
+        waveform_data = audiowaveformrenderer.get_clip_waveform_data(clip)
+        if self.edit_type == VOLUME_KF_EDIT and clip.is_blanck_clip == False and waveform_data != None:
 
             cr.set_source_rgba(*AUDIO_LEVELS_COLOR)
         
@@ -533,7 +537,7 @@ class TLineKeyFrameEditor:
             for f in range(draw_first, draw_last, step):
                 try:
                     xf = media_start_pos_pix + f * pix_per_frame
-                    hf = bar_height * clip.waveform_data[f] * 0.5
+                    hf = bar_height * waveform_data[f] * 0.5
                     if h < 1:
                         h = 1
                     cr.rectangle(xf, mid_y - hf, draw_pix_per_frame, hf * 2.0)
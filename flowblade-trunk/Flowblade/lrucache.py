@@ -0,0 +1,97 @@
+"""
+    Flowblade Movie Editor is a nonlinear video editor.
+    Copyright 2012 Janne Liljeblad.
+
+    This file is part of Flowblade Movie Editor <http://code.google.com/p/flowblade>.
+
+    Flowblade Movie Editor is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Flowblade Movie Editor is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Flowblade Movie Editor.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""
+Memory cache with a size budget in bytes and least recently used eviction.
+"""
+
+import collections
+
+
+class LRUCache:
+    """
+    Caller gives size in bytes for every item, least recently used items are
+    dropped when total size of items goes over max_bytes.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = collections.OrderedDict() # key -> (value, size_bytes)
+
+    def get(self, key):
+        """
+        Returns cached value or None if not in cache.
+        """
+        try:
+            value, size_bytes = self._items[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, size_bytes):
+        if key in self._items:
+            self._remove(key)
+
+        # Items larger then whole budget are not cached.
+        if size_bytes > self.max_bytes:
+            return
+
+        self._items[key] = (value, size_bytes)
+        self.current_bytes += size_bytes
+        self._evict()
+
+    def remove(self, key):
+        if key in self._items:
+            self._remove(key)
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self):
+        self._items = collections.OrderedDict()
+        self.current_bytes = 0
+
+    def get_stats_str(self):
+        return "items: " + str(len(self._items)) + ", bytes: " + str(self.current_bytes) + "/" + str(self.max_bytes) + \
+               ", hits: " + str(self.hits) + ", misses: " + str(self.misses) + ", evictions: " + str(self.evictions)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def _remove(self, key):
+        value, size_bytes = self._items.pop(key)
+        self.current_bytes -= size_bytes
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and len(self._items) > 0:
+            key, (value, size_bytes) = self._items.popitem(last=False)
+            self.current_bytes -= size_bytes
+            self.evictions += 1
@@ -545,6 +545,7 @@ def _relink_project_media_paths():
             media_file.path = relinked_paths[media_file.path]
 
     for seq in target_project.sequences:
+        persistance.sequence_changed(seq)
 
         # Relink clip media assets
         for track in seq.tracks:
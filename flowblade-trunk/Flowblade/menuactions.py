@@ -25,6 +25,7 @@ This module handles the less central actions inited by user from menu.
 
 from gi.repository import Gtk, Gdk
 
+import processutils
 import threading
 import webbrowser
 import time
@@ -39,10 +40,12 @@ import editorstate
 import gui
 import projectdata
 import patternproducer
-import profilesmanager
 import shortcuts
 import respaths
 
+# Tool and dialog modules are imported when first used.
+profilesmanager = processutils.lazy_import("profilesmanager")
+
 profile_manager_dialog = None
 
 # ---------------------------------------------- recreate icons
@@ -71,7 +74,7 @@ class RecreateIconsThread(threading.Thread):
                     icon_path = respaths.IMAGE_PATH + "audio_file.png"
                     media_file.info = None
                 else:
-                    (icon_path, length, info) = projectdata.thumbnailer.write_image(media_file.path)
+                    (icon_path, length, info) = projectdata.thumbnailer.write_image(media_file.path, force=True)
                     media_file.info = info
                 media_file.icon_path = icon_path
                 media_file.create_icon()
@@ -24,7 +24,6 @@ from gi.repository import Gtk
 
 import appconsts
 import audiomonitoring
-import batchrendering
 import editorpersistance
 import editorstate
 import glassbuttons
@@ -32,13 +31,17 @@ import gmic
 import gui
 import guicomponents
 import guiutils
+import processutils
 import respaths
-import titler
 import tlineaction
 import updater
 import undo
 import workflow
 
+# Tool and dialog modules are imported when first used.
+batchrendering = processutils.lazy_import("batchrendering")
+titler = processutils.lazy_import("titler")
+
 # editorwindow.EditorWindow object.
 # This needs to be set here because gui.py module ref is not available at init time
 w = None
@@ -181,7 +184,7 @@ def _create_buttons(editor_window):
     
     editor_window.tools_buttons = glassbuttons.GlassButtonsGroup(30*size_adj, 23*size_adj, 2*size_adj, 14*size_adj, 7*size_adj)
     editor_window.tools_buttons.add_button(guiutils.get_cairo_image("open_mixer"), audiomonitoring.show_audio_monitor)
-    editor_window.tools_buttons.add_button(guiutils.get_cairo_image("open_titler"), titler.show_titler)
+    editor_window.tools_buttons.add_button(guiutils.get_cairo_image("open_titler"), lambda :titler.show_titler())
     editor_window.tools_buttons.add_button(guiutils.get_cairo_image("open_gmic"), gmic.launch_gmic)
     editor_window.tools_buttons.add_button(guiutils.get_cairo_image("open_renderqueue"), lambda :batchrendering.launch_batch_rendering())
     tooltips = [_("Audio Mixer"), _("Titler"), _("G'Mic Effects"), _("Batch Render Queue")]
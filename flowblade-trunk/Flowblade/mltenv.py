@@ -75,15 +75,8 @@ def check_available_features(repo):
         for i in range(0, codecs.count()):
                 formats.append(codecs.get(i))
 
-        # filters
-        envservices = mlt.Repository.filters(repo)
-        for i in range(mlt.Properties.count(envservices)):
-            services[mlt.Properties.get_name(envservices, i)] = True
-
-        # transitions
-        envtransitions = mlt.Repository.transitions(repo)
-        for i in range(mlt.Properties.count(envtransitions)):
-            transitions[mlt.Properties.get_name(envtransitions, i)] = True
+        # filters and transitions
+        detect_services(repo)
             
         print("MLT detection succeeded, " + str(len(formats)) + " formats, "  \
         + str(len(vcodecs)) + " video codecs and " + str(len(acodecs)) + " audio codecs found.")
@@ -95,6 +88,31 @@ def check_available_features(repo):
         print("Environment detection failed, environment unknown.")
         GObject.timeout_add(2000, _show_failed_environment_info)
 
+def detect_services(repo):
+    # Listing repository services is fast compared to codecs and formats detection.
+    global services, transitions
+    services = {}
+    transitions = {}
+
+    # filters
+    envservices = mlt.Repository.filters(repo)
+    for i in range(mlt.Properties.count(envservices)):
+        services[mlt.Properties.get_name(envservices, i)] = True
+
+    # transitions
+    envtransitions = mlt.Repository.transitions(repo)
+    for i in range(mlt.Properties.count(envtransitions)):
+        transitions[mlt.Properties.get_name(envtransitions, i)] = True
+
+def get_snapshot():
+    return (acodecs, vcodecs, formats)
+
+def restore_snapshot(snapshot):
+    # Services are not in snapshot, detect_services() needs to be called separately.
+    global acodecs, vcodecs, formats, environment_detection_success
+    acodecs, vcodecs, formats = snapshot
+    environment_detection_success = True
+
 def render_profile_supported(frmt, vcodec, acodec):
     if environment_detection_success == False:
         return (True, "")
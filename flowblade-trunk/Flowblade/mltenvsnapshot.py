@@ -0,0 +1,201 @@
+"""
+    Flowblade Movie Editor is a nonlinear video editor.
+    Copyright 2012 Janne Liljeblad.
+
+    This file is part of Flowblade Movie Editor <http://code.google.com/p/flowblade>.
+
+    Flowblade Movie Editor is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Flowblade Movie Editor is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Flowblade Movie Editor.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""
+Module saves and loads snapshot of detected MLT environment, render profiles and
+filter and compositor descriptions.
+
+Helper processes use the snapshot to skip codecs detection and XML parsing on start-up.
+Snapshot is used only if MLT version, available MLT services, XML files and filter
+group translations are the same as when it was saved.
+"""
+import hashlib
+import os
+import pickle
+import time
+
+import appconsts
+import atomicfile
+import editorstate
+import mltenv
+import mltfilters
+import mlttransitions
+import renderconsumer
+import respaths
+import translations
+import userfolders
+import utils
+
+SNAPSHOT_VERSION = 1
+
+
+# --------------------------------------------------- interface
+def load_mlt_environment(repo):
+    """
+    Sets environment data, render profiles, filters and compositors from snapshot if
+    it is valid, otherwise does full detection and loading and saves a new snapshot.
+    """
+    mltenv.detect_services(repo)
+    key = _get_snapshot_key()
+
+    snapshot = _read_snapshot()
+    if snapshot != None and snapshot["key"] == key:
+        try:
+            _restore_snapshot(snapshot)
+            print("MLT environment loaded from snapshot.")
+            return
+        except Exception as e:
+            print("MLT environment snapshot restore failed:", e)
+
+    # Check for codecs and formats on the system
+    mltenv.check_available_features(repo)
+    renderconsumer.load_render_profiles()
+
+    # Load filter and compositor descriptions from xml files.
+    mltfilters.load_filters_xml(mltenv.services)
+    mlttransitions.load_compositors_xml(mltenv.transitions)
+
+    save_snapshot()
+
+def save_snapshot():
+    """
+    Saves current environment data, needs to be called after environment detection and
+    before any changes are made to loaded data.
+    """
+    if mltenv.environment_detection_success == False:
+        return
+
+    snapshot = {}
+    snapshot["key"] = _get_snapshot_key()
+    snapshot["mltenv"] = mltenv.get_snapshot()
+    snapshot["renderconsumer"] = renderconsumer.get_snapshot()
+    snapshot["mltfilters"] = mltfilters.get_catalog_snapshot()
+    snapshot["mlttransitions"] = mlttransitions.get_catalog_snapshot()
+
+    try:
+        with atomicfile.AtomicFileWriter(_get_snapshot_path(), "wb") as afw:
+            write_file = afw.get_file()
+            pickle.dump(snapshot, write_file)
+    except Exception as e:
+        print("MLT environment snapshot save failed:", e)
+
+
+# --------------------------------------------------- snapshot data
+def _get_snapshot_path():
+    return userfolders.get_cache_dir() + appconsts.MLT_ENV_SNAPSHOT_FILE
+
+def _get_snapshot_key():
+    key_data = [SNAPSHOT_VERSION, editorstate.mlt_version]
+    key_data.append(sorted(mltenv.services.keys()))
+    key_data.append(sorted(mltenv.transitions.keys()))
+    for xml_path in [respaths.FILTERS_XML_DOC, respaths.COMPOSITORS_XML_DOC, respaths.ROOT_PATH + renderconsumer.RENDER_ENCODING_FILE]:
+        key_data.append((xml_path, os.path.getmtime(xml_path)))
+    key_data.append(sorted(translations.filter_groups.items()))
+
+    return hashlib.md5(str(key_data).encode("utf-8")).hexdigest()
+
+def _read_snapshot():
+    try:
+        return utils.unpickle(_get_snapshot_path())
+    except Exception:
+        return None
+
+def _restore_snapshot(snapshot):
+    mltenv.restore_snapshot(snapshot["mltenv"])
+    renderconsumer.restore_snapshot(snapshot["renderconsumer"])
+    mltfilters.restore_catalog_snapshot(snapshot["mltfilters"])
+    mlttransitions.restore_catalog_snapshot(snapshot["mlttransitions"])
+
+
+# --------------------------------------------------- start-up benchmark
+# Helper process modules, these are launched with same start-up sequence.
+BENCHMARK_HELPERS = ["audiowaveformrenderer", "tlinerenderserver", "gmicheadless",
+                     "blenderheadless", "mltxmlheadless", "batchrendering"]
+
+def _benchmark_helper_start_up(root_path, helper_module, use_snapshot):
+    # Runs helper process start-up sequence up to environment load and prints elapsed time.
+    start_time = time.monotonic()
+
+    import importlib
+    import locale
+    import mlt
+    import editorpersistance
+    import processutils
+
+    processutils.update_sys_path(root_path)
+    importlib.import_module(helper_module)
+
+    try:
+        editorstate.mlt_version = mlt.LIBMLT_VERSION
+    except:
+        editorstate.mlt_version = "0.0.99" # magic string for "not found"
+
+    respaths.set_paths(root_path)
+    userfolders.init()
+    editorpersistance.load()
+    translations.init_languages()
+    translations.load_filters_translations()
+    mlttransitions.init_module()
+
+    repo = mlt.Factory().init()
+    processutils.prepare_mlt_repo(repo)
+    locale.setlocale(locale.LC_NUMERIC, 'C')
+
+    if use_snapshot:
+        load_mlt_environment(repo)
+    else:
+        mltenv.check_available_features(repo)
+        renderconsumer.load_render_profiles()
+        mltfilters.load_filters_xml(mltenv.services)
+        mlttransitions.load_compositors_xml(mltenv.transitions)
+
+    print("BENCHMARK_TIME", time.monotonic() - start_time)
+
+def _benchmark(root_path):
+    """
+    Prints start-up times for helper processes with and without environment snapshot.
+    Every start-up is run in a new process.
+    """
+    import subprocess
+    import sys
+
+    def run_start_up(helper_module, use_snapshot):
+        args = [sys.executable, os.path.abspath(__file__), root_path, helper_module, str(use_snapshot)]
+        output = subprocess.run(args, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        for line in output.splitlines():
+            if line.startswith("BENCHMARK_TIME"):
+                return float(line.split(" ")[1])
+        return -1.0
+
+    # Make sure a valid snapshot exists before timing.
+    run_start_up(BENCHMARK_HELPERS[0], True)
+
+    for helper_module in BENCHMARK_HELPERS:
+        full_time = run_start_up(helper_module, False)
+        snapshot_time = run_start_up(helper_module, True)
+        print(helper_module + ": full init", round(full_time * 1000.0, 1), "ms, from snapshot", round(snapshot_time * 1000.0, 1), "ms")
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) == 4:
+        _benchmark_helper_start_up(sys.argv[1], sys.argv[2], sys.argv[3] == "True")
+    else:
+        _benchmark(os.path.dirname(os.path.abspath(__file__)))
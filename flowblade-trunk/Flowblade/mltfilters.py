@@ -460,6 +460,21 @@ def load_filters_xml(services):
         add_group = sorted(group, key=lambda finfo: translations.get_filter_name(finfo.name) )
         groups.append((gkey, add_group))
 
+def get_catalog_snapshot():
+    return (groups, not_found_filters, compositor_filters, _filter_mask_filters,
+            _volume_filter_info, _brightness_filter_info, _colorize_filter_info)
+
+def restore_catalog_snapshot(snapshot):
+    """
+    Sets filters data created earlier by load_filters_xml().
+    """
+    _load_icons()
+
+    global groups, not_found_filters, compositor_filters, _filter_mask_filters, \
+           _volume_filter_info, _brightness_filter_info, _colorize_filter_info
+    groups, not_found_filters, compositor_filters, _filter_mask_filters, \
+           _volume_filter_info, _brightness_filter_info, _colorize_filter_info = snapshot
+
 def clone_filter_object(filter_object, mlt_profile):
     """
     Creates new filter object with with copied properties values.
@@ -435,6 +435,13 @@ def load_compositors_xml(transitions):
 
         mlt_compositor_transition_infos[compositor_info.name] = compositor_info
 
+def get_catalog_snapshot():
+    return (mlt_compositor_transition_infos, not_found_transitions)
+
+def restore_catalog_snapshot(snapshot):
+    global mlt_compositor_transition_infos, not_found_transitions
+    mlt_compositor_transition_infos, not_found_transitions = snapshot
+
 def get_wipe_resource_path_for_sorted_keys_index(sorted_keys_index):
     # This exists to avoid sending a list of sorted keys around or having to use global variables
     keys = list(wipe_lumas.keys())
@@ -24,15 +24,25 @@ Module for saving and loading projects.
 Main functionality of the module is to replace unpickleable 
 SwigPyObject MLT objects with pickleable python objects for save, 
 and then create MLT objects from pickled objects when project is loaded.
+
+Projects are saved as zip containers holding separately pickled records for 
+project data, media files and every sequence. Sequences that have not changed 
+since last save are written using record data created then. Older project files 
+are single pickles and are still loaded.
 """
 
+import concurrent.futures
 import copy
 import glob
 import fnmatch
+import gc
 import hashlib
 import os
 import pickle
+import threading
 import time
+import weakref
+import zipfile
 
 from gi.repository import Gdk
 
@@ -46,15 +56,24 @@ import mlttransitions
 import miscdataobjects
 import propertyparse
 import resync
+import sequence
 import userfolders
 import utils
 
+# Project container format version and record names.
+PROJECT_CONTAINER_VERSION = 1
+CONTAINER_VERSION_RECORD = "container_version"
+PROJECT_RECORD = "project"
+MEDIA_FILES_RECORD = "media_files"
+SEQUENCE_RECORD = "sequence_" # + sequence index
+ZIP_MAGIC = b"PK\x03\x04"
+
 # Unpickleable attributes for all objects
 # These are removed at save and recreated at load.
 PROJECT_REMOVE = ['profile','c_seq']
-SEQUENCE_REMOVE = ['profile','field','multitrack','tractor','monitor_clip','vectorscope','audiowave','rgbparade','outputfilter','watermark_filter']
+SEQUENCE_REMOVE = ['profile','field','multitrack','tractor','monitor_clip','vectorscope','audiowave','rgbparade','outputfilter','watermark_filter','pickled_form','timeline_index']
 PLAY_LIST_REMOVE = ['this','sequence','get_name','gain_filter','pan_filter']
-CLIP_REMOVE = ['this','clip_length']
+CLIP_REMOVE = ['this','clip_length','tline_render_generation']
 TRANSITION_REMOVE = ['this']
 FILTER_REMOVE = ['mlt_filter','mlt_filters']
 MEDIA_FILE_REMOVE = ['icon']
@@ -65,10 +84,32 @@ NOT_FOUND = "/not_found_not_found/not_found"
 # Used to send messages when loading project
 load_dialog = None
 
+# Sequence records of non-current sequences from last save. 
+# Sequence -> SequenceRecord, records are dropped when sequence is made current or changed.
+_sequence_records = weakref.WeakKeyDictionary()
+_sequence_records_lock = threading.Lock()
+
 # These are used to recrete parenting relationships
 all_clips = {}
 sync_clips = []
 
+# Shares parent producers between clips of same media during load.
+producer_registry = None
+
+# Number of threads used to resolve media paths and open media producers when loading.
+LOAD_THREADS = 8
+
+# Flag for printing project load stage timings, set with '--load-timings' launch argument.
+print_load_timings = False
+
+# Media path lookup types and resolved paths for lookups during load.
+_ASSET_PATH = 0
+_IMG_SEQ_PATH = 1
+_resolved_paths = {}
+
+# Clip paths before relative path search, used in missing file error messages.
+_clip_orig_paths = {}
+
 # Used for for convrtting to and from proxy media using projects
 project_proxy_mode = -1
 proxy_path_dict = None
@@ -103,6 +144,13 @@ class ProjectProfileNotFoundError(Exception):
     def __str__(self):
         return repr(self.value)
 
+class ProjectFileVersionError(Exception):
+
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
 # -------------------------------------------------- LOAD MESSAGES
 def _show_msg(msg, delay=0.0):
     if show_messages == True:
@@ -111,13 +159,52 @@ def _show_msg(msg, delay=0.0):
         time.sleep(delay)
         Gdk.threads_leave()
 
+def _show_progress_msg(msg, done, total):
+    # Updating GUI for every item would slow down loading of large projects.
+    if done == total or done % 10 == 0:
+        _show_msg(msg + " " + str(done) + "/" + str(total))
+
+
+class LoadStageTimer:
+    """
+    Prints project load stage timings if print_load_timings flag is set.
+    """
+    def __init__(self):
+        self.load_start = time.monotonic()
+        self.stage_start = self.load_start
+
+    def stage_done(self, stage_name):
+        now = time.monotonic()
+        if print_load_timings == True:
+            print("Load stage '" + stage_name + "':", round(now - self.stage_start, 3), "s")
+        self.stage_start = now
+
+    def load_done(self):
+        if print_load_timings == True:
+            print("Load total:", round(time.monotonic() - self.load_start, 3), "s")
+
 # -------------------------------------------------- SAVE
 def save_project(project, file_path, changed_profile_desc=None):
     """
-    Creates pickleable project object
+    Creates pickleable project object and writes it to file.
+    """
+    save_data = get_project_save_data(project, changed_profile_desc)
+    write_project_save_data(save_data, file_path)
+
+def get_project_save_data(project, changed_profile_desc=None):
+    """
+    Creates pickleable snapshot of project data. This needs to be called on GTK thread, 
+    returned data can be written on another thread while editing continues.
     """
     print("Saving project...")  # + os.path.basename(file_path)
-    
+
+    # Clip conversions done when saving with changed profile, proxy conversion or snapshot paths 
+    # are done on MLT objects, sequences still in pickled form need to be built for these.
+    if changed_profile_desc != None or snapshot_paths != None \
+        or project.proxy_data.proxy_mode == appconsts.CONVERTING_TO_USE_PROXY_MEDIA \
+        or project.proxy_data.proxy_mode == appconsts.CONVERTING_TO_USE_ORIGINAL_MEDIA:
+        materialize_all_sequences(project)
+
     # Get shallow copy
     s_proj = copy.copy(project)
     
@@ -162,6 +249,7 @@ def save_project(project, file_path, changed_profile_desc=None):
 
         # Remove unpicleable attrs
         remove_attrs(s_media_file, MEDIA_FILE_REMOVE)
+        _copy_containers(s_media_file)
 
         # Convert media files between original and proxy files
         if project_proxy_mode == appconsts.CONVERTING_TO_USE_PROXY_MEDIA:
@@ -184,20 +272,102 @@ def save_project(project, file_path, changed_profile_desc=None):
 
     s_proj.media_files = media_files
 
-    # Replace sequences with pickleable objects
-    sequences = []
-    for i in range(0, len(project.sequences)):
-        add_seq = project.sequences[i]
-        sequences.append(get_p_sequence(add_seq))
-    s_proj.sequences = sequences
+    # Saves converting clip data can't use sequence records from earlier saves.
+    use_saved_records = (_fps_conv_mult == 1.0 and _xml_new_paths_for_profile_change == None \
+                         and snapshot_paths == None \
+                         and project_proxy_mode != appconsts.CONVERTING_TO_USE_PROXY_MEDIA \
+                         and project_proxy_mode != appconsts.CONVERTING_TO_USE_ORIGINAL_MEDIA)
+
+    # Get sequence records
+    sequence_records = []
+    for seq in project.sequences:
+        sequence_records.append(_get_sequence_record(seq, seq == project.c_seq, use_saved_records))
+
+    # Sequences and media files are saved as separate records.
+    s_proj.sequences = []
+    s_proj.media_files = {}
 
     # Remove unpickleable attributes
     remove_attrs(s_proj, PROJECT_REMOVE)
+    _copy_containers(s_proj)
+
+    return ProjectSaveData(s_proj, media_files, sequence_records)
 
-    # Write out file.
-    with atomicfile.AtomicFileWriter(file_path, "wb") as afw:
+def write_project_save_data(save_data, file_path, fsync=False):
+    """
+    Pickles project data snapshot and writes it to file. Can be called on any thread.
+    """
+    with atomicfile.AtomicFileWriter(file_path, "wb", fsync=fsync) as afw:
         outfile = afw.get_file()
-        pickle.dump(s_proj, outfile)
+        with zipfile.ZipFile(outfile, "w", zipfile.ZIP_STORED) as container:
+            container.writestr(CONTAINER_VERSION_RECORD, str(PROJECT_CONTAINER_VERSION))
+            container.writestr(PROJECT_RECORD, pickle.dumps(save_data.s_proj))
+            container.writestr(MEDIA_FILES_RECORD, pickle.dumps(save_data.media_files))
+            for i in range(0, len(save_data.sequence_records)):
+                container.writestr(SEQUENCE_RECORD + str(i), save_data.sequence_records[i].get_data())
+
+
+class ProjectSaveData:
+    """
+    Pickleable snapshot of project data that does not share lists or dicts with edited objects.
+    """
+    def __init__(self, s_proj, media_files, sequence_records):
+        self.s_proj = s_proj
+        self.media_files = media_files
+        self.sequence_records = sequence_records
+
+
+class SequenceRecord:
+    """
+    Pickleable snapshot of a sequence, it is pickled when first written.
+    """
+    def __init__(self, s_seq):
+        self.s_seq = s_seq
+        self.data = None
+
+    def get_data(self):
+        # Records from earlier saves can be written by two saves at the same time.
+        with _sequence_records_lock:
+            if self.data == None:
+                self.data = pickle.dumps(self.s_seq)
+                self.s_seq = None
+            return self.data
+
+
+def _get_sequence_record(seq, is_current, use_saved_records):
+    # Current sequence is being edited and is always pickled again.
+    if use_saved_records and not is_current:
+        try:
+            return _sequence_records[seq]
+        except KeyError:
+            pass
+
+    if is_pickled_form(seq):
+        # Sequence not built after load is already in pickleable form.
+        s_seq = copy.copy(seq)
+        remove_attrs(s_seq, SEQUENCE_REMOVE)
+        _copy_containers(s_seq)
+    else:
+        s_seq = get_p_sequence(seq)
+    record = SequenceRecord(s_seq)
+
+    if use_saved_records and not is_current:
+        _sequence_records[seq] = record
+    
+    return record
+
+def _copy_containers(obj):
+    # Lists and dicts are copied so that save data is not changed by edits while it is being written.
+    for name, value in obj.__dict__.items():
+        if isinstance(value, (list, dict)):
+            setattr(obj, name, copy.copy(value))
+
+def sequence_changed(seq):
+    """
+    Called when sequence is made current or its data is changed when not current
+    so that it is pickled again on next save.
+    """
+    _sequence_records.pop(seq, None)
 
 def get_p_sequence(sequence):
     """
@@ -218,6 +388,7 @@ def get_p_sequence(sequence):
 
     # Remove unpickleable attributes
     remove_attrs(s_seq, SEQUENCE_REMOVE)
+    _copy_containers(s_seq)
 
     return s_seq
 
@@ -237,6 +408,7 @@ def get_p_playlist(playlist):
     
     # Remove unpicleable attributes
     remove_attrs(s_playlist, PLAY_LIST_REMOVE)
+    _copy_containers(s_playlist)
    
     return s_playlist
 
@@ -293,6 +465,10 @@ def get_p_clip(clip):
 
     # Add pickleable filters
     s_clip.filters = filters
+
+    _copy_containers(s_clip)
+    if getattr(s_clip, "container_data", None) != None:
+        s_clip.container_data = copy.copy(s_clip.container_data)
     
     # Do proxy mode convert if needed
     if (project_proxy_mode == appconsts.CONVERTING_TO_USE_PROXY_MEDIA or 
@@ -317,6 +493,7 @@ def get_p_filter(f):
     """
     s_filter = copy.copy(f)
     remove_attrs(s_filter, FILTER_REMOVE)
+    _copy_containers(s_filter)
     if f.info.multipart_filter == False:
         s_filter.is_multi_filter = False
     else:
@@ -330,6 +507,8 @@ def get_p_compositors(compositors):
         s_compositor = copy.copy(compositor)
         s_compositor.transition = copy.copy(compositor.transition)
         s_compositor.transition.mlt_transition = None
+        _copy_containers(s_compositor)
+        _copy_containers(s_compositor.transition)
         if _fps_conv_mult != 1.0:
             _update_compositor_in_out_for_fps_change(s_compositor)
 
@@ -387,9 +566,15 @@ def _save_changed_xml_file(s_media_file, new_profile):
 
 # -------------------------------------------------- LOAD
 def load_project(file_path, icons_and_thumnails=True, relinker_load=False):
+    """
+    Loads project in stages: media paths are resolved and media producers opened 
+    concurrently in thread pools, MLT objects are then created on calling thread.
+    """
+    load_timer = LoadStageTimer()
     _show_msg("Unpickling")
 
-    project = utils.unpickle(file_path)
+    project = read_project_file(file_path)
+    load_timer.stage_done("unpickle")
 
     # Relinker only operates on pickleable python data 
     if relinker_load:
@@ -430,13 +615,20 @@ def load_project(file_path, icons_and_thumnails=True, relinker_load=False):
         # This fixes Media Relinked projects with SAVEFILE_VERSION < 4:
         if (not(hasattr(media_file,  "is_proxy_file"))):
             FIX_N_TO_4_MEDIA_FILE_COMPATIBILITY(media_file)
-            
+
+    # Relative path searches are slow, resolve all media paths concurrently.
+    _clear_load_paths()
+    load_clips = _get_load_clips(project.sequences)
+    _resolve_media_paths(project, load_clips)
+    load_timer.stage_done("resolve media paths")
+
+    for k, media_file in project.media_files.items():
         # Try to find relative path files if needed for non-proxy media files
         if media_file.is_proxy_file == False:
             if media_file.type != appconsts.PATTERN_PRODUCER and media_file.type != appconsts.IMAGE_SEQUENCE:
-                media_file.path = get_media_asset_path(media_file.path, _load_file_path)
+                media_file.path = _get_resolved_path(_ASSET_PATH, media_file.path)
             elif media_file.type == appconsts.IMAGE_SEQUENCE:
-                media_file.path = get_img_seq_media_path(media_file.path, _load_file_path)
+                media_file.path = _get_resolved_path(_IMG_SEQ_PATH, media_file.path)
 
         # This attr was added for 1.8. It is not computed for older projects.
         if (not hasattr(media_file, "info")):
@@ -460,32 +652,39 @@ def load_project(file_path, icons_and_thumnails=True, relinker_load=False):
             if os.path.isfile(media_file.second_file_path): # Original media file exists, use it
                 media_file.set_as_original_media_file()
 
-    # Add MLT objects to sequences.
-    global all_clips, sync_clips
-    seq_count = 1
+    _prepare_clips_for_load(load_clips)
+    load_timer.stage_done("prepare clips")
+
+    # Missing media is reported on load also for sequences that are not built yet.
+    _check_clip_media_exists(load_clips)
+
     for seq in project.sequences:
         FIX_N_TO_3_SEQUENCE_COMPATIBILITY(seq)
             
         if not hasattr(seq, "compositing_mode"):
             seq.compositing_mode = appconsts.COMPOSITING_MODE_TOP_DOWN_FREE_MOVE
+        if not hasattr(seq, "tline_render_segments"):
+            seq.tline_render_segments = []
 
-        _show_msg(_("Building sequence ") + str(seq_count))
-        all_clips = {}
-        sync_clips = []
-                
-        seq.profile = project.profile
-        fill_sequence_mlt(seq, project.SAVEFILE_VERSION)
-
-        handle_seq_watermark(seq)
+        # Compositors are fixed here because sequences saved in pickled form get current SAVEFILE_VERSION.
+        for py_compositor in seq.compositors:
+            # Keeping backwards compability
+            if project.SAVEFILE_VERSION < 3:
+                FIX_N_TO_3_COMPOSITOR_COMPABILITY(py_compositor, project.SAVEFILE_VERSION)
+            if not hasattr(py_compositor, "obey_autofollow"): # "obey_autofollow" attr was added for 1.16
+                py_compositor.obey_autofollow = True
 
-        if not hasattr(seq, "seq_len"):
-            seq.update_edit_tracks_length()
+        seq.profile = project.profile
+        seq.pickled_form = True
 
-        seq_count = seq_count + 1
+    # Only current sequence gets MLT objects now, other sequences are kept in their 
+    # pickled form until they are first selected or rendered, see materialize_sequence().
+    c_seq = project.sequences[project.c_seq_index]
+    _show_msg(_("Building sequence ") + c_seq.name)
+    _build_sequence_mlt(c_seq, project.SAVEFILE_VERSION, load_timer)
+    _clear_load_paths()
+    load_timer.stage_done("build sequence")
 
-    all_clips = {}
-    sync_clips = []
-                
     if(not hasattr(project, "update_media_lengths_on_load")):
         project.update_media_lengths_on_load = True # old projects < 1.10 had wrong media length data which just was never used.
                                                     # 1.10 needed that data for the first time and required recreating it correctly for older projects
@@ -495,12 +694,239 @@ def load_project(file_path, icons_and_thumnails=True, relinker_load=False):
         for k, media_file in project.media_files.items():
             media_file.create_icon()
     
-    project.c_seq = project.sequences[project.c_seq_index]
+    project.c_seq = c_seq
     if icons_and_thumnails == True:
         project.init_thumbnailer()
+    load_timer.stage_done("icons")
+    load_timer.load_done()
+
+    return project
+
+def read_project_file(file_path):
+    """
+    Returns unpickled project object from project container file or from a pickle file 
+    saved before container format was used.
+    """
+    # Unpickling creates millions of objects for large projects and cyclic garbage collection
+    # would run many full collections during load. Unpickled objects are all kept.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _read_project_file(file_path)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def _read_project_file(file_path):
+    with open(file_path, "rb") as f:
+        is_container = (f.read(len(ZIP_MAGIC)) == ZIP_MAGIC)
+    
+    if not is_container:
+        return utils.unpickle(file_path)
+
+    with zipfile.ZipFile(file_path, "r") as container:
+        container_version = int(container.read(CONTAINER_VERSION_RECORD))
+        if container_version > PROJECT_CONTAINER_VERSION:
+            raise ProjectFileVersionError(str(container_version))
+
+        project = pickle.loads(container.read(PROJECT_RECORD))
+        project.media_files = pickle.loads(container.read(MEDIA_FILES_RECORD))
+        project.sequences = []
+        record_names = set(container.namelist())
+        while SEQUENCE_RECORD + str(len(project.sequences)) in record_names:
+            record = container.read(SEQUENCE_RECORD + str(len(project.sequences)))
+            project.sequences.append(pickle.loads(record))
 
     return project
 
+def materialize_sequence(project, seq):
+    """
+    Creates MLT objects for a sequence of project that was left in its pickled form on project load.
+    Does nothing for sequences that already have MLT objects.
+    """
+    if not is_pickled_form(seq):
+        return
+
+    global show_messages
+    c_seq = project.c_seq
+    saved_project = editorstate.project
+    saved_show_messages = show_messages
+    saved_sync_children = resync.sync_children
+    show_messages = False # load dialog is not available after load
+    resync.sync_children = {}
+    # editorstate.project needs to be available for sequence building
+    editorstate.project = project
+    try:
+        _build_sequence_mlt(seq, project.SAVEFILE_VERSION)
+    finally:
+        show_messages = saved_show_messages
+        resync.sync_children = saved_sync_children
+        project.c_seq = c_seq # fill_sequence_mlt() sets built sequence as current
+        editorstate.project = saved_project
+
+def materialize_all_sequences(project):
+    for seq in project.sequences:
+        materialize_sequence(project, seq)
+
+def is_pickled_form(seq):
+    return getattr(seq, "pickled_form", False)
+
+def _build_sequence_mlt(seq, SAVEFILE_VERSION, load_timer=None):
+    # Opens media producers for sequence clips and replaces py objects in sequence with MLT objects.
+    global all_clips, sync_clips, producer_registry
+    all_clips = {}
+    sync_clips = []
+    producer_registry = sequence.ProducerRegistry(seq.profile)
+    try:
+        _open_media_producers(_get_load_clips([seq]))
+        if load_timer != None:
+            load_timer.stage_done("open media")
+
+        fill_sequence_mlt(seq, SAVEFILE_VERSION)
+
+        handle_seq_watermark(seq)
+
+        if not hasattr(seq, "seq_len"):
+            seq.update_edit_tracks_length()
+
+        seq.pickled_form = False
+        print("Sequence clips created using", producer_registry.get_stats_str())
+    finally:
+        all_clips = {}
+        sync_clips = []
+        producer_registry = None
+
+def _get_load_clips(sequences):
+    # Returns (track id, clip) tuples for all clips in given sequences.
+    load_clips = []
+    for seq in sequences:
+        for py_track in seq.tracks:
+            for clip in py_track.clips:
+                load_clips.append((py_track.id, clip))
+    
+    return load_clips
+
+def _is_file_clip(clip):
+    return (clip.is_blanck_clip == False and (clip.media_type != appconsts.PATTERN_PRODUCER))
+
+def _has_rendered_container_media(clip):
+    container_data = getattr(clip, "container_data", None)
+    return (container_data != None and container_data.rendered_media != None)
+
+def _resolve_media_paths(project, load_clips):
+    lookups = set()
+    for k, media_file in project.media_files.items():
+        if media_file.is_proxy_file == True or not hasattr(media_file, "path"):
+            continue
+        if media_file.type == appconsts.IMAGE_SEQUENCE:
+            lookups.add((_IMG_SEQ_PATH, media_file.path))
+        elif media_file.type != appconsts.PATTERN_PRODUCER:
+            lookups.add((_ASSET_PATH, media_file.path))
+
+    # Rendered container clip media is not searched, it needs to be re-rendered if missing.
+    for track_id, clip in load_clips:
+        if not _is_file_clip(clip) or _has_rendered_container_media(clip):
+            continue
+        if clip.media_type == appconsts.IMAGE_SEQUENCE:
+            lookups.add((_IMG_SEQ_PATH, clip.path))
+        else:
+            lookups.add((_ASSET_PATH, clip.path))
+
+    msg = _("Resolving media paths")
+    _show_msg(msg)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=LOAD_THREADS) as executor:
+        futures = {executor.submit(_resolve_path, lookup): lookup for lookup in lookups}
+        done = 0
+        for future in concurrent.futures.as_completed(futures):
+            _resolved_paths[futures[future]] = future.result()
+            done += 1
+            _show_progress_msg(msg, done, len(futures))
+
+def _resolve_path(lookup):
+    lookup_type, path = lookup
+    if lookup_type == _IMG_SEQ_PATH:
+        return get_img_seq_media_path(path, _load_file_path)
+    else:
+        return get_media_asset_path(path, _load_file_path)
+
+def _get_resolved_path(lookup_type, path):
+    try:
+        return _resolved_paths[(lookup_type, path)]
+    except KeyError:
+        return _resolve_path((lookup_type, path))
+
+def _clear_load_paths():
+    global _resolved_paths, _clip_orig_paths
+    _resolved_paths = {}
+    _clip_orig_paths = {}
+
+def _prepare_clips_for_load(load_clips):
+    # Adds missing attributes and sets final media paths for clips before MLT objects are created.
+    for track_id, clip in load_clips:
+        # Add color attribute if not found
+        if not hasattr(clip, "color"):
+            clip.color = None
+            
+        # Add markers list if not found
+        if not hasattr(clip, "markers"):
+            clip.markers = []
+
+        # Add img seq ttl value for all clips if not found, we need this present in every clip so we test for 'clip.ttl == None' to get stuff working
+        if not hasattr(clip, "ttl"):
+            clip.ttl = None
+
+        # Add container data if not found.
+        if not hasattr(clip, "container_data"):
+            clip.container_data = None
+
+        if not _is_file_clip(clip):
+            continue
+
+        _clip_orig_paths[id(clip)] = clip.path # Save the path for error message
+
+        # Possibly do a relative file search to all but rendered container clip media, that needs to be re-rendered.
+        if not _has_rendered_container_media(clip):
+            if clip.media_type != appconsts.IMAGE_SEQUENCE:
+                clip.path = _get_resolved_path(_ASSET_PATH, clip.path)
+            else:
+                clip.path = _get_resolved_path(_IMG_SEQ_PATH, clip.path)
+
+        # Try to fix possible missing proxy files for clips if we are in proxy mode.
+        if not os.path.isfile(clip.path) and project_proxy_mode == appconsts.USE_PROXY_MEDIA:
+            try:
+                possible_orig_file_path = proxy_path_dict[clip.path] # This dict was filled with media file data.
+                if os.path.isfile(possible_orig_file_path): # Original media file exists, use it
+                    clip.path = possible_orig_file_path
+            except:
+                pass # missing proxy file fix has failed
+
+        # If container clip rendered media is missing try to use unrendered media.
+        if not os.path.isfile(clip.path) and clip.container_data != None:
+            if clip.path != clip.container_data.unrendered_media:
+                clip.path = clip.container_data.unrendered_media
+                clip.container_data.clear_rendered_media()
+
+def _check_clip_media_exists(load_clips):
+    for track_id, clip in load_clips:
+        if not _is_file_clip(clip):
+            continue
+        if sequence.get_media_type(clip.path) == appconsts.FILE_DOES_NOT_EXIST:
+            raise FileProducerNotFoundError(_clip_orig_paths.get(id(clip), clip.path))
+
+def _open_media_producers(load_clips):
+    keys = set()
+    for track_id, clip in load_clips:
+        if not _is_file_clip(clip):
+            continue
+        # Missing files are reported when clips are created.
+        if sequence.get_media_type(clip.path) == appconsts.FILE_DOES_NOT_EXIST:
+            continue
+        keys.add((clip.path, track_id, clip.ttl))
+
+    msg = _("Opening media")
+    _show_msg(msg)
+    producer_registry.open_parent_producers(list(keys), LOAD_THREADS, lambda done, total: _show_progress_msg(msg, done, total))
+
 def fill_sequence_mlt(seq, SAVEFILE_VERSION):
     """
     Replaces sequences py objects with mlt objects
@@ -529,12 +955,6 @@ def fill_sequence_mlt(seq, SAVEFILE_VERSION):
     # Create and connect compositors.
     mlt_compositors = []
     for py_compositor in seq.compositors:
-            # Keeping backwards compability
-            if SAVEFILE_VERSION < 3:
-                FIX_N_TO_3_COMPOSITOR_COMPABILITY(py_compositor, SAVEFILE_VERSION)
-            if not hasattr(py_compositor, "obey_autofollow"): # "obey_autofollow" attr was added for 1.16
-                py_compositor.obey_autofollow = True
-                
             # Create new compositor object
             compositor = mlttransitions.create_compositor(py_compositor.type_id)                                        
             compositor.create_mlt_objects(seq.profile)
@@ -591,49 +1011,11 @@ def fill_track_mlt(mlt_track, py_track):
         mlt_clip = None
         append_created = True # blanks get appended at creation time, other clips don't
 
-        # Add color attribute if not found
-        if not hasattr(clip, "color"):
-            clip.color = None
-            
-        # Add markers list if not found
-        if not hasattr(clip, "markers"):
-            clip.markers = []
-
-        # Add img seq ttl value for all clips if not found, we need this present in every clip so we test for 'clip.ttl == None' to get stuff working
-        if not hasattr(clip, "ttl"):
-            clip.ttl = None
-
-        # Add container data if not found.
-        if not hasattr(clip, "container_data"):
-            clip.container_data = None
-
-        # normal clip
+        # normal clip, attributes and media path were set in _prepare_clips_for_load()
         if (clip.is_blanck_clip == False and (clip.media_type != appconsts.PATTERN_PRODUCER)):
-            orig_path = clip.path # Save the path for error message
-
-            # Possibly do a relative file search to all but rendered container clip media, that needs to be re-rendered.
-            if not(clip.container_data != None and clip.container_data.rendered_media != None):
-                if clip.media_type != appconsts.IMAGE_SEQUENCE:
-                    clip.path = get_media_asset_path(clip.path, _load_file_path)
-                else:
-                    clip.path = get_img_seq_media_path(clip.path, _load_file_path)
-
-            # Try to fix possible missing proxy files for clips if we are in proxy mode.
-            if not os.path.isfile(clip.path) and project_proxy_mode == appconsts.USE_PROXY_MEDIA:
-                try:
-                    possible_orig_file_path = proxy_path_dict[clip.path] # This dict was filled with media file data.
-                    if os.path.isfile(possible_orig_file_path): # Original media file exists, use it
-                        clip.path = possible_orig_file_path
-                except:
-                    pass # missing proxy file fix has failed
-
-            # If container clip rendered media is missing try to use unrendered media.
-            if not os.path.isfile(clip.path) and clip.container_data != None:
-                if clip.path != clip.container_data.unrendered_media:
-                    clip.path = clip.container_data.unrendered_media
-                    clip.container_data.clear_rendered_media()
+            orig_path = _clip_orig_paths.get(id(clip), clip.path) # Save the path for error message
                     
-            mlt_clip = sequence.create_file_producer_clip(clip.path, None, False, clip.ttl)
+            mlt_clip = sequence.create_file_producer_cut_clip(producer_registry, clip.path, mlt_track.id, clip.ttl)
             
             if mlt_clip == None:
                 raise FileProducerNotFoundError(orig_path)
@@ -874,3 +1256,146 @@ compositors_index_to_type_id = ["##affine","##opacity_kf","##pict_in_pict", "##r
                                 "##grain_extract", "##grain_merge", "##hardlight", "##hue", "##lighten",
                                 "##multiply", "##overlay", "##saturation", "##screen", "##softlight",
                                 "##subtract", "##value"]
+
+# --------------------------------------------------------- save benchmark
+class _BenchmarkObject:
+    pass
+
+class _BenchmarkMltObject:
+    # Stands for MLT objects in built sequences, save fails if one is left in save data.
+    def __reduce__(self):
+        raise pickle.PicklingError("MLT object left in save data")
+
+def _get_benchmark_clip(path, clip_in, filters_count, built):
+    clip = _BenchmarkObject()
+    clip.id = clip_in
+    clip.path = path
+    clip.clip_in = clip_in
+    clip.clip_out = clip_in + 100
+    clip.markers = []
+    clip.mute_filter = None
+    clip.sync_data = None
+    clip.waveform_data = None
+    clip.filters = []
+    for i in range(0, filters_count):
+        f = _BenchmarkObject()
+        f.properties = [("property_" + str(j), str(j * 0.5), 1) for j in range(0, 10)]
+        if built:
+            f.info = _BenchmarkObject()
+            f.info.multipart_filter = False
+            f.mlt_filter = _BenchmarkMltObject()
+        clip.filters.append(f)
+    if built:
+        clip.this = _BenchmarkMltObject()
+        clip.clip_length = clip.clip_out - clip.clip_in + 1
+    return clip
+
+def _get_benchmark_sequence(name, clips_count, filters_count, built):
+    # Built sequences have MLT objects like current sequence after load, others are in pickled form.
+    seq = _BenchmarkObject()
+    seq.name = name
+    seq.tracks = []
+    for i in range(0, 8):
+        track = _BenchmarkObject()
+        track.clips = []
+        for j in range(0, clips_count // 8):
+            path = "/benchmark/media/clip_" + str(j % (clips_count // 10)) + ".mp4"
+            track.clips.append(_get_benchmark_clip(path, j, filters_count, built))
+        if built:
+            track.this = _BenchmarkMltObject()
+            track.gain_filter = _BenchmarkMltObject()
+            track.pan_filter = _BenchmarkMltObject()
+        seq.tracks.append(track)
+
+    seq.compositors = []
+    for i in range(0, clips_count // 40):
+        compositor = _BenchmarkObject()
+        compositor.clip_in = i * 10
+        compositor.clip_out = i * 10 + 50
+        compositor.transition = _BenchmarkObject()
+        compositor.transition.properties = [("property_" + str(j), str(j * 0.5), 1) for j in range(0, 10)]
+        compositor.transition.mlt_transition = _BenchmarkMltObject() if built else None
+        seq.compositors.append(compositor)
+
+    if built:
+        seq.profile = _BenchmarkMltObject()
+        seq.multitrack = _BenchmarkMltObject()
+        seq.tractor = _BenchmarkMltObject()
+    else:
+        seq.pickled_form = True
+    return seq
+
+def _get_benchmark_project(sequences_count, clips_count, filters_count):
+    project = _BenchmarkObject()
+    project.profile_desc = "benchmark"
+    project.proxy_data = _BenchmarkObject()
+    project.proxy_data.proxy_mode = appconsts.USE_ORIGINAL_MEDIA
+    project.media_files = {}
+    for i in range(0, clips_count // 10):
+        media_file = _BenchmarkObject()
+        media_file.id = i
+        media_file.path = "/benchmark/media/clip_" + str(i) + ".mp4"
+        media_file.type = appconsts.VIDEO
+        project.media_files[i] = media_file
+
+    project.sequences = []
+    for i in range(0, sequences_count):
+        built = (i == 0) # only current sequence is built on load
+        project.sequences.append(_get_benchmark_sequence("sequence_" + str(i), clips_count, filters_count, built))
+    project.c_seq = project.sequences[0]
+
+    return project
+
+def _benchmark(sequences_count=10, clips_count=4000, filters_count=3, runs=3):
+    """
+    Prints project save and load times for single pickle file and project container,
+    best of runs for each.
+    """
+    import tempfile
+
+    project = _get_benchmark_project(sequences_count, clips_count, filters_count)
+    save_dir = tempfile.mkdtemp()
+
+    def best_time(func):
+        times = []
+        for i in range(0, runs):
+            gc.collect() # garbage from earlier runs is not collected during measured run
+            start_time = time.monotonic()
+            func()
+            times.append(time.monotonic() - start_time)
+        return round(min(times) * 1000.0, 1)
+
+    # Single pickle write, projects were saved like this before container format.
+    # Built current sequence is converted with get_p_sequence() in both save paths.
+    def pickle_save():
+        s_proj = copy.copy(project)
+        s_proj.sequences = [_get_sequence_record(seq, True, False).s_seq for seq in project.sequences]
+        remove_attrs(s_proj, PROJECT_REMOVE)
+        with atomicfile.AtomicFileWriter(save_dir + "/pickle.flb", "wb") as afw:
+            pickle.dump(s_proj, afw.get_file())
+
+    # First container save pickles all sequences.
+    def first_save():
+        _sequence_records.clear()
+        save_project(project, save_dir + "/container.flb")
+
+    pickle_time = best_time(pickle_save)
+    first_save_time = best_time(first_save)
+
+    # Later saves convert and pickle only current sequence.
+    resave_time = best_time(lambda: save_project(project, save_dir + "/container.flb"))
+    current_sequence_time = best_time(lambda: get_p_sequence(project.c_seq))
+
+    pickle_read_time = best_time(lambda: read_project_file(save_dir + "/pickle.flb"))
+    read_time = best_time(lambda: read_project_file(save_dir + "/container.flb"))
+
+    print("sequences:", sequences_count, "clips per sequence:", clips_count, "filters per clip:", filters_count)
+    print("single pickle save:", pickle_time, "ms")
+    print("container first save:", first_save_time, "ms")
+    print("container save, only current sequence changed:", resave_time, "ms, of which get_p_sequence():", current_sequence_time, "ms")
+    print("single pickle read:", pickle_read_time, "ms")
+    print("container read:", read_time, "ms")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -480,25 +480,66 @@ def _performance_panel():
     perf_drop_frames = Gtk.CheckButton()
     perf_drop_frames.set_active(prefs.perf_drop_frames)
 
+    levels_adj = Gtk.Adjustment(value=prefs.audio_levels_render_processes, lower=0, upper=multiprocessing.cpu_count(), step_incr=1)
+    perf_audio_levels_processes = Gtk.SpinButton(adjustment=levels_adj)
+    perf_audio_levels_processes.set_numeric(True)
+
+    waveform_cache_adj = Gtk.Adjustment(value=prefs.waveform_surfaces_cache_mb, lower=8, upper=1024, step_incr=8)
+    perf_waveform_cache_mb = Gtk.SpinButton(adjustment=waveform_cache_adj)
+    perf_waveform_cache_mb.set_numeric(True)
+
+    levels_cache_adj = Gtk.Adjustment(value=prefs.audio_levels_memory_cache_mb, lower=16, upper=4096, step_incr=16)
+    perf_levels_cache_mb = Gtk.SpinButton(adjustment=levels_cache_adj)
+    perf_levels_cache_mb.set_numeric(True)
+
+    gmic_adj = Gtk.Adjustment(value=prefs.gmic_render_processes, lower=0, upper=multiprocessing.cpu_count(), step_incr=1)
+    perf_gmic_processes = Gtk.SpinButton(adjustment=gmic_adj)
+    perf_gmic_processes.set_numeric(True)
+
+    blender_adj = Gtk.Adjustment(value=prefs.blender_render_processes, lower=1, upper=multiprocessing.cpu_count(), step_incr=1)
+    perf_blender_processes = Gtk.SpinButton(adjustment=blender_adj)
+    perf_blender_processes.set_numeric(True)
+
+    perf_media_filmstrips = Gtk.CheckButton()
+    perf_media_filmstrips.set_active(prefs.media_filmstrips)
+
     # Tooltips
     perf_render_threads.set_tooltip_text(_("Between 1 and the number of CPU Cores"))
     perf_drop_frames.set_tooltip_text(_("Allow Frame Dropping for real-time rendering, when needed"))
+    perf_audio_levels_processes.set_tooltip_text(_("Number of processes used to render audio levels, 0 uses all CPU Cores"))
+    perf_waveform_cache_mb.set_tooltip_text(_("Memory used to cache timeline audio levels images"))
+    perf_levels_cache_mb.set_tooltip_text(_("Memory used to keep audio levels data loaded from disk"))
+    perf_gmic_processes.set_tooltip_text(_("Number of gmic processes used to render G'MIC effects, 0 uses all CPU Cores"))
+    perf_blender_processes.set_tooltip_text(_("Number of Blender processes used to render Blender container clips"))
+    perf_media_filmstrips.set_tooltip_text(_("Write filmstrip images of video media when media is added, this makes adding media slower"))
 
     # Layout
     row0 = _row(guiutils.get_left_justified_box([warning_icon, warning_label]))
     row1 = _row(guiutils.get_two_column_box(Gtk.Label(label=_("Render Threads:")), perf_render_threads, PREFERENCES_LEFT))
     row2 = _row(guiutils.get_checkbox_row_box(perf_drop_frames, Gtk.Label(label=_("Allow Frame Dropping"))))
+    row3 = _row(guiutils.get_two_column_box(Gtk.Label(label=_("Audio Levels Render Processes:")), perf_audio_levels_processes, PREFERENCES_LEFT))
+    row4 = _row(guiutils.get_two_column_box(Gtk.Label(label=_("Audio Levels Images Cache (MB):")), perf_waveform_cache_mb, PREFERENCES_LEFT))
+    row5 = _row(guiutils.get_two_column_box(Gtk.Label(label=_("Audio Levels Data Cache (MB):")), perf_levels_cache_mb, PREFERENCES_LEFT))
+    row6 = _row(guiutils.get_two_column_box(Gtk.Label(label=_("G'MIC Render Processes:")), perf_gmic_processes, PREFERENCES_LEFT))
+    row7 = _row(guiutils.get_two_column_box(Gtk.Label(label=_("Blender Render Processes:")), perf_blender_processes, PREFERENCES_LEFT))
+    row8 = _row(guiutils.get_checkbox_row_box(perf_media_filmstrips, Gtk.Label(label=_("Write Media Filmstrips"))))
 
     vbox = Gtk.VBox(False, 2)
     vbox.pack_start(row0, False, False, 0)
     vbox.pack_start(guiutils.pad_label(12, 12), False, False, 0)
     vbox.pack_start(row1, False, False, 0)
     vbox.pack_start(row2, False, False, 0)
+    vbox.pack_start(row3, False, False, 0)
+    vbox.pack_start(row4, False, False, 0)
+    vbox.pack_start(row5, False, False, 0)
+    vbox.pack_start(row6, False, False, 0)
+    vbox.pack_start(row7, False, False, 0)
+    vbox.pack_start(row8, False, False, 0)
     vbox.pack_start(Gtk.Label(), True, True, 0)
 
     guiutils.set_margins(vbox, 12, 0, 12, 12)
 
-    return vbox, (perf_render_threads, perf_drop_frames)
+    return vbox, (perf_render_threads, perf_drop_frames, perf_audio_levels_processes, perf_waveform_cache_mb, perf_levels_cache_mb, perf_gmic_processes, perf_blender_processes, perf_media_filmstrips)
 
 def _row(row_cont):
     row_cont.set_size_request(10, 26)
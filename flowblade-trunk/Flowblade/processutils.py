@@ -25,7 +25,9 @@ Module provides functions needed to get application processes in Flowblde runnin
 In addition to main application, Flowblade launches several processes that are essentially 
 independently running applications. 
 """
+import importlib.util
 import sys
+import types
 
 
 def update_sys_path(modules_path):
@@ -41,3 +43,75 @@ def prepare_mlt_repo(repo):
     repo.producers().set('qimage', None, 0)
     repo.producers().set('qtext', None, 0)
     repo.producers().set('kdenlivetitle', None, 0)
+
+def lazy_import(module_name):
+    """
+    Returns module that is actually imported when its attributes are first accessed.
+    Used for tool and dialog modules that are not needed at application start-up.
+    """
+    try:
+        return sys.modules[module_name]
+    except KeyError:
+        pass
+
+    spec = importlib.util.find_spec(module_name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    loader.exec_module(module)
+    return module
+
+def is_module_loaded(module):
+    # Lazy module class is changed to module type when module code is executed.
+    return type(module) == types.ModuleType
+
+def print_startup_profile_report(import_log_path, launch_time, top_count=25):
+    """
+    Prints time from launch to first frame and slowest imports from 'python3 -X importtime' log.
+    """
+    import time
+
+    print("--- STARTUP PROFILE ---")
+    if launch_time != None:
+        print("Time to first frame:", round((time.time() - launch_time) * 1000.0), "ms")
+
+    if import_log_path == None:
+        return
+
+    sys.stderr.flush()
+    imports = [] # (self_us, cumulative_us, depth, name) tuples
+    try:
+        with open(import_log_path, "r") as log_file:
+            for line in log_file:
+                if not line.startswith("import time:"):
+                    continue
+                tokens = line[len("import time:"):].split("|")
+                try:
+                    self_us = int(tokens[0])
+                    cumulative_us = int(tokens[1])
+                except ValueError:
+                    continue # header line
+                name_field = tokens[2].rstrip("\n")
+                name = name_field.lstrip()
+                imports.append((self_us, cumulative_us, len(name_field) - len(name), name))
+    except OSError as e:
+        print("Import time log could not be read:", e)
+        return
+
+    if len(imports) == 0:
+        print("No import times found in", import_log_path)
+        return
+
+    total_us = sum([imp[0] for imp in imports])
+    print("Imported modules:", len(imports), ", total import time:", round(total_us / 1000.0), "ms")
+
+    print("Slowest top level imports, cumulative ms:")
+    top_depth = min([imp[2] for imp in imports])
+    top_level = sorted([imp for imp in imports if imp[2] == top_depth], key=lambda imp: imp[1], reverse=True)
+    for self_us, cumulative_us, depth, name in top_level[0:top_count]:
+        print("   " + name.ljust(32) + str(round(cumulative_us / 1000.0, 1)))
+
+    print("Slowest module bodies, self ms:")
+    for self_us, cumulative_us, depth, name in sorted(imports, key=lambda imp: imp[0], reverse=True)[0:top_count]:
+        print("   " + name.ljust(32) + str(round(self_us / 1000.0, 1)))
@@ -23,6 +23,7 @@ Module handles user actions that are not edits on the current sequence.
 Load, save, add media file, etc...
 """
 
+import concurrent.futures
 import copy
 import datetime
 import glob
@@ -32,6 +33,7 @@ import os
 from os import listdir
 from os.path import isfile, join
 from PIL import Image
+import processutils
 import re
 import shutil
 import time
@@ -45,7 +47,6 @@ from gi.repository import GLib
 import app
 import audiowaveformrenderer
 import appconsts
-import batchrendering
 import containerprogramedit
 import clipeffectseditor
 import compositeeditor
@@ -65,14 +66,12 @@ from editorstate import MONITOR_MEDIA_FILE
 from editorstate import EDIT_MODE
 import editorpersistance
 import kftoolmode
-import medialinker
 import modesetting
 import movemodes
 import mltprofiles
 import persistance
 import projectdata
 import projectinfogui
-import projectmediaimport
 import propertyparse
 import proxyediting
 import render
@@ -85,6 +84,13 @@ import updater
 import userfolders
 import utils
 
+# Tool and dialog modules are imported when first used.
+batchrendering = processutils.lazy_import("batchrendering")
+medialinker = processutils.lazy_import("medialinker")
+projectmediaimport = processutils.lazy_import("projectmediaimport")
+
+MEDIA_IMPORT_THREADS = 4 # Number of media files probed and thumbnailed concurrently when adding media
+
 media_panel_popup_menu = Gtk.Menu()
 bin_popup_menu = Gtk.Menu()
 sequence_popup_menu = Gtk.Menu()
@@ -167,6 +173,13 @@ class LoadThread(threading.Thread):
             editorstate.project = old_project # persistance.load_project() changes this,
                                               # we simply change it back as no GUI or other state is yet changed
             return
+        except persistance.ProjectFileVersionError as e:
+            self._error_stop(dialog, ticker)
+            primary_txt = _("Project file was saved with a newer version of Flowblade!")
+            secondary_txt = _("Project file format version ") + e.value + _(" is not supported by this version of Flowblade.")
+            dialogutils.warning_message(primary_txt, secondary_txt, None, is_info=False)
+            editorstate.project = old_project
+            return
 
         Gdk.threads_enter()
         dialog.info.set_text(_("Opening"))
@@ -235,23 +248,38 @@ class AddMediaFilesThread(threading.Thread):
         target_bin = PROJECT().c_bin
         succes_new_file = None
         filenames = self.filenames
+        new_files = []
         for new_file in filenames:
             (folder, file_name) = os.path.split(new_file)
-            if PROJECT().media_file_exists(new_file):
+            if PROJECT().media_file_exists(new_file) or new_file in new_files:
                 duplicates.append(file_name)
             else:
+                new_files.append(new_file)
+
+        # Files are probed and thumbnailed in worker threads and added to project and 
+        # media panel in selection order as they become available.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MEDIA_IMPORT_THREADS) as executor:
+            futures = [executor.submit(PROJECT().probe_media_file, new_file, True) for new_file in new_files]
+            for new_file, future in zip(new_files, futures):
                 try:
-                    PROJECT().add_media_file(new_file, self.compound_clip_name, target_bin)
-                    succes_new_file = new_file
+                    probe_data = future.result()
                 except projectdata.ProducerNotValidError as err:
                     print(err.__str__())
+                    Gdk.threads_enter()
                     dialogs.not_valid_producer_dialog(err.value, gui.editor_window.window)
-            
-            Gdk.threads_enter()
-            gui.media_list_view.fill_data_model()
-            max_val = gui.editor_window.media_scroll_window.get_vadjustment().get_upper()
-            gui.editor_window.media_scroll_window.get_vadjustment().set_value(max_val)
-            Gdk.threads_leave()
+                    Gdk.threads_leave()
+                    continue
+
+                Gdk.threads_enter()
+                media_file = PROJECT().add_probed_media_file(probe_data, self.compound_clip_name, target_bin)
+                if target_bin == PROJECT().c_bin:
+                    gui.media_list_view.append_media_file(media_file)
+                    max_val = gui.editor_window.media_scroll_window.get_vadjustment().get_upper()
+                    gui.editor_window.media_scroll_window.get_vadjustment().set_value(max_val)
+                Gdk.threads_leave()
+
+                succes_new_file = new_file
+                audiowaveformrenderer.launch_audio_levels_rendering([new_file])
 
         add_count = len(filenames) - len(duplicates)
         project_event = projectdata.ProjectEvent(projectdata.EVENT_MEDIA_ADDED, str(add_count))
@@ -277,8 +305,6 @@ class AddMediaFilesThread(threading.Thread):
 
         if is_first_video_load:
             GObject.timeout_add(10, _first_load_profile_check)
-            
-        audiowaveformrenderer.launch_audio_levels_rendering(filenames)
 
 
 class UpdateMediaLengthsThread(threading.Thread):
@@ -1416,6 +1442,7 @@ def _do_create_sequence_compound_clip_from_selected(dialog, response_id, name_en
     (model, rows) = selection.get_selected_rows()
     row = max(rows[0])
     selected_sequence = PROJECT().sequences[row]
+    persistance.materialize_sequence(PROJECT(), selected_sequence)
 
     render_player = renderconsumer.XMLRenderPlayer( write_file, _sequence_xml_compound_render_done_callback, 
                                                     (write_file, media_name), selected_sequence, 
@@ -1826,6 +1853,7 @@ def sequence_name_edited(cell, path, new_text, user_data):
     liststore, column = user_data
     liststore[path][column] = new_text
     PROJECT().sequences[int(path)].name = new_text
+    persistance.sequence_changed(PROJECT().sequences[int(path)])
 
     _enable_save()
 
@@ -1874,6 +1902,8 @@ def _combine_sequences_dialog_callback(dialog, response_id, action_select, seq_s
     seq = selectable_seqs[seq_select.get_active()]
     
     dialog.destroy()
+
+    persistance.materialize_sequence(PROJECT(), seq)
     
     if action == 0:
         _append_sequence(seq)
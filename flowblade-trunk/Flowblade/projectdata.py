@@ -28,6 +28,7 @@ import hashlib
 import os
 
 from gi.repository import GdkPixbuf
+from PIL import Image
 
 import appconsts
 import editorpersistance
@@ -37,6 +38,7 @@ import patternproducer
 import miscdataobjects
 import respaths
 import sequence
+import thumbnailcache
 import userfolders
 import utils
 
@@ -120,9 +122,14 @@ class Project:
         """
         Adds media file to project if exists and file is of right type.
         """
-        (directory, file_name) = os.path.split(file_path)
-        (name, ext) = os.path.splitext(file_name)
+        probe_data = self.probe_media_file(file_path)
+        return self.add_probed_media_file(probe_data, compound_clip_name, target_bin)
 
+    def probe_media_file(self, file_path, write_filmstrip=False):
+        """
+        Gets media type, length and info and writes thumbnail for file. Filmstrip is written
+        for video if requested and enabled in preferences. Does not modify project, so can be called from worker threads.
+        """
         # Get media type
         media_type = sequence.get_media_type(file_path)
 
@@ -134,6 +141,22 @@ class Project:
         else: # For non-audio we need write a thumbbnail file and get file lengh while we're at it
              (icon_path, length, info) = thumbnailer.write_image(file_path)
 
+        if write_filmstrip == True and media_type == appconsts.VIDEO and editorpersistance.prefs.media_filmstrips == True:
+            try:
+                thumbnailer.write_filmstrip(file_path)
+            except Exception as e:
+                print("Filmstrip write failed for", file_path, ":", e)
+
+        return (file_path, media_type, icon_path, length, info)
+
+    def add_probed_media_file(self, probe_data, compound_clip_name=None, target_bin=None):
+        """
+        Adds media file using data from probe_media_file().
+        """
+        file_path, media_type, icon_path, length, info = probe_data
+        (directory, file_name) = os.path.split(file_path)
+        (name, ext) = os.path.splitext(file_name)
+
         # Hide file extension if enabled in user preferences
         clip_name = file_name
         if editorpersistance.prefs.hide_file_ext == True:
@@ -464,13 +487,26 @@ class Thumbnailer:
     def set_context(self, profile):
         self.profile = profile
     
-    def write_image(self, file_path):
+    def write_image(self, file_path, force=False):
         """
-        Writes thumbnail image from file producer
+        Writes thumbnail image from file producer, unchanged files found in thumbnails cache
+        are not decoded again unless 'force' is True.
         """
+        cache = thumbnailcache.get_cache()
+        key_hash = cache.get_key_hash(file_path, thumbnailcache.get_profile_key(self.profile))
+        if force == False:
+            entry = cache.get(key_hash)
+            if entry != None:
+                thumbnail_path, length, info = entry
+                return (thumbnail_path, length, dict(info))
+
         # Get data
-        md_str = hashlib.md5(file_path.encode('utf-8')).hexdigest()
-        thumbnail_path = userfolders.get_cache_dir() + appconsts.THUMBNAILS_DIR + "/" + md_str +  ".png"
+        if key_hash != None:
+            thumbnail_path = cache.get_image_path(key_hash)
+        else:
+            # Image sequences and other non-file resources are not cached.
+            md_str = hashlib.md5(file_path.encode('utf-8')).hexdigest()
+            thumbnail_path = userfolders.get_cache_dir() + appconsts.THUMBNAILS_DIR + "/" + md_str +  ".png"
 
         # Create consumer
         consumer = mlt.Consumer(self.profile, "avformat", 
@@ -492,9 +528,51 @@ class Thumbnailer:
         # Connect and write image
         consumer.connect(producer)
         consumer.run()
-        
+
+        cache.put(key_hash, file_path, (thumbnail_path, length, dict(info)))
+
         return (thumbnail_path, length, info)
 
+    def write_filmstrip(self, file_path, frames_count=thumbnailcache.FILMSTRIP_FRAMES_COUNT, 
+                        frame_height=thumbnailcache.FILMSTRIP_FRAME_HEIGHT):
+        """
+        Writes image with 'frames_count' evenly spaced frames side by side and returns its path,
+        or None for resources that are not files. Cached filmstrips are not written again.
+        """
+        cache = thumbnailcache.get_cache()
+        variant = thumbnailcache.get_filmstrip_variant(frames_count, frame_height)
+        key_hash = cache.get_key_hash(file_path, thumbnailcache.get_profile_key(self.profile), variant)
+        if key_hash == None:
+            return None
+
+        entry = cache.get(key_hash)
+        if entry != None:
+            return entry[0]
+
+        producer = mlt.Producer(self.profile, str(file_path))
+        if producer.is_valid() == False:
+            raise ProducerNotValidError(file_path)
+
+        length = producer.get_length()
+        frame_width = int(round(frame_height * self.profile.display_aspect_num() / float(self.profile.display_aspect_den())))
+        strip = Image.new("RGBA", (frame_width * frames_count, frame_height))
+        for i in range(0, frames_count):
+            # Frame from middle of each of 'frames_count' equal length parts of media.
+            producer.seek((length * (2 * i + 1)) // (2 * frames_count))
+            frame = producer.get_frame()
+            frame.set("consumer_deinterlace", 1)
+            rgb = frame.get_image(mlt.mlt_image_rgb24a, frame_width, frame_height)
+            if len(rgb) != frame_width * frame_height * 4:
+                continue
+            frame_img = Image.frombytes("RGBA", (frame_width, frame_height), bytes(rgb))
+            strip.paste(frame_img, (i * frame_width, 0))
+
+        strip_path = cache.get_image_path(key_hash)
+        strip.save(strip_path, "PNG")
+        cache.put(key_hash, file_path, (strip_path, length, None), variant)
+
+        return strip_path
+
     def get_file_length(self, file_path):
         # This is used for audio files which don't need a thumbnail written
         # but do need file length known
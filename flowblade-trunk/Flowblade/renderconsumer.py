@@ -239,6 +239,16 @@ def load_render_profiles():
     global proxy_encodings
     proxy_encodings = found_proxy_encodings
 
+def get_snapshot():
+    return (quality_option_groups, quality_option_groups_default_index, encoding_options, 
+            not_supported_encoding_options, non_user_encodings, proxy_encodings)
+
+def restore_snapshot(snapshot):
+    global quality_option_groups, quality_option_groups_default_index, encoding_options, \
+           not_supported_encoding_options, non_user_encodings, proxy_encodings
+    quality_option_groups, quality_option_groups_default_index, encoding_options, \
+           not_supported_encoding_options, non_user_encodings, proxy_encodings = snapshot
+
 def get_default_render_consumer(file_path, profile):
     return get_render_consumer_for_encoding_and_quality(file_path, profile, 0, 10) # values get their meaning from /res/renderencoding.xml
                                                                                     # first <encodingoption> with 10th quality option
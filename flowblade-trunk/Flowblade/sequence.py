@@ -22,6 +22,7 @@
 Module contains class Sequence that is the multitrack media object being edited
 by the application. A project has 1-n of these.
 """
+import concurrent.futures
 import time
 import mlt
 import os
@@ -33,6 +34,7 @@ import mltfilters
 import mlttransitions
 import mltrefhold
 import patternproducer
+import sequenceindex
 import tlinerender
 import utils
 
@@ -114,6 +116,7 @@ class Sequence:
         self.seq_len = 0 # used in trim crash hack, remove when fixed
         self.compositing_mode = appconsts.COMPOSITING_MODE_TOP_DOWN_FREE_MOVE
         self.tline_render_mode = appconsts.TLINE_RENDERING_OFF
+        self.tline_render_segments = [] # (start_frame, end_frame) tuples
 
         # MLT objects for a multitrack sequence
         self.init_mlt_objects()
@@ -401,6 +404,35 @@ class Sequence:
         producer = mlt.Producer(self.profile, str(path)) # this runs 0.5s+ on some clips
 
         mltrefhold.hold_ref(producer)
+        if self._add_file_producer_clip_attrs(producer, path, new_clip_name, ttl) == False:
+            return None
+
+        # Img seq ttl value
+        if ttl != None:
+            producer.set("ttl", int(ttl))
+
+        return producer
+
+    def create_file_producer_cut_clip(self, producer_registry, path, track_index, ttl=None):
+        """
+        Creates clip as MLT cut of a parent producer shared with other clips
+        of same media, but does not add it to track/playlist object.
+        Filters attached to clip only affect this clip.
+        """
+        if get_media_type(path) == FILE_DOES_NOT_EXIST:
+            print("file does not exist")
+            return None
+
+        parent_producer = producer_registry.get_parent_producer(path, track_index, ttl)
+        
+        # Cut covers whole media, playlists do not allow clip out to go past cut out.
+        cut = parent_producer.cut(0, -1)
+        mltrefhold.hold_ref(cut)
+        self._add_file_producer_clip_attrs(cut, path, None, ttl)
+        
+        return cut
+
+    def _add_file_producer_clip_attrs(self, producer, path, new_clip_name, ttl):
         producer.path = path
         producer.filters = []
         
@@ -413,16 +445,14 @@ class Sequence:
 
         if producer.media_type == FILE_DOES_NOT_EXIST:
             print("file does not exist")
-            return None
+            return False
 
         self.add_clip_attr(producer)
         
         # Img seq ttl value
         producer.ttl = ttl
-        if ttl != None:
-            producer.set("ttl", int(ttl))
-
-        return producer
+        
+        return True
 
     def create_slowmotion_producer(self, path, speed):
         """
@@ -586,10 +616,16 @@ class Sequence:
             # remove this later
             print("restacking compositors!")
 
+        planted_compositors = [compositor for compositor in self.compositors if compositor.planted == True]
         self.sort_compositors()
 
-        new_compositors = []
-        for compositor in self.compositors:
+        # Field applies compositors in planting order and new ones can only be planted last.
+        # Planted compositors that are in sorted order at the start of list are kept, 
+        # compositors after those are replanted.
+        keep_count = self._get_restack_keep_count(planted_compositors)
+
+        new_compositors = self.compositors[0:keep_count]
+        for compositor in self.compositors[keep_count:]:
             if compositor.planted == False:
                 self._plant_compositor(compositor)
                 new_compositors.append(compositor)
@@ -597,6 +633,17 @@ class Sequence:
                 clone_compositor = self._create_and_plant_clone_compositor(compositor)
                 new_compositors.append(clone_compositor)
         self.compositors = new_compositors
+        self.timeline_changed()
+
+    def _get_restack_keep_count(self, planted_compositors):
+        # Returns length of longest start of sorted compositors list that is in planting order.
+        keep_count = 0
+        for compositor in planted_compositors:
+            if keep_count == len(self.compositors):
+                break
+            if compositor is self.compositors[keep_count]:
+                keep_count += 1
+        return keep_count
 
     def _plant_compositor(self, compositor):
         self.field.plant_transition(compositor.transition.mlt_transition, 
@@ -644,6 +691,7 @@ class Sequence:
 
     def add_compositor(self, compositor):
         self.compositors.append(compositor)
+        self.timeline_changed()
         
     def remove_compositor(self, old_compositor):
         try:
@@ -659,6 +707,7 @@ class Sequence:
                 raise ValueError('compositor not found using destroy_id')
             
         self.field.disconnect_service(old_compositor.transition.mlt_transition)
+        self.timeline_changed()
 
     def destroy_compositors(self):
         # This can be called when undo stack destroyd too.
@@ -707,6 +756,7 @@ class Sequence:
             self.compositors.sort(key=_sort_compositors_comparator, reverse=True)
         else:
             self.compositors.sort(key=_sort_compositors_comparator)
+        self.timeline_changed()
         
     def get_track_compositors(self, track_index):
         track_compositors = []
@@ -1055,27 +1105,32 @@ class Sequence:
         """
         Returns clip or None if not found.
         """
-        for i in range(1, len(self.tracks)):
-            track = self.tracks[i]
-            for j in range(0, len(track.clips)):
-                clip = track.clips[j]
-                if clip.id == clip_id:
-                    return clip
+        track, index = self.get_timeline_index().get_track_and_index_for_id(clip_id)
+        if track == None:
+            return None
 
-        return None
+        return track.clips[index]
 
     def get_track_and_index_for_id(self, clip_id):
         """
         Returns clip or None if not found.
         """
-        for i in range(1, len(self.tracks)):
-            track = self.tracks[i]
-            for j in range(0, len(track.clips)):
-                clip = track.clips[j]
-                if clip.id == clip_id:
-                    return (track, j)
+        return self.get_timeline_index().get_track_and_index_for_id(clip_id)
 
-        return (None, None)
+    # ------------------------------------------------------ timeline index
+    def get_timeline_index(self):
+        # Index is not saved and loaded sequences get it here.
+        try:
+            return self.timeline_index
+        except AttributeError:
+            self.timeline_index = sequenceindex.SequenceIndex(self)
+            return self.timeline_index
+
+    def timeline_changed(self):
+        """
+        Needs to be called after clips or compositors have been added, removed, moved or trimmed.
+        """
+        self.get_timeline_index().changed()
         
     def set_track_mute_state(self, track_index, mute_state):
         track = self.tracks[track_index]
@@ -1145,6 +1200,59 @@ class Sequence:
             print("a_track:" , compositor.transition.a_track)
             print("b_track:" , compositor.transition.b_track)
 
+# ------------------------------------------------ producer registry
+class ProducerRegistry:
+    """
+    Opens media files once for project load and gives timeline clips 
+    cuts of the shared parent producers, so that load time and decoders 
+    scale with media count and not with clip count.
+
+    Parent producers are per track too, cuts of one parent playing at
+    same time on different tracks would have the decoder seek between them 
+    on every frame.
+    """
+    def __init__(self, profile):
+        self.profile = profile
+        self.producers = {} # (resolved path, track index, ttl) -> parent producer
+
+    def get_parent_producer(self, path, track_index, ttl):
+        key = (os.path.realpath(path), track_index, ttl)
+        try:
+            return self.producers[key]
+        except KeyError:
+            pass
+        
+        producer = self._create_producer(path, ttl)
+        self.producers[key] = producer
+        return producer
+
+    def open_parent_producers(self, keys, threads_count, progress_callback=None):
+        """
+        Opens parent producers for (path, track_index, ttl) keys concurrently.
+        """
+        keys = [key for key in keys if (os.path.realpath(key[0]), key[1], key[2]) not in self.producers]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads_count) as executor:
+            futures = {executor.submit(self._create_producer, path, ttl): (path, track_index, ttl) for path, track_index, ttl in keys}
+            done = 0
+            for future in concurrent.futures.as_completed(futures):
+                path, track_index, ttl = futures[future]
+                self.producers[(os.path.realpath(path), track_index, ttl)] = future.result()
+                done += 1
+                if progress_callback != None:
+                    progress_callback(done, len(futures))
+
+    def _create_producer(self, path, ttl):
+        producer = mlt.Producer(self.profile, str(path)) # this runs 0.5s+ on some clips
+        mltrefhold.hold_ref(producer)
+        if ttl != None:
+            producer.set("ttl", int(ttl))
+        
+        return producer
+
+    def get_stats_str(self):
+        return "parent producers: " + str(len(self.producers))
+
+
 # ------------------------------------------------ module util methods
 def get_media_type(file_path):
     """
@@ -1208,6 +1316,7 @@ def create_sequence_clone_with_different_track_count(old_seq, v_tracks, a_tracks
     # Copy modes values
     new_seq.compositing_mode = old_seq.compositing_mode
     new_seq.tline_render_mode = old_seq.tline_render_mode
+    new_seq.tline_render_segments = list(old_seq.tline_render_segments)
         
     # copy next clip id data
     new_seq.next_id = old_seq.next_id
@@ -1256,3 +1365,104 @@ def _copy_track_contents(from_track, to_track, to_sequence):
     # Copy track attributes.
     to_sequence.set_track_mute_state(to_track.id, from_track.mute_state)
     to_track.edit_freedom = from_track.edit_freedom
+
+
+# ----------------------------- compositors restack benchmark
+def _benchmark_restack():
+    """
+    Prints compositors restack times for sequences with hundreds of compositors compared
+    to replanting all compositors. Needs MLT and Flowblade user folders to be available.
+    """
+    import locale
+    import random
+    import editorpersistance
+    import mltenvsnapshot
+    import mltprofiles
+    import processutils
+    import respaths
+    import translations
+    import userfolders
+    import sequence # Sequence from this module is not the one used by other modules when run as script.
+
+    try:
+        editorstate.mlt_version = mlt.LIBMLT_VERSION
+    except:
+        editorstate.mlt_version = "0.0.99" # magic string for "not found"
+
+    userfolders.init()
+    respaths.set_paths(os.path.dirname(os.path.abspath(__file__)))
+    editorpersistance.load()
+    translations.init_languages()
+    translations.load_filters_translations()
+    mlttransitions.init_module()
+
+    repo = mlt.Factory().init()
+    processutils.prepare_mlt_repo(repo)
+    locale.setlocale(locale.LC_NUMERIC, 'C')
+    mltenvsnapshot.load_mlt_environment(repo)
+    mltprofiles.load_profile_list()
+
+    def replant_all(seq):
+        # Restacking before incremental restack.
+        seq.sort_compositors()
+        new_compositors = []
+        for compositor in seq.compositors:
+            if compositor.planted == False:
+                seq._plant_compositor(compositor)
+                new_compositors.append(compositor)
+            else:
+                new_compositors.append(seq._create_and_plant_clone_compositor(compositor))
+        seq.compositors = new_compositors
+
+    def timed_ms(seq, func):
+        # Returns time and count of transitions planted, planting count is what scales MLT field work.
+        planted = [0]
+        plant_compositor = seq._plant_compositor
+        def counting_plant_compositor(compositor):
+            planted[0] += 1
+            plant_compositor(compositor)
+        seq._plant_compositor = counting_plant_compositor
+        start_time = time.monotonic()
+        func()
+        elapsed = round((time.monotonic() - start_time) * 1000.0, 1)
+        del seq._plant_compositor
+        return str(elapsed) + " ms (" + str(planted[0]) + " planted)"
+
+    def add_random_compositor(seq, seq_length):
+        compositor = seq.create_compositor("##affineblend")
+        compositor.transition.set_tracks(seq.first_video_index, random.randint(seq.first_video_index + 1, len(seq.tracks) - 2))
+        clip_in = random.randint(0, seq_length)
+        compositor.set_in_and_out(clip_in, clip_in + random.randint(10, 200))
+        seq.add_compositor(compositor)
+
+    def move_compositors(seq, count):
+        # Auto follow edits change compositor ranges but not tracks.
+        for compositor in random.sample(seq.compositors, count):
+            compositor.set_in_and_out(compositor.clip_in + 10, compositor.clip_out + 10)
+
+    random.seed(1)
+    profile = mltprofiles.get_default_profile()
+    for compositors_count in [100, 300, 600]:
+        seq = sequence.Sequence(profile)
+        seq.create_default_tracks()
+        seq_length = compositors_count * 50
+        for i in range(0, compositors_count):
+            add_random_compositor(seq, seq_length)
+        seq.restack_compositors()
+
+        move_compositors(seq, 5)
+        full_move = timed_ms(seq, lambda: replant_all(seq))
+        move_compositors(seq, 5)
+        incremental_move = timed_ms(seq, seq.restack_compositors)
+
+        add_random_compositor(seq, seq_length)
+        full_add = timed_ms(seq, lambda: replant_all(seq))
+        add_random_compositor(seq, seq_length)
+        incremental_add = timed_ms(seq, seq.restack_compositors)
+
+        print(compositors_count, "compositors: auto follow edit, replant all", full_move + ", incremental", incremental_move + "; " \
+              "add compositor, replant all", full_add + ", incremental", incremental_add)
+
+
+if __name__ == "__main__":
+    _benchmark_restack()
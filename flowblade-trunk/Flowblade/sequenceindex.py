@@ -0,0 +1,248 @@
+"""
+    Flowblade Movie Editor is a nonlinear video editor.
+    Copyright 2012 Janne Liljeblad.
+
+    This file is part of Flowblade Movie Editor <http://code.google.com/p/flowblade>.
+
+    Flowblade Movie Editor is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Flowblade Movie Editor is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Flowblade Movie Editor.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""
+Lookup index for clip ids and compositor frame ranges of a sequence.
+
+Index is rebuilt lazily on first query after sequence.Sequence.timeline_changed() has been
+called, edit.EditAction does this after every do, undo and redo. Clip and compositor counts
+are also checked on every query so that clips and compositors added outside edits are found.
+
+Visible clips on tracks are found using MLT playlist indexes and are not handled here.
+"""
+
+
+class SequenceIndex:
+
+    def __init__(self, seq):
+        self.seq = seq
+        self.dirty = True
+        self.build_signature = None
+        self.clip_locations = {} # clip id -> (track, clip index)
+        self.compositors_tree = None
+        self.track_compositors_trees = {} # b_track -> _IntervalTree
+
+    def changed(self):
+        self.dirty = True
+
+    # --------------------------------------------------- queries
+    def get_track_and_index_for_id(self, clip_id):
+        """
+        Returns (track, clip index) tuple or (None, None) if not found.
+        """
+        just_built = self._update()
+        try:
+            track, index = self.clip_locations[clip_id]
+        except KeyError:
+            # Clip may have replaced another clip without timeline_changed() call.
+            if just_built == False:
+                self._build()
+            return self.clip_locations.get(clip_id, (None, None))
+
+        # Location can be stale if clips were moved without timeline_changed() call.
+        if index >= len(track.clips) or track.clips[index].id != clip_id:
+            self._build()
+            return self.clip_locations.get(clip_id, (None, None))
+
+        return (track, index)
+
+    def get_compositors_in_range(self, start_frame, end_frame):
+        """
+        Returns compositors overlapping frame range in sequence compositors list order.
+        """
+        self._update()
+        return self.compositors_tree.get_overlapping(start_frame, end_frame)
+
+    def get_compositors_at(self, b_track, frame):
+        """
+        Returns compositors with source track b_track covering frame in sequence compositors list order.
+        """
+        self._update()
+        try:
+            tree = self.track_compositors_trees[b_track]
+        except KeyError:
+            return []
+        return tree.get_overlapping(frame, frame)
+
+    # --------------------------------------------------- building
+    def _get_signature(self):
+        # Cheap check for clips and compositors added or removed without timeline_changed() call.
+        clip_counts = tuple([len(track.clips) for track in self.seq.tracks])
+        return (id(self.seq.tracks), clip_counts, id(self.seq.compositors), len(self.seq.compositors))
+
+    def _update(self):
+        # Returns True if index was rebuilt.
+        if self.dirty == True or self.build_signature != self._get_signature():
+            self._build()
+            return True
+        return False
+
+    def _build(self):
+        self.clip_locations = {}
+        for i in range(1, len(self.seq.tracks)): # black track is ignored
+            track = self.seq.tracks[i]
+            for j in range(0, len(track.clips)):
+                self.clip_locations.setdefault(track.clips[j].id, (track, j))
+
+        items = []
+        track_items = {}
+        for order in range(0, len(self.seq.compositors)):
+            comp = self.seq.compositors[order]
+            item = (comp.clip_in, comp.clip_out, order, comp)
+            items.append(item)
+            track_items.setdefault(comp.transition.b_track, []).append(item)
+
+        self.compositors_tree = _IntervalTree(items)
+        self.track_compositors_trees = {}
+        for b_track, b_track_items in track_items.items():
+            self.track_compositors_trees[b_track] = _IntervalTree(b_track_items)
+
+        self.dirty = False
+        self.build_signature = self._get_signature()
+
+
+class _IntervalTree:
+    """
+    Static interval tree on items sorted by start frame, every node is the middle item
+    of its range and knows the largest end frame in that range.
+
+    Items are (start_frame, end_frame, order, value) tuples, end frame is inclusive.
+    """
+    def __init__(self, items):
+        self.items = sorted(items, key=lambda item: (item[0], item[2]))
+        self.max_ends = [0] * len(self.items)
+        self._set_max_ends(0, len(self.items))
+
+    def _set_max_ends(self, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        max_end = self.items[mid][1]
+        for child_max_end in (self._set_max_ends(lo, mid), self._set_max_ends(mid + 1, hi)):
+            if child_max_end != None and child_max_end > max_end:
+                max_end = child_max_end
+        self.max_ends[mid] = max_end
+        return max_end
+
+    def get_overlapping(self, start_frame, end_frame):
+        """
+        Returns values of items overlapping inclusive frame range ordered by item order.
+        """
+        hits = []
+        ranges = [(0, len(self.items))]
+        while len(ranges) > 0:
+            lo, hi = ranges.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self.max_ends[mid] < start_frame:
+                continue # nothing in this range reaches start_frame
+
+            item_start, item_end, order, value = self.items[mid]
+            ranges.append((lo, mid))
+            if item_start <= end_frame:
+                if item_end >= start_frame:
+                    hits.append((order, value))
+                ranges.append((mid + 1, hi)) # items after mid start at or after item_start
+
+        hits.sort(key=lambda hit: hit[0])
+        return [value for order, value in hits]
+
+
+# --------------------------------------------------- benchmark
+class _BenchmarkItem:
+    # Has clip and compositor attributes read by index.
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+def _benchmark():
+    """
+    Prints lookup times with and without index on a sequence with 10 000 clips and 2000 compositors.
+    """
+    import random
+    import time
+
+    TRACKS_COUNT = 20
+    CLIPS_COUNT = 10000
+    COMPOSITORS_COUNT = 2000
+    QUERIES_COUNT = 2000
+    VISIBLE_FRAMES = 500
+
+    random.seed(1)
+    tracks = [_BenchmarkItem(id=0, clips=[])]
+    next_id = 0
+    for i in range(1, TRACKS_COUNT + 1):
+        track = _BenchmarkItem(id=i, clips=[])
+        for j in range(0, CLIPS_COUNT // TRACKS_COUNT):
+            track.clips.append(_BenchmarkItem(id=next_id, clip_in=0, clip_out=random.randint(10, 200)))
+            next_id += 1
+        tracks.append(track)
+
+    seq_length = 100 * CLIPS_COUNT // TRACKS_COUNT
+    compositors = []
+    for i in range(0, COMPOSITORS_COUNT):
+        clip_in = random.randint(0, seq_length)
+        transition = _BenchmarkItem(b_track=random.randint(2, TRACKS_COUNT), a_track=1)
+        compositors.append(_BenchmarkItem(clip_in=clip_in, clip_out=clip_in + random.randint(10, 200), transition=transition))
+
+    seq = _BenchmarkItem(tracks=tracks, compositors=compositors)
+
+    clip_ids = [random.randint(0, next_id - 1) for i in range(0, QUERIES_COUNT)]
+    frames = [random.randint(0, seq_length) for i in range(0, QUERIES_COUNT)]
+    b_tracks = [random.randint(2, TRACKS_COUNT) for i in range(0, QUERIES_COUNT)]
+
+    def linear_id_lookup(clip_id):
+        for i in range(1, len(seq.tracks)):
+            track = seq.tracks[i]
+            for j in range(0, len(track.clips)):
+                if track.clips[j].id == clip_id:
+                    return (track, j)
+        return (None, None)
+
+    def linear_range_lookup(start_frame, end_frame):
+        return [comp for comp in seq.compositors if comp.clip_in <= end_frame and comp.clip_out >= start_frame]
+
+    def linear_hit_lookup(b_track, frame):
+        return [comp for comp in seq.compositors if comp.transition.b_track == b_track and comp.clip_in <= frame and comp.clip_out >= frame]
+
+    def report(name, linear_func, index_func, args_list):
+        start_time = time.monotonic()
+        linear_results = [linear_func(*args) for args in args_list]
+        linear_time = time.monotonic() - start_time
+
+        start_time = time.monotonic()
+        index_results = [index_func(*args) for args in args_list]
+        index_time = time.monotonic() - start_time
+
+        assert linear_results == index_results
+        print(name + ":", len(args_list), "queries, linear", round(linear_time * 1000.0, 1), "ms, index", round(index_time * 1000.0, 1), "ms")
+
+    index = SequenceIndex(seq)
+    start_time = time.monotonic()
+    index._build()
+    print("index build:", round((time.monotonic() - start_time) * 1000.0, 1), "ms")
+
+    report("clip for id", linear_id_lookup, index.get_track_and_index_for_id, [(clip_id,) for clip_id in clip_ids])
+    report("visible compositors", linear_range_lookup, index.get_compositors_in_range, [(frame, frame + VISIBLE_FRAMES) for frame in frames])
+    report("compositor hit", linear_hit_lookup, index.get_compositors_at, list(zip(b_tracks, frames)))
+
+
+if __name__ == "__main__":
+    _benchmark()
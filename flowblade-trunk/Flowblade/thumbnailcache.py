@@ -0,0 +1,237 @@
+"""
+    Flowblade Movie Editor is a nonlinear video editor.
+    Copyright 2012 Janne Liljeblad.
+
+    This file is part of Flowblade Movie Editor <http://code.google.com/p/flowblade>.
+
+    Flowblade Movie Editor is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Flowblade Movie Editor is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Flowblade Movie Editor.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""
+Persistent index for media thumbnails and filmstrips.
+
+Entries are keyed by media path, file size, modification time and profile, so a file
+replaced at the same path gets a new thumbnail and unchanged files are not decoded again.
+
+Index is an append-only file of pickled records in thumbnails folder, it is compacted
+when it has collected enough replaced records.
+"""
+
+import cairo
+import hashlib
+import os
+import pickle
+import threading
+
+import appconsts
+import atomicfile
+import lrucache
+import userfolders
+
+INDEX_FILE = "thumbnails_index"
+INDEX_VERSION = 1
+COMPACT_MIN_RECORDS = 200
+
+THUMBNAIL_VARIANT = "thumb"
+
+FILMSTRIP_FRAMES_COUNT = 10
+FILMSTRIP_FRAME_HEIGHT = 48
+FILMSTRIP_SURFACES_CACHE_BYTES = 32 * 1024 * 1024
+
+_cache = None
+_filmstrip_surfaces = lrucache.LRUCache(FILMSTRIP_SURFACES_CACHE_BYTES) # (media path, variant) -> cairo.ImageSurface
+
+
+def get_cache():
+    global _cache
+    if _cache == None:
+        _cache = ThumbnailCache(userfolders.get_cache_dir() + appconsts.THUMBNAILS_DIR + "/")
+    return _cache
+
+def get_profile_key(profile):
+    return (profile.description(), profile.width(), profile.height(), profile.frame_rate_num(), profile.frame_rate_den())
+
+def get_filmstrip_variant(frames_count, frame_height):
+    return ("strip", frames_count, frame_height)
+
+def get_filmstrip_surface(file_path, profile, frames_count=FILMSTRIP_FRAMES_COUNT, frame_height=FILMSTRIP_FRAME_HEIGHT):
+    """
+    Returns surface for filmstrip written earlier with projectdata.Thumbnailer.write_filmstrip()
+    or None if not available. Media is never decoded here, so this can be called during timeline repaint.
+    """
+    variant = get_filmstrip_variant(frames_count, frame_height)
+    surface = _filmstrip_surfaces.get((file_path, variant))
+    if surface != None:
+        return surface
+
+    cache = get_cache()
+    entry = cache.get(cache.get_key_hash(file_path, get_profile_key(profile), variant))
+    if entry == None:
+        return None
+
+    try:
+        surface = cairo.ImageSurface.create_from_png(entry[0])
+    except Exception as e:
+        print("Filmstrip image load failed for", file_path, ":", e)
+        return None
+
+    _filmstrip_surfaces.put((file_path, variant), surface, surface.get_stride() * surface.get_height())
+    return surface
+
+def get_filmstrip_frame_index(media_frame, media_length, frames_count=FILMSTRIP_FRAMES_COUNT):
+    """
+    Returns index of filmstrip frame closest to media frame.
+    """
+    if media_length <= 0:
+        return 0
+    index = (media_frame * frames_count) // media_length
+    return max(0, min(index, frames_count - 1))
+
+
+class ThumbnailCache:
+    """
+    Entries are (image_path, length, info) tuples, filmstrip entries have None for info.
+    """
+    def __init__(self, folder):
+        self.folder = folder
+        self.index_path = folder + INDEX_FILE
+        self.lock = threading.Lock()
+        self.entries = {} # key hash -> entry
+        self.keys_for_path = {} # media path -> {key hash -> variant}
+        self.records_count = 0
+        self._load_index()
+
+    def get_key_hash(self, file_path, profile_key, variant=THUMBNAIL_VARIANT):
+        """
+        Returns None for paths that are not files, e.g. image sequence resource paths.
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        key = (file_path, stat.st_size, stat.st_mtime_ns, profile_key, variant)
+        return hashlib.md5(str(key).encode("utf-8")).hexdigest()
+
+    def get_image_path(self, key_hash):
+        return self.folder + key_hash + ".png"
+
+    def get(self, key_hash):
+        """
+        Returns entry or None if not cached or image file has been deleted.
+        """
+        if key_hash == None:
+            return None
+
+        with self.lock:
+            entry = self.entries.get(key_hash)
+        if entry == None:
+            return None
+
+        if not os.path.isfile(entry[0]):
+            return None
+        return entry
+
+    def put(self, key_hash, file_path, entry, variant=THUMBNAIL_VARIANT):
+        """
+        Adds entry, images of same variant for earlier versions of media file are deleted.
+        """
+        if key_hash == None:
+            return
+
+        with self.lock:
+            path_keys = self.keys_for_path.setdefault(file_path, {}) # key hash -> variant
+            old_key_hashes = [old_hash for old_hash, old_variant in path_keys.items()
+                              if old_hash != key_hash and old_variant == variant]
+            for old_hash in old_key_hashes:
+                old_entry = self.entries.pop(old_hash)
+                path_keys.pop(old_hash)
+                self._append_record((old_hash, file_path, variant, None))
+                try:
+                    os.remove(old_entry[0])
+                except OSError:
+                    pass
+
+            self.entries[key_hash] = entry
+            path_keys[key_hash] = variant
+            self._append_record((key_hash, file_path, variant, entry))
+
+            if self.records_count > COMPACT_MIN_RECORDS and self.records_count > 2 * len(self.entries):
+                self._compact_index()
+
+    # --------------------------------------------------- index file
+    def _load_index(self):
+        try:
+            index_file = open(self.index_path, "rb")
+        except FileNotFoundError:
+            self._compact_index()
+            return
+
+        with index_file:
+            try:
+                version = pickle.load(index_file)
+            except Exception:
+                version = None
+            if version != INDEX_VERSION:
+                print("Thumbnails index version not valid, creating new index.")
+                self._compact_index()
+                return
+
+            read_end = index_file.tell()
+            try:
+                while True:
+                    key_hash, file_path, variant, entry = pickle.load(index_file)
+                    self.records_count += 1
+                    path_keys = self.keys_for_path.setdefault(file_path, {})
+                    if entry == None:
+                        self.entries.pop(key_hash, None)
+                        path_keys.pop(key_hash, None)
+                    else:
+                        self.entries[key_hash] = entry
+                        path_keys[key_hash] = variant
+                    read_end = index_file.tell()
+            except Exception:
+                pass # End of index, last record may be partially written if app was killed during write.
+
+            index_complete = (read_end == os.fstat(index_file.fileno()).st_size)
+
+        # Records appended after a partial record could not be read, so index is rewritten.
+        if index_complete == False:
+            self._compact_index()
+
+    def _append_record(self, record):
+        # Index file is deleted when thumbnails folder is cleared from disk cache management.
+        if not os.path.exists(self.index_path):
+            self._compact_index()
+            return
+
+        try:
+            with open(self.index_path, "ab") as index_file:
+                pickle.dump(record, index_file)
+            self.records_count += 1
+        except OSError as e:
+            print("Thumbnails index write failed:", e)
+
+    def _compact_index(self):
+        # Write only live entries to new index.
+        try:
+            with atomicfile.AtomicFileWriter(self.index_path, "wb") as afw:
+                index_file = afw.get_file()
+                pickle.dump(INDEX_VERSION, index_file)
+                for file_path, path_keys in self.keys_for_path.items():
+                    for key_hash, variant in path_keys.items():
+                        pickle.dump((key_hash, file_path, variant, self.entries[key_hash]), index_file)
+            self.records_count = len(self.entries)
+        except OSError as e:
+            print("Thumbnails index write failed:", e)
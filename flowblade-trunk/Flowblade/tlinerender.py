@@ -17,17 +17,21 @@
     You should have received a copy of the GNU General Public License
     along with Flowblade Movie Editor. If not, see <http://www.gnu.org/licenses/>.
 """
+import bisect
 import hashlib
 from gi.repository import Gdk, Gtk
+import multiprocessing
 import os
 from os import listdir
 from os.path import isfile, join
+import shutil
 import time
 import threading
 
 import appconsts
 import cairoarea
 import dialogutils
+import diskcachemanagement
 import edit
 import editorpersistance
 from editorstate import current_sequence
@@ -72,10 +76,15 @@ _timeline_renderer = None # this gets set to NoOpRenderer on launch, is never No
 
 _update_thread = None
 
+# Clips get a new value from this when their content changes, see mark_clips_changed().
+_content_generation = 0
+
 # ------------------------------------------------------------ MODULE INTERFACE
 def app_launch_clean_up():
     for old_session_dir in listdir(_get_tline_render_dir()):
         _delete_dir_and_contents(_get_tline_render_dir() + "/" + old_session_dir)
+
+    _enforce_render_cache_size()
     
 def init_session(): # called when project is loaded
     
@@ -88,12 +97,26 @@ def init_session(): # called when project is loaded
 
     tlinerenderserver.launch_render_server()
 
+    launch_loaded_segments_update()
+
 def delete_session():
     tlinerenderserver.shutdown_render_server()
     _delete_session_dir()
 
 def init_for_sequence(sequence):
-    update_renderer_to_mode(None)
+    global _timeline_renderer
+    if get_tline_rendering_mode() == appconsts.TLINE_RENDERING_OFF:
+        _timeline_renderer = NoOpRenderer()
+    else:
+        _timeline_renderer = TimeLineRenderer()
+        _timeline_renderer.load_sequence_segments(sequence)
+
+def launch_loaded_segments_update():
+    # Segments without existing renders are rendered after load in auto mode.
+    if get_tline_rendering_mode() != appconsts.TLINE_RENDERING_AUTO:
+        return
+    if len(get_renderer().get_dirty_segments()) > 0:
+        get_renderer().launch_update_thread()
 
 def update_renderer_to_mode(old_mode):
 
@@ -103,6 +126,7 @@ def update_renderer_to_mode(old_mode):
     else:
         if old_mode == appconsts.TLINE_RENDERING_OFF:
             _timeline_renderer = TimeLineRenderer()
+            _timeline_renderer.load_sequence_segments(current_sequence())
 
 def settings_dialog_launch(widget, event):
     global manager_window
@@ -111,6 +135,28 @@ def settings_dialog_launch(widget, event):
 def get_renderer():
     return _timeline_renderer
 
+def mark_clips_changed(clips):
+    """
+    Called for clips with changed filter property values, segments containing these clips 
+    get their content hashes recomputed on next update.
+    
+    Changes in clip positions, ranges and filter or mute filter objects are detected
+    without this, see TimeLineSegment.get_content_hash().
+    """
+    global _content_generation
+    for clip in clips:
+        _content_generation += 1
+        clip.tline_render_generation = _content_generation
+
+def _get_clip_content_generation(clip):
+    # Clips that have not been seen before get a new generation so that
+    # a clip object is never taken for some earlier clip object.
+    try:
+        return clip.tline_render_generation
+    except AttributeError:
+        mark_clips_changed([clip])
+        return clip.tline_render_generation
+
 # --------------------------------------------------------- menus
 def corner_mode_menu_launched(widget, event):
     guiutils.remove_children(tlinerender_mode_menu)
@@ -155,6 +201,7 @@ def _strip_menu_item_callback(widget, data):
         get_renderer().launch_update_thread()
     elif msg == "delete_all":
         get_renderer().segments = []
+        get_renderer().save_sequence_segments()
         if timeline_visible() == True:
             current_sequence().update_hidden_track_for_timeline_rendering()
         gui.tline_render_strip.widget.queue_draw()
@@ -192,6 +239,23 @@ def _get_tline_render_dir():
 def _get_session_dir():
     return _get_tline_render_dir() + "/" + _project_session_id
 
+def _get_render_cache_dir():
+    return userfolders.get_cache_dir() + appconsts.TLINE_RENDER_CACHE_DIR
+
+def _get_render_settings_id():
+    # Renders in cache can only be used if they were done with current render settings.
+    settings_desc = current_sequence().profile.description() + "_" + str(editorpersistance.prefs.tline_render_encoding) \
+                    + "_" + str(editorpersistance.prefs.tline_render_size)
+    return hashlib.md5(settings_desc.encode('utf-8')).hexdigest()[0:12]
+
+def _enforce_render_cache_size():
+    keep_paths = set()
+    if isinstance(get_renderer(), TimeLineRenderer):
+        for segment in get_renderer().segments:
+            keep_paths.add(segment.get_clip_path())
+    max_bytes = editorpersistance.prefs.tline_render_cache_mb * 1024 * 1024
+    diskcachemanagement.enforce_cache_dir_size(_get_render_cache_dir(), max_bytes, keep_paths)
+
 def _delete_session_dir():
     session_dir = _get_session_dir()
     _delete_dir_and_contents(session_dir)
@@ -325,6 +389,7 @@ class TimeLineRenderer:
             self.add_segment(range_start, range_end + 1)
         
         self.segments.sort(key=_sort_segments_comparator)
+        self.save_sequence_segments()
 
     def mouse_clicked(self):
         hit_seg = self.get_hit_segment(self.release_frame)
@@ -368,10 +433,29 @@ class TimeLineRenderer:
     
     def delete_segment(self, segment):
         self.segments.remove(segment)
+        self.save_sequence_segments()
         if timeline_visible() == True:
             current_sequence().update_hidden_track_for_timeline_rendering()
         gui.tline_render_strip.widget.queue_draw()
                 
+    # --------------------------------------------- SEQUENCE DATA
+    def save_sequence_segments(self):
+        # Segment ranges are saved with sequence so that existing renders can be used when project is opened again.
+        current_sequence().tline_render_segments = [(seg.start_frame, seg.end_frame) for seg in self.segments]
+
+    def load_sequence_segments(self, sequence):
+        for start_frame, end_frame in sequence.tline_render_segments:
+            seg = TimeLineSegment(start_frame, end_frame)
+            seg.content_hash = seg.get_content_hash()
+            if os.path.isfile(seg.get_clip_path()):
+                seg.update_segment_as_rendered()
+            elif get_tline_rendering_mode() == appconsts.TLINE_RENDERING_AUTO:
+                seg.segment_state = SEGMENT_DIRTY
+            self.segments.append(seg)
+
+        if len(self.segments) > 0:
+            sequence.update_hidden_track_for_timeline_rendering()
+
     # --------------------------------------------- CONTENT UPDATES
     def timeline_changed(self):
         if self.drag_on == True:
@@ -458,11 +542,12 @@ class TimeLineRenderer:
         self.segments = list(remaining_set)
 
     # ------------------------------------------------ RENDERING
-    def update_timeline_rendering_status(self, rendering_file, fract, render_completed, completed_segments):
+    def update_timeline_rendering_status(self, rendering_files, fractions, render_completed, completed_segments):
         dirty = self.get_dirty_segments()
         for segment in dirty:
-            if segment.get_clip_path() == rendering_file:
-                segment.rendered_fract = fract
+            render_path = segment.get_render_path()
+            if render_path in rendering_files:
+                segment.rendered_fract = fractions[rendering_files.index(render_path)]
             else:
                 segment.maybe_set_completed(completed_segments)
                 
@@ -495,6 +580,9 @@ class NoOpRenderer():
     def focus_out(self):
         pass
 
+    def save_sequence_segments(self):
+        pass
+
     def update_hidden_track(self, hidden_track, seq_len):
         # This was required for some real random crashes long time ago, may not be needed anymore but we're keeping this.
         edit._insert_blank(hidden_track, 0, seq_len)
@@ -511,6 +599,10 @@ class TimeLineSegment:
         self.selected = False
 
         self.content_hash = "-1"
+        
+        # Content hash is computed again only when content key changes, see get_content_hash().
+        self.content_key = None
+        self.content_key_hash = "-1"
 
         self.rendered_fract = 0.0
     
@@ -547,16 +639,31 @@ class TimeLineSegment:
 
     # -------------------------------------------- CLIP AND RENDERING
     def get_clip_path(self):
+        # Rendered clips are kept in render cache across sessions.
+        return _get_render_cache_dir() + "/" + self.content_hash + "_" + _get_render_settings_id() + "." + tlinerenderserver.get_encoding_extension()
+
+    def get_render_path(self):
+        # Clips are rendered into session dir and moved to render cache when complete, 
+        # so that render cache never has partially rendered clips.
         return _get_session_dir() + "/" + self.content_hash + "." + tlinerenderserver.get_encoding_extension()
-    
+
     def maybe_set_completed(self, completed_segments):
-        if self.get_clip_path() in completed_segments:
+        render_path = self.get_render_path()
+        if render_path in completed_segments:
+            if os.path.isfile(render_path):
+                shutil.move(render_path, self.get_clip_path())
             self.update_segment_as_rendered()
             
     def update_segment_as_rendered(self):
         self.segment_state = SEGMENT_RENDERED
         self.rendered_fract = 0.0
-        
+
+        # Modification time is used as last use time for render cache eviction.
+        try:
+            os.utime(self.get_clip_path())
+        except OSError:
+            pass
+
         self.create_clip()
     
     def create_clip(self):
@@ -602,17 +709,55 @@ class TimeLineSegment:
         self.content_hash = new_hash
     
     def get_content_hash(self):
-        content_strings = []
+        # Building content hash from filter properties is slow, so it is only done when clips 
+        # or their positions, ranges, filter objects or content generations in segment range have changed.
+        tracks_clips = self._get_segment_clips()
+        content_key = self._get_content_key(tracks_clips)
+        if content_key != self.content_key:
+            self.content_key = content_key
+            self.content_key_hash = self._get_content_strings_hash(tracks_clips)
+
+        return self.content_key_hash
+
+    def _get_segment_clips(self):
+        tracks_clips = []
         for i in range(1, len(current_sequence().tracks) - 1):
             track = current_sequence().tracks[i]
-            self._get_track_segment_content_strings(track, content_strings)
+            start_clip_index, clips = self._get_track_segment_clips(track, self.start_frame, self.end_frame)
+            tracks_clips.append((track, start_clip_index, clips))
+        
+        return tracks_clips
+
+    def _get_content_key(self, tracks_clips):
+        key = [self.start_frame, self.end_frame]
+        for track, start_clip_index, clips in tracks_clips:
+            key.append(len(clips))
+            for i in range(0, len(clips)):
+                clip = clips[i]
+                key.append(track.clip_start(start_clip_index + i))
+                key.append(clip.clip_in)
+                key.append(clip.clip_out)
+                if clip.is_blanck_clip == True:
+                    key.append(-1)
+                    continue
+                key.append(_get_clip_content_generation(clip))
+                key.append(id(clip.mute_filter))
+                key.append(len(clip.filters))
+                for filter_object in clip.filters:
+                    key.append(id(filter_object))
+
+        return tuple(key)
+
+    def _get_content_strings_hash(self, tracks_clips):
+        content_strings = []
+        for track, start_clip_index, clips in tracks_clips:
+            self._get_track_segment_content_strings(track, start_clip_index, clips, content_strings)
         
         content_desc = "".join(content_strings)
         
         return hashlib.md5(content_desc.encode('utf-8')).hexdigest()
         
-    def _get_track_segment_content_strings(self, track, content_strings):
-        start_clip_index, clips = self._get_track_segment_clips(track, self.start_frame, self.end_frame)
+    def _get_track_segment_content_strings(self, track, start_clip_index, clips, content_strings):
         if len(clips) == 0:
             content_strings.append("-1")
             return
@@ -657,6 +802,8 @@ class TimeLineSegment:
             content_strings.append("##blank")
             return
 
+        content_strings.append(str(clip.parent().get("resource")))
+
         if len(clip.filters) == 0:
             content_strings.append("##no_filters")
         else:
@@ -695,7 +842,12 @@ class TimeLineUpdateThread(threading.Thread):
         
         if len(self.dirty_segments) == 0:
             return
-        
+
+        # Render server is launched on project load and may not be on DBus yet.
+        if tlinerenderserver.wait_for_render_server() == False:
+            print("INFO: Timeline background render service did not start, segments not rendered.")
+            return
+
         try:
             # Blocks untils renders are stopped and cleaned
             tlinerenderserver.abort_current_renders()
@@ -751,14 +903,17 @@ class TimeLineUpdateThread(threading.Thread):
                         
                     # We need to update content hash and clip path to match the newly cut segment.
                     segment.content_hash = segment.get_content_hash()
-                    clip_path = segment.get_clip_path()
+                    if os.path.isfile(segment.get_clip_path()) == True:
+                        segment.update_segment_as_rendered()
+                        continue
 
-                segments_paths.append(clip_path)
+                segments_paths.append(segment.get_render_path())
                 segments_ins.append(segment.start_frame)
                 segments_outs.append(segment.end_frame)
         
         for seg in destroy_segments: # There can only be 1 of these but whatever.
             _timeline_renderer.segments.remove(seg)
+        _timeline_renderer.save_sequence_segments()
         
         if len(segments_paths) == 0:
             # clips for all new dirty segments existed or all segments after sequence end (or both in some combination)
@@ -782,10 +937,20 @@ class TimeLineStatusPollingThread(threading.Thread):
 
     def run(self):
         running = True
+        last_status_time = time.monotonic()
         
         while running:
-            rendering_file, fract, render_completed, completed_segments = tlinerenderserver.get_render_status()
-            get_renderer().update_timeline_rendering_status(rendering_file, fract, render_completed, completed_segments)
+            render_status = tlinerenderserver.get_render_status()
+            if render_status == None:
+                # Render server is not ready or has exited.
+                if time.monotonic() - last_status_time > tlinerenderserver.RENDER_SERVER_START_TIMEOUT:
+                    return
+                time.sleep(0.5)
+                continue
+
+            last_status_time = time.monotonic()
+            rendering_files, fractions, render_completed, completed_segments = render_status
+            get_renderer().update_timeline_rendering_status(rendering_files, fractions, render_completed, completed_segments)
 
             Gdk.threads_enter()
             gui.tline_render_strip.widget.queue_draw()
@@ -795,6 +960,8 @@ class TimeLineStatusPollingThread(threading.Thread):
             
             if render_completed == 1: 
                 running = False
+
+        _enforce_render_cache_size()
     
         while get_renderer().all_segments_ready() == False:
             time.sleep(0.1)
@@ -851,10 +1018,41 @@ class TLineSettingsRenderDialog:
         
         panel_encoding = guiutils.get_named_frame(_("Render Encoding"), vbox_enc)
 
+        # Render processes
+        processes_adj = Gtk.Adjustment(value=float(editorpersistance.prefs.tline_render_processes), lower=1.0, upper=float(multiprocessing.cpu_count()), step_incr=1.0)
+        self.processes_spin = Gtk.SpinButton()
+        self.processes_spin.set_adjustment(processes_adj)
+        self.processes_spin.set_numeric(True)
+        self.processes_spin.connect("value-changed", lambda w: self.processes_changed(w.get_value_as_int()))
+
+        row_processes = guiutils.get_two_column_box(Gtk.Label(label=_("Segments rendered in parallel:")), self.processes_spin, 250)
+        
+        vbox_processes = Gtk.VBox(False, 2)
+        vbox_processes.pack_start(row_processes, False, False, 0)
+        vbox_processes.pack_start(guiutils.pad_label(8, 12), False, False, 0)
+
+        panel_processes = guiutils.get_named_frame(_("Render Processes"), vbox_processes)
+
+        # Render cache
+        cache_adj = Gtk.Adjustment(value=float(editorpersistance.prefs.tline_render_cache_mb), lower=100.0, upper=100000.0, step_incr=100.0)
+        self.cache_spin = Gtk.SpinButton()
+        self.cache_spin.set_adjustment(cache_adj)
+        self.cache_spin.set_numeric(True)
+        self.cache_spin.connect("value-changed", lambda w: self.cache_size_changed(w.get_value_as_int()))
+
+        row_cache = guiutils.get_two_column_box(Gtk.Label(label=_("Render cache max size MB:")), self.cache_spin, 250)
+        
+        vbox_cache = Gtk.VBox(False, 2)
+        vbox_cache.pack_start(row_cache, False, False, 0)
+        vbox_cache.pack_start(guiutils.pad_label(8, 12), False, False, 0)
+
+        panel_cache = guiutils.get_named_frame(_("Render Cache"), vbox_cache)
 
         # Pane
         vbox = Gtk.VBox(False, 2)
         vbox.pack_start(panel_encoding, False, False, 0)
+        vbox.pack_start(panel_processes, False, False, 0)
+        vbox.pack_start(panel_cache, False, False, 0)
         guiutils.set_margins(vbox, 8, 12, 12, 12)
 
         self.dialog.vbox.pack_start(vbox, True, True, 0)
@@ -871,4 +1069,108 @@ class TLineSettingsRenderDialog:
     def size_changed(self, size_index):
         editorpersistance.prefs.tline_render_size = size_index
         editorpersistance.save()
+
+    def processes_changed(self, processes_count):
+        editorpersistance.prefs.tline_render_processes = processes_count
+        editorpersistance.save()
+
+    def cache_size_changed(self, cache_mb):
+        editorpersistance.prefs.tline_render_cache_mb = cache_mb
+        editorpersistance.save()
+    
+
+
+# ------------------------------------------------------------ BENCHMARK
+class _BenchmarkFilter:
+    def __init__(self, index):
+        self.properties = [("property_" + str(i), str(index * i * 0.5), 1) for i in range(0, 12)]
+
+
+class _BenchmarkClip:
+    def __init__(self, index, length):
+        self.clip_in = 0
+        self.clip_out = length - 1
+        self.is_blanck_clip = False
+        self.filters = [_BenchmarkFilter(index + i) for i in range(0, 3)]
+        self.mute_filter = None
+        self.resource = "/media/clip_" + str(index) + ".mp4"
+
+    def get(self, property_name):
+        return self.resource
+
+    def parent(self):
+        return self
+
+
+class _BenchmarkTrack:
+    def __init__(self, clips_count, clip_length):
+        self.clips = [_BenchmarkClip(i, clip_length) for i in range(0, clips_count)]
+        self.clip_starts = [i * clip_length for i in range(0, clips_count)]
+        self.length = clips_count * clip_length
+
+    def clip_start(self, index):
+        return self.clip_starts[index]
+
+    def get_clip_index_at(self, frame):
+        if frame >= self.length:
+            return len(self.clips)
+        return bisect.bisect_right(self.clip_starts, frame) - 1
+
+
+class _BenchmarkSequence:
+    def __init__(self, tracks_count, clips_per_track, clip_length):
+        # First and last tracks are not hashed, like black bg track and hidden track in sequences.
+        self.tracks = [_BenchmarkTrack(0, clip_length)]
+        self.tracks += [_BenchmarkTrack(clips_per_track, clip_length) for i in range(0, tracks_count)]
+        self.tracks += [_BenchmarkTrack(0, clip_length)]
+        self.tline_render_mode = appconsts.TLINE_RENDERING_AUTO
+
+    def get_clip_index(self, track, frame):
+        index = track.get_clip_index_at(frame)
+        if index >= len(track.clips):
+            return -1
+        return index
+
+
+def _benchmark(segments_count=200, clips_count=2000, tracks_count=4, clip_length=50):
+    """
+    Prints post edit segment update times with and without cached segment content hashes.
+    """
+    import editorstate
+
+    class BenchmarkProject:
+        pass
+
+    seq = _BenchmarkSequence(tracks_count, clips_count // tracks_count, clip_length)
+    editorstate.project = BenchmarkProject()
+    editorstate.project.c_seq = seq
     
+    seq_len = (clips_count // tracks_count) * clip_length
+    segment_step = seq_len // segments_count
+    segments = [TimeLineSegment(i * segment_step, i * segment_step + segment_step - 1) for i in range(0, segments_count)]
+
+    # Clear caches and rehash all segments, this was done after every edit before content keys were added.
+    start_time = time.monotonic()
+    for seg in segments:
+        seg.content_key = None
+        seg.update_segment()
+    full_time = time.monotonic() - start_time
+
+    # Edit filter property of one clip and update all segments.
+    edited_clip = seq.tracks[2].clips[len(seq.tracks[2].clips) // 2]
+    edited_clip.filters[0].properties[0] = ("property_0", "edited", 1)
+    mark_clips_changed([edited_clip])
+    old_hashes = [seg.content_hash for seg in segments]
+    start_time = time.monotonic()
+    for seg in segments:
+        seg.update_segment()
+    incremental_time = time.monotonic() - start_time
+    changed_count = len([seg for seg, old_hash in zip(segments, old_hashes) if seg.content_hash != old_hash])
+
+    print("segments:", segments_count, "clips:", clips_count)
+    print("full rehash after edit:", round(full_time * 1000.0, 1), "ms")
+    print("incremental update after edit:", round(incremental_time * 1000.0, 1), "ms, rehashed segments:", changed_count)
+
+
+if __name__ == "__main__":
+    _benchmark()
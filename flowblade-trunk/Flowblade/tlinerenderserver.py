@@ -33,7 +33,9 @@ import dbus.service
 from dbus.mainloop.glib import DBusGMainLoop
 import locale
 import mlt
+import multiprocessing
 import os
+import queue
 import subprocess
 import sys
 import threading
@@ -42,9 +44,8 @@ import time
 import appconsts
 import atomicfile
 import editorstate
-import mltenv
+import mltenvsnapshot
 import mlttransitions
-import mltfilters
 import mltprofiles
 import editorpersistance
 import processutils
@@ -56,6 +57,7 @@ import userfolders
 
 TLINE_RENDER_ENCODING_INDEX = 0
 RENDERING_PAD_FRAMES = 3
+RENDER_SERVER_START_TIMEOUT = 15.0 # seconds
 
 _dbus_service = None
 
@@ -72,6 +74,19 @@ def launch_render_server():
         FLOG = open(userfolders.get_cache_dir() + "log_tline_render", 'w')
         subprocess.Popen([sys.executable, respaths.LAUNCH_DIR + "flowbladetlinerender"], stdin=FLOG, stdout=FLOG, stderr=FLOG)
 
+def wait_for_render_server(timeout=RENDER_SERVER_START_TIMEOUT):
+    """
+    Blocks until render server is on DBus, returns False if it did not appear within timeout.
+    Must not be called on GTK thread.
+    """
+    bus = dbus.SessionBus()
+    start_time = time.monotonic()
+    while bus.name_has_owner('flowblade.movie.editor.tlinerenderserver') == False:
+        if time.monotonic() - start_time > timeout:
+            return False
+        time.sleep(0.1)
+    return True
+
 def render_update_clips(sequence_xml_path, segments_paths, segments_ins, segments_outs, profile_name):
     iface = _get_iface("render_update_clips")
     if iface != None:
@@ -109,6 +124,16 @@ def _get_iface(method_name):
 
 # ---------------------------------------------------------------- server
 def main(root_path, force_launch=False):
+    _init_mlt_environment(root_path)
+
+    # Launch server
+    DBusGMainLoop(set_as_default=True)
+    loop = GLib.MainLoop()
+    global _dbus_service
+    _dbus_service = TLineRenderDBUSService(loop)
+    loop.run()
+
+def _init_mlt_environment(root_path):
     try:
         editorstate.mlt_version = mlt.LIBMLT_VERSION
     except:
@@ -136,25 +161,13 @@ def main(root_path, force_launch=False):
     # Set numeric locale to use "." as radix, MLT initilizes this to OS locale and this causes bugs 
     locale.setlocale(locale.LC_NUMERIC, 'C')
 
-    # Check for codecs and formats on the system
-    mltenv.check_available_features(repo)
-    renderconsumer.load_render_profiles()
-
-    # Load filter and compositor descriptions from xml files.
-    mltfilters.load_filters_xml(mltenv.services)
-    mlttransitions.load_compositors_xml(mltenv.transitions)
+    # Check for codecs and formats on the system and load filter and compositor descriptions,
+    # use snapshot saved by earlier process if still valid.
+    mltenvsnapshot.load_mlt_environment(repo)
 
     # Create list of available mlt profiles
     mltprofiles.load_profile_list()
 
-    # Launch server
-    DBusGMainLoop(set_as_default=True)
-    loop = GLib.MainLoop()
-    global _dbus_service
-    _dbus_service = TLineRenderDBUSService(loop)
-    loop.run()
-
-
 
 class TLineRenderDBUSService(dbus.service.Object):
     def __init__(self, loop):
@@ -163,6 +176,12 @@ class TLineRenderDBUSService(dbus.service.Object):
         self.main_loop = loop
 
         self.render_runner_thread = None
+
+        self.render_pool = None
+        self.render_pool_size = 0
+        self.status_queue = None
+        self.aborted_run = None # shared value, renders with run number less or equal to this are aborted
+        self.render_run = 0
         
     @dbus.service.method('flowblade.movie.editor.tlinerenderserver')
     def render_update_clips(self, sequence_xml_path, segments_paths, segments_ins, segments_outs, profile_name):
@@ -179,15 +198,22 @@ class TLineRenderDBUSService(dbus.service.Object):
 
     @dbus.service.method('flowblade.movie.editor.tlinerenderserver')
     def get_render_status(self):
+        # Returns (files being rendered, render fractions for files, render complete, completed files),
+        # dummy values are used instead of empty lists.
         dummy_list = ["nothing"]
+        dummy_fractions = [0.0]
         if self.render_runner_thread == None:
-            return ("none", 1.0,  False, dummy_list)
+            return (dummy_list, dummy_fractions, False, dummy_list)
         
         if self.render_runner_thread.render_complete:
-            return ("none", 1.0, self.render_runner_thread.render_complete, self.render_runner_thread.completed_segments)
+            return (dummy_list, dummy_fractions, self.render_runner_thread.render_complete, self.render_runner_thread.completed_segments)
         
-        return ( self.render_runner_thread.current_render_file_path, self.render_runner_thread.get_fraction(), 
-                  self.render_runner_thread.render_complete, self.render_runner_thread.completed_segments)
+        rendering_files, fractions = self.render_runner_thread.get_fractions()
+        if len(rendering_files) == 0:
+            rendering_files = dummy_list
+            fractions = dummy_fractions
+
+        return (rendering_files, fractions, self.render_runner_thread.render_complete, self.render_runner_thread.completed_segments)
 
     @dbus.service.method('flowblade.movie.editor.tlinerenderserver')
     def abort_renders(self):
@@ -203,117 +229,211 @@ class TLineRenderDBUSService(dbus.service.Object):
 
     @dbus.service.method('flowblade.movie.editor.tlinerenderserver')
     def shutdown_render_server(self):
+        if self.render_pool != None:
+            self.aborted_run.value = self.render_run
+            self.render_pool.terminate()
         self.remove_from_connection()
         self.main_loop.quit()
 
+    def get_render_pool(self):
+        """
+        Returns pool of render worker processes, pool is created again if number of
+        processes in preferences has changed.
+        """
+        pool_size = max(1, editorpersistance.prefs.tline_render_processes)
+        if self.render_pool != None and pool_size == self.render_pool_size:
+            return self.render_pool
+        
+        if self.render_pool != None:
+            self.render_pool.close()
+            self.render_pool.join()
+
+        # Worker processes are spawned, not forked, because this process already has 
+        # MLT, DBus and GLib main loop threads running.
+        ctx = multiprocessing.get_context("spawn")
+        self.status_queue = ctx.Queue()
+        self.aborted_run = ctx.Value("i", self.render_run)
+        self.render_pool = ctx.Pool(pool_size, _init_render_process, 
+                                    (respaths.ROOT_PATH, self.status_queue, self.aborted_run))
+        self.render_pool_size = pool_size
+        print("Timeline render pool created, processes:", pool_size)
+        return self.render_pool
 
 
 # --------------------------------------------------------------------- rendering
 class TLineRenderRunnerThread(threading.Thread):
     """
-    SINGLE THREADED RENDERING, SHOULD WE GET MULTIPLE PROCESSES GOING FOR MULTIPLE CLIPS LATER IN MODERN MULTICORE MACHINES?
+    Sends segments to render pool worker processes and collects their progress.
+    Independent segments are rendered in parallel up to preferences process count.
     """
     def __init__(self, dbus_service, sequence_xml_path, segments, profile_name):
         threading.Thread.__init__(self)
         
         self.dbus_service = dbus_service
         self.sequence_xml_path = sequence_xml_path
-        self.render_folder = os.path.dirname(sequence_xml_path)
-        self.current_render_file_path = None
-        self.profile = mltprofiles.get_profile(profile_name)
+        self.profile_name = profile_name
         self.segments = segments
         self.completed_segments =  ["nothing"]
         self.render_complete = False
-        self.render_thread = None
+        self.segment_fractions = {} # clip file path -> render fraction for segments being rendered
+        self.fractions_lock = threading.Lock()
 
         self.aborted = False
+        self.render_run = None
 
     def run(self):
         editorpersistance.load() # to apply possible chnages on timeline rendering
         
         start_time = time.monotonic()
- 
-        width, height = _get_render_dimensions(self.profile, editorpersistance.prefs.tline_render_size)
-        encoding = _get_render_encoding()
-        self.render_profile = _get_render_profile(self.profile,  editorpersistance.prefs.tline_render_size, self.render_folder)
-        
-        self.current_render_file_path = None
-        
-        sequence_xml_producer = mlt.Producer(self.profile, str(self.sequence_xml_path))
-        
+
+        render_pool = self.dbus_service.get_render_pool()
+
+        # Segments still queued from earlier aborted runs stay aborted because run numbers only grow.
+        self.dbus_service.render_run += 1
+        self.render_run = self.dbus_service.render_run
+        if self.aborted: # abort() was called before run number was available
+            self.abort()
+
+        pending_renders = []
         for segment in self.segments:
-            if self.aborted == True:
-                break
-                
             clip_file_path, clip_range_in, clip_range_out = segment
-
-            # Create render objects
-            self.current_render_file_path = clip_file_path
-            renderconsumer.performance_settings_enabled = False
-            
-            consumer = renderconsumer.get_render_consumer_for_encoding( clip_file_path,
-                                                                        self.render_profile, 
-                                                                        encoding)
-            renderconsumer.performance_settings_enabled = True
+            with self.fractions_lock:
+                self.segment_fractions[clip_file_path] = 0.0
+            result = render_pool.apply_async(_render_segment, (self.render_run, self.sequence_xml_path, self.profile_name, 
+                                                               clip_file_path, clip_range_in, clip_range_out))
+            pending_renders.append(result)
+
+        while len(pending_renders) > 0:
+            self._read_status_queue()
+
+            still_pending = []
+            for result in pending_renders:
+                if not result.ready():
+                    still_pending.append(result)
+                    continue
+                try:
+                    clip_file_path, completed = result.get()
+                except Exception as e:
+                    print("tline render segment failed:", str(e))
+                    continue
+                with self.fractions_lock:
+                    self.segment_fractions.pop(clip_file_path, None)
+                if completed and not self.aborted:
+                    self.completed_segments.append(clip_file_path)
             
-            # We are using proxy file rendering code here mostly, didn't vhange all names.
-            # Bit rates for proxy files are counted using 2500kbs for 
-            # PAL size image as starting point.
-            pal_pix_count = 720.0 * 576.0
-            pal_proxy_rate = 2500.0
-            proxy_pix_count = float(width * height)
-            proxy_rate = pal_proxy_rate * (proxy_pix_count / pal_pix_count)
-            proxy_rate = int(proxy_rate / 100) * 100 # Make proxy rate even hundred
-            # There are no practical reasons to have bitrates lower than 500kbs.
-            if proxy_rate < 500:
-                proxy_rate = 500
-            consumer.set("vb", str(int(proxy_rate)) + "k")
-
-            consumer.set("rescale", "nearest")
-
-            start_frame = clip_range_in 
-            
-            stop_frame = clip_range_out + RENDERING_PAD_FRAMES
-            if stop_frame > sequence_xml_producer.get_length() - 1:
-                stop_frame = sequence_xml_producer.get_length() - 1
-
-            # Create and launch render thread
-            self.render_thread = renderconsumer.FileRenderPlayer(None, sequence_xml_producer, consumer, start_frame, stop_frame)
-            self.render_thread.wait_for_producer_end_stop = False
-            self.render_thread.start()
-
-            # Render view update loop
-            self.render_in_progress = True
-            self.aborted = False
-            while self.render_in_progress:
-                if self.aborted == True:
-                    break
-
-                if self.render_thread.running == False: # Rendering has reached end
-                    self.render_in_progress = False
-                    self.current_render_file_path = None
-                else:
-                    time.sleep(0.1)
-
-            if self.aborted:
-                self.render_thread.shutdown()
-                break
-
-            self.completed_segments.append(clip_file_path)
-
-            self.render_thread.shutdown()
+            pending_renders = still_pending
+            time.sleep(0.1)
         
+        # Stale progress messages must not be read by next render.
+        self._read_status_queue()
+
         self.render_complete = True
         print("tline render done, time:", time.monotonic() - start_time)
 
-    def get_fraction(self):
-        return self.render_thread.get_render_fraction()
+    def _read_status_queue(self):
+        status_queue = self.dbus_service.status_queue
+        while True:
+            try:
+                clip_file_path, fraction = status_queue.get_nowait()
+            except queue.Empty:
+                return
+            with self.fractions_lock:
+                if clip_file_path in self.segment_fractions:
+                    self.segment_fractions[clip_file_path] = fraction
+
+    def get_fractions(self):
+        with self.fractions_lock:
+            rendering_files = list(self.segment_fractions.keys())
+            fractions = [float(self.segment_fractions[f]) for f in rendering_files]
+        return (rendering_files, fractions)
 
     def abort(self):
-        self.render_thread.shutdown()
         self.aborted = True
-        self.thread_running = False
+        if self.render_run != None:
+            with self.dbus_service.aborted_run.get_lock():
+                if self.dbus_service.aborted_run.value < self.render_run:
+                    self.dbus_service.aborted_run.value = self.render_run
+
+
+# ------------------------------------------------------------- render worker processes
+_worker_status_queue = None
+_worker_aborted_run = None
 
+def _init_render_process(root_path, status_queue, aborted_run):
+    global _worker_status_queue, _worker_aborted_run
+    _worker_status_queue = status_queue
+    _worker_aborted_run = aborted_run
+    _init_mlt_environment(root_path)
+
+def _render_segment(render_run, sequence_xml_path, profile_name, clip_file_path, clip_range_in, clip_range_out):
+    """
+    Renders one segment in a worker process, returns (clip_file_path, completed).
+    """
+    # Segments queued for an aborted run are skipped before any MLT objects are created.
+    if _render_run_aborted(render_run):
+        return (clip_file_path, False)
+
+    editorpersistance.load() # to apply possible chnages on timeline rendering
+
+    profile = mltprofiles.get_profile(profile_name)
+    render_folder = os.path.dirname(sequence_xml_path)
+    width, height = _get_render_dimensions(profile, editorpersistance.prefs.tline_render_size)
+    encoding = _get_render_encoding()
+    render_profile = _get_render_profile(profile,  editorpersistance.prefs.tline_render_size, render_folder)
+
+    # Every worker needs its own producer.
+    sequence_xml_producer = mlt.Producer(profile, str(sequence_xml_path))
+
+    # Create render objects
+    renderconsumer.performance_settings_enabled = False
+    consumer = renderconsumer.get_render_consumer_for_encoding( clip_file_path,
+                                                                render_profile, 
+                                                                encoding)
+    renderconsumer.performance_settings_enabled = True
+    
+    # We are using proxy file rendering code here mostly, didn't vhange all names.
+    # Bit rates for proxy files are counted using 2500kbs for 
+    # PAL size image as starting point.
+    pal_pix_count = 720.0 * 576.0
+    pal_proxy_rate = 2500.0
+    proxy_pix_count = float(width * height)
+    proxy_rate = pal_proxy_rate * (proxy_pix_count / pal_pix_count)
+    proxy_rate = int(proxy_rate / 100) * 100 # Make proxy rate even hundred
+    # There are no practical reasons to have bitrates lower than 500kbs.
+    if proxy_rate < 500:
+        proxy_rate = 500
+    consumer.set("vb", str(int(proxy_rate)) + "k")
+
+    consumer.set("rescale", "nearest")
+
+    start_frame = clip_range_in 
+    
+    stop_frame = clip_range_out + RENDERING_PAD_FRAMES
+    if stop_frame > sequence_xml_producer.get_length() - 1:
+        stop_frame = sequence_xml_producer.get_length() - 1
+
+    # Create and launch render thread
+    render_thread = renderconsumer.FileRenderPlayer(None, sequence_xml_producer, consumer, start_frame, stop_frame)
+    render_thread.wait_for_producer_end_stop = False
+    render_thread.start()
+
+    # Render progress update loop
+    while render_thread.running == True or render_thread.has_started_running == False:
+        if _render_run_aborted(render_run):
+            render_thread.shutdown()
+            # Partially rendered file would be taken as rendered segment later.
+            if os.path.isfile(clip_file_path):
+                os.remove(clip_file_path)
+            return (clip_file_path, False)
+
+        _worker_status_queue.put((clip_file_path, render_thread.get_render_fraction()))
+        time.sleep(0.1)
+
+    render_thread.shutdown()
+    return (clip_file_path, True)
+
+def _render_run_aborted(render_run):
+    return _worker_aborted_run.value >= render_run
 
 def _get_render_encoding():
     return renderconsumer.proxy_encodings[editorpersistance.prefs.tline_render_encoding]
@@ -47,9 +47,11 @@ from editorstate import current_proxy_media_paths
 import editorstate
 import gui
 import guiutils
+import lrucache
 import respaths
 import sequence
 import snapping
+import thumbnailcache
 import tlinerender
 import trimmodes
 import userfolders
@@ -77,6 +79,7 @@ WAVEFORM_PAD_LARGE = 27
 WAVEFORM_PAD_SMALL = 8
 WAVEFORM_HEIGHT_LARGE = 22.0
 WAVEFORM_HEIGHT_SMALL = 17.0
+WAVEFORM_SURFACE_MAX_WIDTH = 4096 # Clips wider than this in pixels have their levels drawn directly
 MARK_PAD = 6
 MARK_LINE_WIDTH = 4
 
@@ -158,6 +161,10 @@ NUMBER_OF_LINES = 7
 ICON_SLOTS = [(14, 2),(28, 2),(42,2),(56,2)]
 # Line width for moving clip boxes
 MOVE_CLIPS_LINE_WIDTH = 3.0
+# Width of area repainted around playhead when only playhead has moved
+PLAYHEAD_DAMAGE_WIDTH = 4
+# Pixels outside visible range where compositors are still drawn
+COMPOSITOR_DRAW_MARGIN_PIX = 100
 
 # Color creating utils methods
 def get_multiplied_color(color, m):
@@ -319,6 +326,10 @@ trim_status = appconsts.ON_BETWEEN_FRAME
 # Dict for clip thumbnails path -> image
 clip_thumbnails = {}
 
+# Rendered clip waveform mask surfaces, created on first use with size budget from prefs.
+# (media path, clip_in, clip_out, pix_per_frame, track height) -> cairo.ImageSurface
+_waveform_surfaces = None
+
 # Timeline match image
 match_frame = -1
 match_frame_track_index = -1
@@ -454,6 +465,45 @@ def match_frame_close_hit(x, y):
 def _load_pixbuf(icon_file):
     return cairo.ImageSurface.create_from_png(respaths.IMAGE_PATH + icon_file)
 
+def get_waveform_surfaces_cache():
+    global _waveform_surfaces
+    if _waveform_surfaces == None:
+        _waveform_surfaces = lrucache.LRUCache(editorpersistance.prefs.waveform_surfaces_cache_mb * 1024 * 1024)
+    return _waveform_surfaces
+
+def clear_waveform_surfaces_cache():
+    get_waveform_surfaces_cache().clear()
+
+def _get_waveform_surface(clip, waveform_data, track_height, bar_height):
+    # Surface is an alpha mask of clip levels bars with clip_in frame at x = 0,
+    # it is drawn with clip levels color set as source. 
+    cache = get_waveform_surfaces_cache()
+    key = (clip.path, clip.clip_in, clip.clip_out, pix_per_frame, track_height)
+    surface = cache.get(key)
+    if surface != None:
+        return surface
+
+    clip_length = clip.clip_out - clip.clip_in + 1
+    surface_width = int(math.ceil(clip_length * pix_per_frame)) + 1
+    surface_height = int(math.ceil(bar_height))
+    surface = cairo.ImageSurface(cairo.FORMAT_A8, surface_width, surface_height)
+    cr = cairo.Context(surface)
+    cr.set_source_rgba(0, 0, 0, 1)
+
+    first_bar_frame, frames_per_bar, levels = waveform_data.get_draw_levels(clip.clip_in, clip.clip_out + 1, pix_per_frame)
+    bar_width = frames_per_bar * pix_per_frame
+    bar_x = (first_bar_frame - clip.clip_in) * pix_per_frame
+    for level in levels:
+        h = bar_height * level
+        if h < 1:
+            h = 1
+        cr.rectangle(bar_x, bar_height - h, bar_width, h)
+        bar_x += bar_width
+    cr.fill()
+
+    cache.put(key, surface, surface.get_stride() * surface_height)
+    return surface
+
 def set_ref_line_y(allocation):
     """
     Sets value of REF_LINE_Y to such that tracks are vertically centered.
@@ -551,7 +601,7 @@ def _get_frame_x(frame):
     disp_frame = frame - pos
     return disp_frame * pix_per_frame
 
-def compositor_hit(frame, x, y, sorted_compositors):
+def compositor_hit(frame, x, y):
     """
     Returns compositor hit with mouse press x,y or None if nothing hit.
     """
@@ -565,45 +615,41 @@ def compositor_hit(frame, x, y, sorted_compositors):
         return None
        
     if editorstate.get_compositing_mode() == appconsts.COMPOSITING_MODE_STANDARD_AUTO_FOLLOW:
-        return _standard_auto_follow_comp_hit(frame, track, x, y, sorted_compositors)
+        return _standard_auto_follow_comp_hit(frame, track, x, y)
     
     # Test if compositor hit on track top, so compositor hit on dest track side
     if y >= track_top and y < track_top + (COMPOSITOR_HEIGHT - COMPOSITOR_HEIGHT_OFF):
-       return _comp_hit_on_below_track(frame, track, sorted_compositors)
+       return _comp_hit_on_below_track(frame, track)
        
     # Test if compositor hit on track bottom, so compositor hit on source track side      
     elif y >= (track_top + track.height - COMPOSITOR_HEIGHT_OFF) and y <=(track_top + track.height):
-       return _comp_hit_on_source_track(frame, track, sorted_compositors)
+       return _comp_hit_on_source_track(frame, track)
 
     # Hit y is on he stripe where no compositors can be hit
     else:
         return None
 
-def _comp_hit_on_below_track(frame, track, sorted_compositors):
-    for comp in sorted_compositors:
-        if comp.transition.b_track - 1 == track.id:
-            if comp.clip_in <= frame and comp.clip_out >= frame:
-                return comp
+def _comp_hit_on_below_track(frame, track):
+    hit_compositors = current_sequence().get_timeline_index().get_compositors_at(track.id + 1, frame)
+    if len(hit_compositors) > 0:
+        return hit_compositors[0]
     return None
 
-def _comp_hit_on_source_track(frame, track, sorted_compositors):
-    for comp in sorted_compositors:
-        if comp.transition.b_track == track.id:
-            if comp.clip_in <= frame and comp.clip_out >= frame:
-                return comp
+def _comp_hit_on_source_track(frame, track):
+    hit_compositors = current_sequence().get_timeline_index().get_compositors_at(track.id, frame)
+    if len(hit_compositors) > 0:
+        return hit_compositors[0]
     return None
 
-def _standard_auto_follow_comp_hit(frame, track, x, y, sorted_compositors):
-    for comp in sorted_compositors:
-        if comp.transition.b_track == track.id:
-            if comp.clip_in <= frame and comp.clip_out >= frame:
-                scale_in = (comp.clip_in - pos) * pix_per_frame
-                scale_length = (comp.clip_out - comp.clip_in + 1) * pix_per_frame # +1, out incl.
-                comp_top_y = _get_track_y(track.id) + track.height - COMPOSITOR_HEIGHT_OFF
-                tx, ty, tw, th = _get_standard_mode_compositor_rect(scale_in, scale_length, comp_top_y)
-                if x >= tx and x <= tx + tw:
-                    if y >= ty and y <= ty + th:
-                        return comp
+def _standard_auto_follow_comp_hit(frame, track, x, y):
+    for comp in current_sequence().get_timeline_index().get_compositors_at(track.id, frame):
+        scale_in = (comp.clip_in - pos) * pix_per_frame
+        scale_length = (comp.clip_out - comp.clip_in + 1) * pix_per_frame # +1, out incl.
+        comp_top_y = _get_track_y(track.id) + track.height - COMPOSITOR_HEIGHT_OFF
+        tx, ty, tw, th = _get_standard_mode_compositor_rect(scale_in, scale_length, comp_top_y)
+        if x >= tx and x <= tx + tw:
+            if y >= ty and y <= ty + th:
+                return comp
     return None
 
 def _get_standard_mode_compositor_rect(scale_in, scale_length, y):
@@ -1461,6 +1507,11 @@ class TimeLineCanvas:
         
         # Drag state
         self.drag_on = False
+
+        # Cached tracks, clips and compositors image
+        self.static_layer = None
+        self.static_layer_key = None
+        self.drawn_pointer_x = None
                 
         # for edit mode setting
         global canvas_widget
@@ -1525,7 +1576,7 @@ class TimeLineCanvas:
         
     def get_pointer_context(self, x, y):
         frame = get_frame(x)
-        hit_compositor = compositor_hit(frame, x, y, current_sequence().compositors)
+        hit_compositor = compositor_hit(frame, x, y)
         if hit_compositor != None:
             if editorstate.get_compositing_mode() == appconsts.COMPOSITING_MODE_STANDARD_AUTO_FOLLOW:
                 return appconsts.POINTER_CONTEXT_NONE
@@ -1618,31 +1669,40 @@ class TimeLineCanvas:
         self.widget.enter_notify_func = self.widget._enter
         
     #----------------------------------------- DRAW
+    def redraw_playhead(self):
+        """
+        Repaints only previous and current playhead columns, static layer is reused.
+        Edit mode overlays may depend on current frame, so they get full redraws.
+        """
+        if self.static_layer == None or self.edit_mode_overlay_draw_func != None:
+            self.widget.queue_draw()
+            return
+
+        h = self.widget.get_allocated_height()
+        for pointer_x in set([self.drawn_pointer_x, self._get_pointer_x()]):
+            if pointer_x != None:
+                self.widget.queue_draw_area(int(pointer_x) - PLAYHEAD_DAMAGE_WIDTH // 2, 0, PLAYHEAD_DAMAGE_WIDTH, h)
+
     def _draw(self, event, cr, allocation):
         x, y, w, h = allocation
 
-        # Draw bg
-        cr.set_source_rgb(*BG_COLOR)
-        cr.rectangle(0, 0, w, h)
-        cr.fill()
-
         # This can get called during loads by unwanted expose events
         if editorstate.project_is_loading == True:
+            cr.set_source_rgb(*BG_COLOR)
+            cr.rectangle(0, 0, w, h)
+            cr.fill()
+            self.static_layer = None
             return
 
-        # Init sync draw structures
-        self.parent_positions = {}
-        self.sync_children = []
-
-        # Draw tracks
-        for i in range(1, len(current_sequence().tracks) - 1): # black and hidden tracks are ignored
-            self.draw_track(cr
-                            ,current_sequence().tracks[i]
-                            ,_get_track_y(i)
-                            ,w)
+        # Tracks, clips and compositors are drawn into static layer that is rebuilt for all redraws 
+        # except those coming from redraw_playhead().
+        if self._static_layer_valid(cr, w, h) == False:
+            self.static_layer = cr.get_target().create_similar(cairo.CONTENT_COLOR, w, h)
+            self.static_layer_key = (pos, pix_per_frame, w, h)
+            self._draw_static_layer(cairo.Context(self.static_layer), w, h)
 
-        self.draw_compositors(cr)
-        self.draw_sync_relations(cr)
+        cr.set_source_surface(self.static_layer, 0, 0)
+        cr.paint()
 
         # Exit displaying from fake_current_pointer for SLIDE_TRIM mode if last displayed 
         # was from fake_pointer but this is not anymore
@@ -1655,23 +1715,16 @@ class TimeLineCanvas:
         self.draw_match_frame(cr)
             
         # Draw frame pointer
-        if EDIT_MODE() != editorstate.SLIDE_TRIM or PLAYER().looping():
-            current_frame = PLAYER().tracktor_producer.frame()
-        else:
-            current_frame = fake_current_frame
-
         if timeline_visible():
-            pointer_frame = current_frame
             cr.set_source_rgb(0, 0, 0)
         else:
-            pointer_frame = editorstate.tline_shadow_frame
             cr.set_source_rgb(*SHADOW_POINTER_COLOR)
-        disp_frame = pointer_frame - pos
-        frame_x = math.floor(disp_frame * pix_per_frame) + 0.5
+        frame_x = self._get_pointer_x()
         cr.move_to(frame_x, 0)
         cr.line_to(frame_x, h)
         cr.set_line_width(1.0)
         cr.stroke()
+        self.drawn_pointer_x = frame_x
 
         # Draw edit mode overlay
         if self.edit_mode_overlay_draw_func != None:
@@ -1679,6 +1732,58 @@ class TimeLineCanvas:
         
         audiowaveformrenderer.launch_queued_renders()
 
+    def _static_layer_valid(self, cr, w, h):
+        if self.static_layer == None or self.static_layer_key != (pos, pix_per_frame, w, h):
+            return False
+
+        # Redraws requested by redraw_playhead() only have narrow playhead columns in clip.
+        try:
+            clip_rects = cr.copy_clip_rectangle_list()
+        except cairo.Error:
+            return False
+        for clip_rect in clip_rects:
+            if clip_rect[2] > PLAYHEAD_DAMAGE_WIDTH:
+                return False
+
+        return True
+
+    def _draw_static_layer(self, cr, w, h):
+        # Draw bg
+        cr.set_source_rgb(*BG_COLOR)
+        cr.rectangle(0, 0, w, h)
+        cr.fill()
+
+        # Init sync draw structures
+        self.parent_positions = {}
+        self.sync_children = []
+
+        # Draw tracks
+        for i in range(1, len(current_sequence().tracks) - 1): # black and hidden tracks are ignored
+            self.draw_track(cr
+                            ,current_sequence().tracks[i]
+                            ,_get_track_y(i)
+                            ,w)
+
+        self.draw_compositors(cr, w)
+        self.draw_sync_relations(cr)
+
+    def _get_pointer_x(self):
+        if EDIT_MODE() != editorstate.SLIDE_TRIM or PLAYER().looping():
+            current_frame = PLAYER().tracktor_producer.frame()
+        else:
+            current_frame = fake_current_frame
+
+        if timeline_visible():
+            pointer_frame = current_frame
+        else:
+            pointer_frame = editorstate.tline_shadow_frame
+
+        if pointer_frame == None:
+            return None
+
+        disp_frame = pointer_frame - pos
+        return math.floor(disp_frame * pix_per_frame) + 0.5
+
     def draw_track(self, cr, track, y, width):
         """
         Draws visible clips in track.
@@ -1881,33 +1986,44 @@ class TimeLineCanvas:
                         
                     text_x_add = 115
                     cr.save()
-                    try: # paint thumbnail
-                        thumb_img = clip_thumbnails[clip.path]
-                        self.create_round_rect_path(cr, scale_in + 5, y + 4.5, scale_length - 10, track_height - 8, 3.0)
-                        cr.clip()
-                        cr.set_source_surface(thumb_img,scale_in, y - 20)
-                        cr.paint()
-                    except: # thumbnail not found  in dict, get it and  paint it
-                        try:
-                            if clip.container_data == None:
-                                media_file = PROJECT().get_media_file_for_path(clip.path)
-                                thumb_img = media_file.icon
-                            else:
-                                if clip.container_data.rendered_media != None:
-                                    thumb_img = clip.container_data.get_rendered_thumbnail()
-                                else:
-                                    media_file = PROJECT().get_media_file_for_path(clip.path)
-                                    thumb_img = media_file.icon
-                            cr.rectangle(scale_in + 4, y + 3.5, scale_length - 8, track_height - 6)
+                    # Filmstrips are written on media import when enabled, they are never created here.
+                    filmstrip = None
+                    if editorpersistance.prefs.media_filmstrips == True and clip.media_type == sequence.VIDEO \
+                        and getattr(clip, "container_data", None) == None:
+                        filmstrip = thumbnailcache.get_filmstrip_surface(clip.path, PROJECT().profile)
+
+                    if filmstrip != None:
+                        self.draw_clip_filmstrip(cr, clip, filmstrip, scale_in, scale_length, y, track_height, width)
+                    else:
+                        try: # paint thumbnail
+                            thumb_img = clip_thumbnails[clip.path]
+                            self.create_round_rect_path(cr, scale_in + 5, y + 4.5, scale_length - 10, track_height - 8, 3.0)
                             cr.clip()
-                            cr.set_source_surface(thumb_img, scale_in, y - 20)
+                            cr.set_source_surface(thumb_img,scale_in, y - 20)
                             cr.paint()
-                            clip_thumbnails[clip.path] = thumb_img
-                        except:
-                            pass # This fails for rendered fades and transitions
+                        except: # thumbnail not found  in dict, get it and  paint it
+                            try:
+                                if clip.container_data == None:
+                                    media_file = PROJECT().get_media_file_for_path(clip.path)
+                                    thumb_img = media_file.icon
+                                else:
+                                    if clip.container_data.rendered_media != None:
+                                        thumb_img = clip.container_data.get_rendered_thumbnail()
+                                    else:
+                                        media_file = PROJECT().get_media_file_for_path(clip.path)
+                                        thumb_img = media_file.icon
+                                cr.rectangle(scale_in + 4, y + 3.5, scale_length - 8, track_height - 6)
+                                cr.clip()
+                                cr.set_source_surface(thumb_img, scale_in, y - 20)
+                                cr.paint()
+                                clip_thumbnails[clip.path] = thumb_img
+                            except:
+                                pass # This fails for rendered fades and transitions
                     
                     if clip.selected:
-                        if scale_length - 8 < appconsts.THUMB_WIDTH:
+                        if filmstrip != None:
+                            ow = scale_length - 8
+                        elif scale_length - 8 < appconsts.THUMB_WIDTH:
                             ow = scale_length - 8 
                         else:
                             ow = appconsts.THUMB_WIDTH
@@ -2018,11 +2134,9 @@ class TimeLineCanvas:
 
             # Draw audio level data if needed.
             # Init data rendering if data needed and not available
-            if clip.is_blanck_clip == False and clip.waveform_data == None and editorstate.display_all_audio_levels == True \
-                and clip.media_type != appconsts.IMAGE_SEQUENCE and clip.media_type != appconsts.PATTERN_PRODUCER:
-                 clip.waveform_data = audiowaveformrenderer.get_waveform_data(clip)
+            waveform_data = audiowaveformrenderer.get_clip_waveform_data(clip)
             # Draw data if available large enough scale
-            if clip.is_blanck_clip == False and clip.waveform_data != None and scale_length > FILL_MIN:
+            if clip.is_blanck_clip == False and waveform_data != None and scale_length > FILL_MIN:
                 r, g, b = clip_bg_col
                 cr.set_source_rgb(r * 1.9, g * 1.9, b * 1.9)
                 
@@ -2040,41 +2154,37 @@ class TimeLineCanvas:
                     y_pad = WAVEFORM_PAD_SMALL
                     bar_height = WAVEFORM_HEIGHT_SMALL
                 
-                # Draw all frames only if pixels per frame > 2, otherwise
-                # draw only every other or fewer frames
-                draw_pix_per_frame = pix_per_frame
-                if draw_pix_per_frame < 2:
-                    draw_pix_per_frame = 2
-                    step = int(2 // pix_per_frame)
-                    if step < 1:
-                        step = 1
+                if scale_length <= WAVEFORM_SURFACE_MAX_WIDTH:
+                    # Blit cached levels surface, it is only rendered again if clip, zoom or track height changes.
+                    surface = _get_waveform_surface(clip, waveform_data, track.height, bar_height)
+                    cr.mask_surface(surface, math.floor(scale_in), y + y_pad)
                 else:
-                    step = 1
-
-                # Draw only frames in display
-                draw_first = clip_in
-                draw_last = clip_out + 1
-                if clip_start_frame < 0:
-                    draw_first = int(draw_first - clip_start_frame)
-                if draw_first + width_frames < draw_last:
-                    draw_last = int(draw_first + width_frames) + 1
-
-                # Get media frame 0 position in screen pixels
-                media_start_pos_pix = scale_in - clip_in * pix_per_frame
+                    # Draw only frames in display
+                    draw_first = clip_in
+                    draw_last = clip_out + 1
+                    if clip_start_frame < 0:
+                        draw_first = int(draw_first - clip_start_frame)
+                    if draw_first + width_frames < draw_last:
+                        draw_last = int(draw_first + width_frames) + 1
+
+                    # Get media frame 0 position in screen pixels
+                    media_start_pos_pix = scale_in - clip_in * pix_per_frame
+                
+                    # Levels data gives at most one level bar per pixel, for zoomed out views
+                    # bars are drawn from decimated levels data.
+                    first_bar_frame, frames_per_bar, levels = waveform_data.get_draw_levels(draw_first, draw_last, pix_per_frame)
+                    bar_width = frames_per_bar * pix_per_frame
+                    bar_x = media_start_pos_pix + first_bar_frame * pix_per_frame
                 
-                # Draw level bar for each frame in draw range
-                for f in range(draw_first, draw_last, step):
-                    try:
-                        x = media_start_pos_pix + f * pix_per_frame
-                        h = bar_height * clip.waveform_data[f]
+                    # Draw level bar for each bar position in draw range
+                    for level in levels:
+                        h = bar_height * level
                         if h < 1:
                             h = 1
-                        cr.rectangle(x, y + y_pad + (bar_height - h), draw_pix_per_frame, h)
-                    except:
-                        # This is just dirty fix a when 23.98 fps does not work
-                        break
+                        cr.rectangle(bar_x, y + y_pad + (bar_height - h), bar_width, h)
+                        bar_x += bar_width
 
-                cr.fill()
+                    cr.fill()
                 cr.restore()
 
 
@@ -2108,7 +2218,7 @@ class TimeLineCanvas:
                         cr.move_to(scale_in + TEXT_X, y + track_height - 2)
                         cr.show_text(str(clip.sync_diff))
 
-            if clip.waveform_data == None and editorstate.display_all_audio_levels == True and scale_length > FILL_MIN:
+            if waveform_data == None and editorstate.display_all_audio_levels == True and scale_length > FILL_MIN:
                 if clip.media_type != appconsts.IMAGE_SEQUENCE and clip.media_type != appconsts.PATTERN_PRODUCER:
                     cr.set_source_surface(LEVELS_RENDER_ICON, int(scale_in) + 4, y + 8)
                     cr.paint()
@@ -2132,11 +2242,40 @@ class TimeLineCanvas:
             cr.set_source_rgb(*BG_COLOR)  
             cr.fill()
 
-    def draw_compositors(self, cr):
+    def draw_clip_filmstrip(self, cr, clip, filmstrip, scale_in, scale_length, y, track_height, width):
+        # Draws filmstrip frames side by side over clip, each showing media frame closest to its position.
+        frame_width = filmstrip.get_width() // thumbnailcache.FILMSTRIP_FRAMES_COUNT
+        if frame_width <= 0:
+            return
+        media_length = clip.get_length()
+
+        self.create_round_rect_path(cr, scale_in + 5, y + 4.5, scale_length - 10, track_height - 8, 3.0)
+        cr.clip()
+
+        # Only frames in visible part of clip are drawn.
+        draw_start = max(scale_in, scale_in + ((0 - scale_in) // frame_width) * frame_width)
+        draw_end = min(scale_in + scale_length, width)
+        x = draw_start
+        while x < draw_end:
+            media_frame = clip.clip_in + int((x - scale_in + frame_width / 2.0) / pix_per_frame)
+            index = thumbnailcache.get_filmstrip_frame_index(media_frame, media_length)
+            cr.save()
+            cr.rectangle(x, y + 4, frame_width, track_height - 8)
+            cr.clip()
+            cr.set_source_surface(filmstrip, x - index * frame_width, y + 4)
+            cr.paint()
+            cr.restore()
+            x += frame_width
+
+    def draw_compositors(self, cr, width):
         if current_sequence().compositing_mode == appconsts.COMPOSITING_MODE_STANDARD_FULL_TRACK:
             return
             
-        compositors = current_sequence().get_compositors()
+        # Standard mode compositor boxes and arrow compositor texts can extend a bit outside compositor range.
+        margin_frames = int(COMPOSITOR_DRAW_MARGIN_PIX / pix_per_frame) + 1
+        start_frame = int(pos) - margin_frames
+        end_frame = int(pos + width / pix_per_frame) + margin_frames
+        compositors = current_sequence().get_timeline_index().get_compositors_in_range(start_frame, end_frame)
         for comp in compositors:
             # compositor clip and edge
             track = current_sequence().tracks[comp.transition.b_track]
@@ -52,10 +52,9 @@ import editorstate
 import editorpersistance
 import gui
 import guiutils
-import mltenv
+import mltenvsnapshot
 import mltprofiles
 import mlttransitions
-import mltfilters
 import processutils
 import persistance
 import respaths
@@ -363,13 +362,9 @@ def main(root_path, force_launch=False):
     # Set numeric locale to use "." as radix, MLT initilizes this to OS locale and this causes bugs 
     locale.setlocale(locale.LC_NUMERIC, 'C')
 
-    # Check for codecs and formats on the system
-    mltenv.check_available_features(repo)
-    renderconsumer.load_render_profiles()
-
-    # Load filter and compositor descriptions from xml files.
-    mltfilters.load_filters_xml(mltenv.services)
-    mlttransitions.load_compositors_xml(mltenv.transitions)
+    # Check for codecs and formats on the system and load filter and compositor descriptions,
+    # use snapshot saved by earlier process if still valid.
+    mltenvsnapshot.load_mlt_environment(repo)
 
     # Create list of available mlt profiles
     mltprofiles.load_profile_list()
@@ -1233,13 +1228,9 @@ def single_render_main(root_path):
     # Set numeric locale to use "." as radix, MLT initilizes this to OS locale and this causes bugs 
     locale.setlocale(locale.LC_NUMERIC, 'C')
 
-    # Check for codecs and formats on the system
-    mltenv.check_available_features(repo)
-    renderconsumer.load_render_profiles()
-
-    # Load filter and compositor descriptions from xml files.
-    mltfilters.load_filters_xml(mltenv.services)
-    mlttransitions.load_compositors_xml(mltenv.transitions)
+    # Check for codecs and formats on the system and load filter and compositor descriptions,
+    # use snapshot saved by earlier process if still valid.
+    mltenvsnapshot.load_mlt_environment(repo)
 
     # Create list of available mlt profiles
     mltprofiles.load_profile_list()
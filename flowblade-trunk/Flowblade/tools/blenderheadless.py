@@ -45,8 +45,7 @@ import ccrutils
 import editorpersistance
 import editorstate
 import gmicplayer
-import mltenv
-import mltfilters
+import mltenvsnapshot
 import mltprofiles
 import mlttransitions
 import processutils
@@ -62,7 +61,13 @@ _start_time = -1
 
 
 # ----------------------------------------------------- module interface to render process with message files, used by main app
-# We are using message files to communicate with application.
+# We are using progress channel and message files to communicate with application.
+def open_progress_channel(session_id):
+    ccrutils.open_progress_channel(session_id)
+
+def close_progress_channel(session_id):
+    ccrutils.close_progress_channel(session_id)
+
 def clear_flag_files(session_id):
     ccrutils.clear_flag_files(session_id)
 
@@ -109,13 +114,9 @@ def main(root_path, session_id, project_path, range_in, range_out, profile_desc)
     # Set numeric locale to use "." as radix, MLT initilizes this to OS locale and this causes bugs 
     locale.setlocale(locale.LC_NUMERIC, 'C')
 
-    # Check for codecs and formats on the system
-    mltenv.check_available_features(repo)
-    renderconsumer.load_render_profiles()
-
-    # Load filter and compositor descriptions from xml files.
-    mltfilters.load_filters_xml(mltenv.services)
-    mlttransitions.load_compositors_xml(mltenv.transitions)
+    # Check for codecs and formats on the system and load filter and compositor descriptions,
+    # use snapshot saved by earlier process if still valid.
+    mltenvsnapshot.load_mlt_environment(repo)
 
     # Create list of available mlt profiles
     mltprofiles.load_profile_list()
@@ -136,13 +137,21 @@ def main(root_path, session_id, project_path, range_in, range_out, profile_desc)
     for frame_file in os.listdir(rendered_frames_folder):
         file_path = os.path.join(rendered_frames_folder, frame_file)
         os.remove(file_path)
-            
-    p = subprocess.Popen(blender_launch, shell=True, stdin=FLOG, stdout=FLOG, stderr=FLOG, preexec_fn=os.setsid)
 
-    manager_thread = ProgressPollingThread(range_in, range_out, p)
+    # Range is split into contiguous subranges that are rendered into same frames folder by
+    # separate Blender processes.
+    processes = []
+    for sub_range_in, sub_range_out in get_sub_ranges(int(range_in), int(range_out), editorpersistance.prefs.blender_render_processes):
+        sub_range_launch = blender_launch + " -- " + str(sub_range_in) + " " + str(sub_range_out)
+        p = subprocess.Popen(sub_range_launch, shell=True, stdin=FLOG, stdout=FLOG, stderr=FLOG, preexec_fn=os.setsid)
+        processes.append(p)
+
+    manager_thread = ProgressPollingThread(range_in, range_out, processes)
     manager_thread.start()
     
-    p.wait()
+    for p in processes:
+        p.wait()
+    manager_thread.join()
 
     if manager_thread.abort == True:
         return
@@ -193,38 +202,58 @@ def main(root_path, session_id, project_path, range_in, range_out, profile_desc)
                 msg = "2 " + str(fraction) + " " + str(elapsed)
                 ccrutils.write_status_message(msg)
             
-            time.sleep(1.0)
+            ccrutils.wait_for_abort(1.0)
         
         ccrutils.write_completed_message()
 
+def get_sub_ranges(range_in, range_out, processes_count):
+    """
+    Returns list of (sub_range_in, sub_range_out) tuples, range ends are inclusive.
+    """
+    length = range_out - range_in + 1
+    processes_count = max(1, min(processes_count, length))
+    sub_ranges = []
+    sub_range_in = range_in
+    for i in range(0, processes_count):
+        # First 'length % processes_count' subranges get one extra frame.
+        sub_length = length // processes_count
+        if i < length % processes_count:
+            sub_length += 1
+        sub_ranges.append((sub_range_in, sub_range_in + sub_length - 1))
+        sub_range_in += sub_length
+
+    return sub_ranges
 
 
 # ------------------------------------------------------------ poll thread for Blender rendering happening in different process.
 class ProgressPollingThread(threading.Thread):
     
-    def __init__(self, range_in, range_out, process):
+    def __init__(self, range_in, range_out, processes):
         self.range_in = int(range_in)
         self.range_out = int(range_out)
-        self.process = process
+        self.processes = processes
         self.abort = False
         threading.Thread.__init__(self)
 
     def run(self):
         completed = False
-        
+        length = self.range_out - self.range_in + 1
+
         while self.abort == False and completed == False:
             self.check_abort_request()
             
-            length = self.range_out - self.range_in
             written_frames_count = self.get_written_frames_count()
-            fraction = float(written_frames_count) / float(length)
+            fraction = min(float(written_frames_count) / float(length), 1.0)
             self.update_status(fraction)
             
-            if written_frames_count == length:
-                completed = True
-                
-            time.sleep(1.0)
-        
+            # Last frame may still be being written until its process exits.
+            completed = all(p.poll() != None for p in self.processes)
+            if completed == False:
+                ccrutils.wait_for_abort(1.0)
+
+        if self.abort == True:
+            return
+
         if ccrutils.get_render_data().do_video_render == False:
             ccrutils.write_completed_message()
      
@@ -239,7 +268,12 @@ class ProgressPollingThread(threading.Thread):
     def check_abort_request(self):
         abort_request = ccrutils.abort_requested()
         if abort_request == True:
-            self.process.kill()
-            os.killpg(os.getpgid(self.process.pid), signal.SIGTERM) 
+            for process in self.processes:
+                if process.poll() != None:
+                    continue
+                process.kill()
+                try:
+                    os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+                except ProcessLookupError:
+                    pass # process group already exited
             self.abort = True
-
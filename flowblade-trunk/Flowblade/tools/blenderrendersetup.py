@@ -6,6 +6,7 @@ import gi
 from gi.repository import GLib
 
 import os
+import sys
 
 
 cont_info_id_path = os.path.join(GLib.get_user_cache_dir(), "flowblade") + "/blender_render_container_id"
@@ -23,6 +24,12 @@ for line in exec_lines:
     print(line)
     exec(line)
 
+# When range is split between several Blender processes, subrange is given after "--" in args.
+if "--" in sys.argv:
+    range_args = sys.argv[sys.argv.index("--") + 1:]
+    if len(range_args) == 2:
+        bpy.context.scene.frame_start = int(range_args[0])
+        bpy.context.scene.frame_end = int(range_args[1])
 
 
 # Render the current animation to the params["output_path"] folder
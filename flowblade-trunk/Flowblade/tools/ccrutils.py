@@ -21,10 +21,18 @@
 """
 Module provides utility methods for moduless creating headless render procesesses
 for container clips rendering.
+
+Render processes push status messages to application and application sends abort
+requests using a local socket progress channel. Message files are used if channel
+cannot be opened or connection to it is lost.
 """
 import os
 import pickle
+import socket
+import struct
 import sys
+import threading
+import time
 
 import appconsts
 import atomicfile
@@ -40,6 +48,12 @@ STATUS_MSG_FILE = "status"
 ABORT_MSG_FILE = "abort"
 RENDER_DATA_FILE = "render_data"
 
+PROGRESS_CHANNEL_ADDRESS = "\0flowblade_container_render_" # Linux abstract namespace socket, session id is appended
+STATUS_MSG = "status"
+COMPLETED_MSG = "completed"
+ABORT_MSG = "abort"
+PROGRESS_CHANNEL_CONNECT_TIMEOUT = 60.0 # render processes that have not connected by then use message files
+
 
 _session_folder = None
 _clip_frames_folder_internal = None
@@ -47,9 +61,42 @@ _rendered_frames_folder_internal = None
 
 _render_data = None
 
+_progress_channels = {} # session_id -> ProgressChannelListener, used by main app
+_status_message_event = threading.Event()
+_progress_connection = None # ProgressChannelConnection, used by render processes
+
 
 # ----------------------------------------------------- interface with message files, used by main appp
-# We are using message files to communicate with application.
+# We are using progress channel and message files to communicate with application.
+def open_progress_channel(session_id):
+    """
+    Needs to be called before render process for session is launched and closed with
+    close_progress_channel() when render is complete. abort_render() closes channel.
+    """
+    close_progress_channel(session_id)
+    try:
+        channel = ProgressChannelListener(session_id)
+    except OSError as e:
+        print("Container clip render progress channel could not be opened, using message files:", e)
+        return
+
+    _progress_channels[session_id] = channel
+    channel.start()
+
+def close_progress_channel(session_id):
+    try:
+        channel = _progress_channels.pop(session_id)
+    except KeyError:
+        return
+    channel.close()
+
+def wait_for_status_message(timeout):
+    """
+    Blocks until a status message is pushed by some render process or timeout elapses.
+    """
+    _status_message_event.wait(timeout)
+    _status_message_event.clear()
+
 def clear_flag_files(session_id):
     folder = _get_session_folder(session_id)
     
@@ -77,6 +124,13 @@ def set_render_data(session_id, video_render_data):
         pickle.dump(video_render_data, outfile)
     
 def session_render_complete(session_id):
+    channel = _progress_channels.get(session_id)
+    if channel != None:
+        if channel.completed == True:
+            return True
+        elif channel.is_connected():
+            return False
+
     folder = _get_session_folder(session_id)
     completed_msg_path = folder + "/" + COMPLETED_MSG_FILE
 
@@ -94,6 +148,10 @@ def get_session_status(session_id):
     return (step, frame, length, elapsed)
 
 def get_session_status_message(session_id):
+    channel = _progress_channels.get(session_id)
+    if channel != None and channel.status_msg != None:
+        return channel.status_msg
+
     try:
         status_msg_file = _get_session_folder(session_id) + "/" + STATUS_MSG_FILE
         with open(status_msg_file) as f:
@@ -103,6 +161,12 @@ def get_session_status_message(session_id):
         return None
         
 def abort_render(session_id):
+    channel = _progress_channels.get(session_id)
+    if channel != None:
+        channel.send_abort()
+        close_progress_channel(session_id)
+
+    # Abort file is written also when channel is used in case connection has been lost.
     folder = _get_session_folder(session_id)
     abort_msg_file = folder + "/" +  ABORT_MSG_FILE
     with atomicfile.AtomicFileWriter(abort_msg_file, "wb") as afw:
@@ -128,6 +192,26 @@ def init_session_folders(session_id):
     if not os.path.exists(_rendered_frames_folder_internal):
         os.mkdir(_rendered_frames_folder_internal)
 
+    _connect_progress_channel(session_id)
+
+def _connect_progress_channel(session_id):
+    global _progress_connection
+    try:
+        connection_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection_socket.connect(_get_progress_channel_address(session_id))
+    except OSError as e:
+        print("Container clip render progress channel not available, using message files:", e)
+        return
+
+    # Abstract namespace socket names can be bound by any local user.
+    if _is_same_user_peer(connection_socket) == False:
+        print("Container clip render progress channel owned by another user, using message files")
+        connection_socket.close()
+        return
+
+    _progress_connection = ProgressChannelConnection(connection_socket)
+    _progress_connection.start()
+
 def maybe_init_external_session_folders():
     if _render_data.save_internally == False:
         if not os.path.exists(clip_frames_folder()):
@@ -151,6 +235,9 @@ def rendered_frames_folder():
         return _render_data.render_dir + RENDERED_FRAMES_DIR
 
 def write_status_message(msg):
+    if _progress_connection != None and _progress_connection.send(STATUS_MSG + " " + msg):
+        return
+
     try:
         status_msg_file = session_folder() + "/" + STATUS_MSG_FILE
         with atomicfile.AtomicFileWriter(status_msg_file, "w") as afw:
@@ -160,6 +247,11 @@ def write_status_message(msg):
         pass # this failing because we can't get file access will show as progress hickup to user, we don't care
 
 def write_completed_message():
+    if _progress_connection != None:
+        _progress_connection.send(COMPLETED_MSG)
+
+    # Completed file is written also when channel is used, it is needed if application
+    # has lost connection before message was received.
     completed_msg_file = session_folder() + "/" + COMPLETED_MSG_FILE
     script_text = "##completed##" # let's put something in here
     with atomicfile.AtomicFileWriter(completed_msg_file, "w") as afw:
@@ -189,12 +281,172 @@ def delete_rendered_frames():
         os.remove(file_path)
 
 def abort_requested():
+    if _progress_connection != None:
+        if _progress_connection.abort_event.is_set():
+            return True
+        elif _progress_connection.connected == True:
+            return False
+
     abort_file = session_folder() + "/" + ABORT_MSG_FILE
     if os.path.exists(abort_file):
         return True
     else:
         return False
 
+def wait_for_abort(timeout):
+    """
+    Blocks until abort is requested or timeout elapses, returns True if abort was requested.
+    """
+    if _progress_connection != None and _progress_connection.connected == True:
+        _progress_connection.abort_event.wait(timeout)
+    else:
+        time.sleep(timeout)
+
+    return abort_requested()
+
+
+# ------------------------------------------------------ progress channel
+def _get_progress_channel_address(session_id):
+    return PROGRESS_CHANNEL_ADDRESS + session_id
+
+def _is_same_user_peer(connected_socket):
+    creds = connected_socket.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    pid, uid, gid = struct.unpack("3i", creds)
+    return uid == os.getuid()
+
+
+class ProgressChannelListener(threading.Thread):
+    """
+    Application side of progress channel, accepts one connection from render process
+    and keeps latest status message.
+    """
+    def __init__(self, session_id):
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self.status_msg = None
+        self.completed = False
+        self.connection = None
+        self.closed = False
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.server.bind(_get_progress_channel_address(session_id))
+            self.server.listen(1)
+            self.server.settimeout(PROGRESS_CHANNEL_CONNECT_TIMEOUT)
+        except OSError:
+            self.server.close()
+            raise
+
+    def run(self):
+        try:
+            connection = self._accept_same_user_connection()
+        except OSError:
+            return # Channel was closed or render process did not connect in time.
+        finally:
+            self.server.close()
+
+        connection.settimeout(None)
+        self.connection = connection
+        if self.closed == True: # close() was called during accept.
+            self.connection.close()
+            return
+
+        try:
+            with self.connection.makefile("r") as msg_file:
+                for line in msg_file:
+                    self._handle_message(line.rstrip("\n"))
+        except OSError:
+            pass
+
+        self.closed = True
+        self.connection.close()
+        _status_message_event.set()
+
+    def _accept_same_user_connection(self):
+        # Abstract namespace socket names can be connected to by any local user,
+        # connections from other users are dropped.
+        deadline = time.monotonic() + PROGRESS_CHANNEL_CONNECT_TIMEOUT
+        while True:
+            connection, address = self.server.accept()
+            if _is_same_user_peer(connection) == True:
+                return connection
+            connection.close()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("no connection from render process")
+            self.server.settimeout(remaining)
+
+    def _handle_message(self, msg):
+        if msg.startswith(STATUS_MSG + " "):
+            self.status_msg = msg[len(STATUS_MSG) + 1:]
+        elif msg == COMPLETED_MSG:
+            self.completed = True
+        _status_message_event.set()
+
+    def is_connected(self):
+        return self.connection != None and self.closed == False
+
+    def send_abort(self):
+        if self.is_connected() == False:
+            return
+        try:
+            self.connection.sendall((ABORT_MSG + "\n").encode("utf-8"))
+        except OSError:
+            pass # Abort file is used.
+
+    def close(self):
+        self.closed = True
+        for closed_socket in [self.server, self.connection]:
+            if closed_socket == None:
+                continue
+            try:
+                closed_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            closed_socket.close()
+
+
+class ProgressChannelConnection(threading.Thread):
+    """
+    Render process side of progress channel, sends messages and waits for abort request.
+    """
+    def __init__(self, connection_socket):
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self.connection_socket = connection_socket
+        self.connected = True
+        self.abort_event = threading.Event()
+        self.send_lock = threading.Lock()
+
+    def run(self):
+        try:
+            with self.connection_socket.makefile("r") as msg_file:
+                for line in msg_file:
+                    if line.rstrip("\n") == ABORT_MSG:
+                        self.abort_event.set()
+        except OSError:
+            pass
+
+        # Application closed connection, message files are used from now on.
+        self.connected = False
+
+    def send(self, msg):
+        """
+        Returns False if message could not be sent.
+        """
+        if self.connected == False:
+            return False
+        try:
+            with self.send_lock:
+                self.connection_socket.sendall((msg + "\n").encode("utf-8"))
+            return True
+        except OSError:
+            self.connected = False
+            return False
+
+
 # ---- Debug helper
 def prints_to_log_file(log_file):
     so = se = open(log_file, 'w', buffering=1)
@@ -1219,7 +1219,8 @@ class GmicEffectRendererer(threading.Thread):
                                                                         out_folder,
                                                                         frame_name,
                                                                         self.script_render_update_callback, 
-                                                                        self.script_render_output_callback)
+                                                                        self.script_render_output_callback,
+                                                                        processes=editorpersistance.prefs.gmic_render_processes)
         self.script_renderer.write_frames()
         
         # Render video
@@ -44,8 +44,7 @@ import ccrutils
 import editorstate
 import editorpersistance
 import gmicplayer
-import mltfilters
-import mltenv
+import mltenvsnapshot
 import mltprofiles
 import mlttransitions
 import processutils
@@ -72,7 +71,13 @@ _render_thread = None
 
 
 # ----------------------------------------------------- module interface to render process with message files, used by main app
-# We are using message files to communicate with application.
+# We are using progress channel and message files to communicate with application.
+def open_progress_channel(session_id):
+    ccrutils.open_progress_channel(session_id)
+
+def close_progress_channel(session_id):
+    ccrutils.close_progress_channel(session_id)
+
 def clear_flag_files(session_id):
     ccrutils.clear_flag_files(session_id)
     
@@ -127,13 +132,9 @@ def main(root_path, session_id, script, clip_path, range_in, range_out, profile_
     # Set numeric locale to use "." as radix, MLT initilizes this to OS locale and this causes bugs 
     locale.setlocale(locale.LC_NUMERIC, 'C')
 
-    # Check for codecs and formats on the system
-    mltenv.check_available_features(repo)
-    renderconsumer.load_render_profiles()
-
-    # Load filter and compositor descriptions from xml files.
-    mltfilters.load_filters_xml(mltenv.services)
-    mlttransitions.load_compositors_xml(mltenv.transitions)
+    # Check for codecs and formats on the system and load filter and compositor descriptions,
+    # use snapshot saved by earlier process if still valid.
+    mltenvsnapshot.load_mlt_environment(repo)
 
     # Create list of available mlt profiles
     mltprofiles.load_profile_list()
@@ -192,6 +193,7 @@ class GMicHeadlessRunnerThread(threading.Thread):
         self.frames_range_writer = None
         
         self.script_renderer = None
+        self.script_frames_done = 0
        
         if self.render_data.save_internally == True:
             frame_name = "frame"            
@@ -213,19 +215,10 @@ class GMicHeadlessRunnerThread(threading.Thread):
             file_path = os.path.join(rendered_frames_folder, frame_file)
             os.remove(file_path)
             
-        self.frames_range_writer = gmicplayer.FramesRangeWriter(self.clip_path, self.frames_update, profile)
-        self.frames_range_writer.write_frames(clip_frames_folder + "/", frame_name, self.range_in, self.range_out)
-
-        if self.abort == True:
-            return
-
         script_file = open(self.script_path)
         user_script = script_file.read()
 
-        while len(os.listdir(clip_frames_folder)) != self.length:
-            time.sleep(0.5)
-        
-        # Render frames with gmic script
+        # Render frames with gmic script as clip frames get written. 
         self.script_renderer = gmicplayer.FolderFramesScriptRenderer(   user_script, 
                                                                         clip_frames_folder,
                                                                         rendered_frames_folder + "/",
@@ -234,8 +227,17 @@ class GMicHeadlessRunnerThread(threading.Thread):
                                                                         self.script_render_output_callback,
                                                                         10,
                                                                         False,  # this is not useful until we get MLT to fin frames sequences not startin from 0001
-                                                                        0)
+                                                                        0,
+                                                                        editorpersistance.prefs.gmic_render_processes,
+                                                                        self.clip_frames_written)
+
+        self.frames_range_writer = gmicplayer.FramesRangeWriter(self.clip_path, self.frames_update, profile)
+        self.frames_writer_thread = threading.Thread(target=self.frames_range_writer.write_frames,
+                                                     args=(clip_frames_folder + "/", frame_name, self.range_in, self.range_out))
+        self.frames_writer_thread.start()
+
         self.script_renderer.write_frames()
+        self.frames_writer_thread.join()
 
         ccrutils.delete_clip_frames()
 
@@ -292,11 +294,23 @@ class GMicHeadlessRunnerThread(threading.Thread):
         self.abort = ccrutils.abort_requested()
         return self.abort
 
+    def clip_frames_written(self):
+        if self.frames_writer_thread.is_alive():
+            return False
+        if self.abort == True:
+            return True
+        return len(os.listdir(ccrutils.clip_frames_folder())) >= self.length
+
     def frames_update(self, frame):
         if self.abort_requested() == True:
              self.frames_range_writer.shutdown()
+             self.script_renderer.abort()
              return
-             
+
+        # Script render progress is displayed after first frame has been rendered.
+        if self.script_frames_done > 0:
+            return
+
         # step 1, frame , range
         elapsed = time.monotonic() - self.start_time
         msg = "1 " + str(frame) + " " + str(self.length) + " " + str(elapsed)
@@ -304,9 +318,11 @@ class GMicHeadlessRunnerThread(threading.Thread):
         
     def script_render_update_callback(self, frame_count):
         if self.abort_requested() == True:
-             self.script_renderer.abort = True
+             self.frames_range_writer.shutdown()
+             self.script_renderer.abort()
              return
         
+        self.script_frames_done = frame_count
         # step 1, frame , range
         elapsed = time.monotonic() - self.start_time
         msg = "2 " + str(frame_count) + " " + str(self.length) + " " + str(elapsed)
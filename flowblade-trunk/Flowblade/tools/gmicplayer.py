@@ -23,7 +23,9 @@ Clip player used to select frames for preview and range selection.
 """
 
 
+import collections
 import mlt
+import multiprocessing
 import os
 from os import listdir
 from os.path import isfile, join
@@ -38,6 +40,8 @@ import utils
 
 TICKER_DELAY = 0.25
 RENDER_TICKER_DELAY = 0.05
+SCRIPT_RENDER_POLL_DELAY = 0.05
+MAX_FRAMES_PER_GMIC_PROCESS = 8
 
 _current_profile = None
 
@@ -296,9 +300,15 @@ class FolderFramesInfo:
 
 
 class FolderFramesScriptRenderer:
-
+    """
+    Renders G'MIC script for all frames in folder using a pool of concurrently running gmic processes.
+    
+    If 'source_done_func' is given, frames are rendered as they are written into the folder and
+    rendering ends after function returns True and all frames in folder have been rendered.
+    """
     def __init__(   self, user_script, folder, out_folder, frame_name, update_callback, 
-                    render_output_callback, nice=0, re_render_existing=True, out_frame_offset=0):
+                    render_output_callback, nice=0, re_render_existing=True, out_frame_offset=0,
+                    processes=0, source_done_func=None):
         self.user_script = user_script
         self.folder = folder
         self.out_folder = out_folder
@@ -308,55 +318,118 @@ class FolderFramesScriptRenderer:
         self.nice = nice
         self.re_render_existing = re_render_existing
         self.out_frame_offset = out_frame_offset
+        self.source_done_func = source_done_func
 
-        self.abort = False
+        # 0 means one process per CPU core
+        if processes <= 0:
+            processes = multiprocessing.cpu_count()
+        self.processes = max(1, processes)
+
+        self.aborted = False
 
     def write_frames(self):
-        clip_frames = os.listdir(self.folder)
+        dispatched_frames = set()
+        pending_frames = collections.deque() # (clip_frame_path, rendered_file_path) tuples
+        running = [] # (process, frames_count) tuples
+        frame_count = 0
+        first_frame_done = False
+
+        while True:
+            if self.aborted == True:
+                for process, frames_count in running:
+                    process.kill()
+                return
 
-        frame_count = 1
-        for clip_frame in clip_frames:
+            source_done = (self.source_done_func == None or self.source_done_func() == True)
+            for clip_frame in self._get_ready_clip_frames(source_done):
+                if clip_frame in dispatched_frames:
+                    continue
+                dispatched_frames.add(clip_frame)
+
+                file_numbers_list = re.findall(r'\d+', clip_frame)
+                filled_number_str = str(int(file_numbers_list[0]) + self.out_frame_offset).zfill(4)
+                clip_frame_path = os.path.join(self.folder, clip_frame)
+                rendered_file_path = self.out_folder + self.frame_name + "_" + filled_number_str + ".png"
+
+                if self.re_render_existing == False:
+                    if os.path.exists(rendered_file_path) == True:
+                        frame_count = frame_count + 1
+                        continue
+
+                pending_frames.append((clip_frame_path, rendered_file_path))
+
+            # First frame displays shell output and does error checking.
+            if first_frame_done == False and len(pending_frames) > 0:
+                self._render_first_frame(pending_frames.popleft())
+                first_frame_done = True
+                frame_count = frame_count + 1
+                self.do_update_callback(frame_count)
+                continue
 
-            if self.abort == True:
+            # Collect finished processes.
+            still_running = []
+            for process, frames_count in running:
+                if process.poll() == None:
+                    still_running.append((process, frames_count))
+                else:
+                    frame_count = frame_count + frames_count
+                    self.do_update_callback(frame_count)
+            running = still_running
+
+            # Start new processes, frames are batched if there are more frames waiting then free processes.
+            free_processes = self.processes - len(running)
+            while free_processes > 0 and len(pending_frames) > 0:
+                batch_size = -(-len(pending_frames) // free_processes) # ceil division
+                batch_size = max(1, min(batch_size, MAX_FRAMES_PER_GMIC_PROCESS))
+                batch = [pending_frames.popleft() for i in range(0, min(batch_size, len(pending_frames)))]
+                running.append((self._launch_gmic(batch), len(batch)))
+                free_processes = free_processes - 1
+
+            if source_done and len(pending_frames) == 0 and len(running) == 0:
                 return
-            
-            self.do_update_callback(frame_count)
 
-            # Run with nice to lower priority if requested
-            nice_command = "nice -n " + str(self.nice) + " "
+            time.sleep(SCRIPT_RENDER_POLL_DELAY)
 
+    def _get_ready_clip_frames(self, source_done):
+        # Frames are written in order by single MLT consumer thread, so the highest numbered frame
+        # may still be incomplete until source is done.
+        numbered_frames = []
+        for clip_frame in os.listdir(self.folder):
             file_numbers_list = re.findall(r'\d+', clip_frame)
-            filled_number_str = str(int(file_numbers_list[0]) + self.out_frame_offset).zfill(4)
-
-            clip_frame_path = os.path.join(self.folder, clip_frame)
-            rendered_file_path = self.out_folder + self.frame_name + "_" + filled_number_str + ".png"
-            
-            script_str = nice_command + "gmic " + clip_frame_path + " " + self.user_script + " -output " +  rendered_file_path
-
-            if self.re_render_existing == False:
-                if os.path.exists(rendered_file_path) == True:
-                    frame_count = frame_count + 1
-                    continue
-
-            if frame_count == 1: # first frame displays shell output and does error checking
-                FLOG = open(userfolders.get_cache_dir() + "log_gmic_preview", 'w')
-                p = subprocess.Popen(script_str, shell=True, stdin=FLOG, stdout=FLOG, stderr=FLOG)
-                p.wait()
-                FLOG.close()
- 
-                # read log
-                f = open(userfolders.get_cache_dir() + "log_gmic_preview", 'r')
-                out = f.read()
-                f.close()
-
-                self.do_render_output_callback(p, out)
-            else:
-                FLOG = open(userfolders.get_cache_dir() + "log_gmic_preview", 'w')
-                p = subprocess.Popen(script_str, shell=True, stdin=FLOG, stdout=FLOG, stderr=FLOG)
-                p.wait()
-                FLOG.close()
-
-            frame_count = frame_count + 1
+            if len(file_numbers_list) == 0:
+                continue
+            numbered_frames.append((int(file_numbers_list[0]), clip_frame))
+        numbered_frames.sort()
+
+        if source_done == False:
+            numbered_frames = numbered_frames[0:-1]
+        return [clip_frame for number, clip_frame in numbered_frames]
+
+    def _get_script_str(self, batch):
+        # Every frame in batch is loaded, processed and saved on its own so that
+        # scripts work exactly as they would when run for a single frame.
+        nice_command = "nice -n " + str(self.nice) + " "
+        script_str = nice_command + "gmic"
+        for clip_frame_path, rendered_file_path in batch:
+            script_str += " " + clip_frame_path + " " + self.user_script + " -output " + rendered_file_path + " -remove"
+        return script_str
+
+    def _launch_gmic(self, batch):
+        return subprocess.Popen(self._get_script_str(batch), shell=True, stdin=subprocess.DEVNULL, 
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def _render_first_frame(self, frame_data):
+        FLOG = open(userfolders.get_cache_dir() + "log_gmic_preview", 'w')
+        p = subprocess.Popen(self._get_script_str([frame_data]), shell=True, stdin=FLOG, stdout=FLOG, stderr=FLOG)
+        p.wait()
+        FLOG.close()
+
+        # read log
+        f = open(userfolders.get_cache_dir() + "log_gmic_preview", 'r')
+        out = f.read()
+        f.close()
+
+        self.do_render_output_callback(p, out)
 
     def do_update_callback(self, frame_count):
         self.update_callback(frame_count)
@@ -365,7 +438,7 @@ class FolderFramesScriptRenderer:
         self.render_output_callback(process, out_text)
 
     def abort(self):
-        self.abort = True
+        self.aborted = True
 
 
 # ---- Debug helper
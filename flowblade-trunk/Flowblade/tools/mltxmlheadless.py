@@ -43,8 +43,7 @@ import atomicfile
 import ccrutils
 import editorstate
 import editorpersistance
-import mltfilters
-import mltenv
+import mltenvsnapshot
 import mltprofiles
 import mlttransitions
 import processutils
@@ -60,7 +59,13 @@ _render_thread = None
 
 
 # ----------------------------------------------------- module interface with message files
-# We are using message files to communicate with application.
+# We are using progress channel and message files to communicate with application.
+def open_progress_channel(session_id):
+    ccrutils.open_progress_channel(session_id)
+
+def close_progress_channel(session_id):
+    ccrutils.close_progress_channel(session_id)
+
 def clear_flag_files(session_id):
     ccrutils.clear_flag_files(session_id)
 
@@ -107,13 +112,9 @@ def main(root_path, session_id, xml_file_path, range_in, range_out, profile_desc
     # Set numeric locale to use "." as radix, MLT initilizes this to OS locale and this causes bugs 
     locale.setlocale(locale.LC_NUMERIC, 'C')
 
-    # Check for codecs and formats on the system
-    mltenv.check_available_features(repo)
-    renderconsumer.load_render_profiles()
-
-    # Load filter and compositor descriptions from xml files.
-    mltfilters.load_filters_xml(mltenv.services)
-    mlttransitions.load_compositors_xml(mltenv.transitions)
+    # Check for codecs and formats on the system and load filter and compositor descriptions,
+    # use snapshot saved by earlier process if still valid.
+    mltenvsnapshot.load_mlt_environment(repo)
 
     # Create list of available mlt profiles
     mltprofiles.load_profile_list()
@@ -196,7 +197,7 @@ class MLTXMLHeadlessRunnerThread(threading.Thread):
             fraction = self.render_player.get_render_fraction()
             self.render_update_callback(fraction)
             
-            time.sleep(0.3)
+            ccrutils.wait_for_abort(0.3)
                 
         # Write out completed flag file.
         ccrutils.write_completed_message()
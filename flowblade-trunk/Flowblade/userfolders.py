@@ -20,8 +20,6 @@
 import gi
 
 from gi.repository import GLib
-import distutils
-from distutils import dir_util, file_util
 import os
 import threading
 
@@ -200,6 +198,8 @@ def _maybe_create_xdg_dirs():
         os.mkdir(get_cache_dir() + appconsts.TRIM_VIEW_DIR)
     if not os.path.exists(get_cache_dir() + appconsts.BATCH_DIR):
         os.mkdir(get_cache_dir() + appconsts.BATCH_DIR)
+    if not os.path.exists(get_cache_dir() + appconsts.TLINE_RENDER_CACHE_DIR):
+        os.mkdir(get_cache_dir() + appconsts.TLINE_RENDER_CACHE_DIR)
     if not os.path.exists(get_hidden_screenshot_dir_path()):
         os.mkdir(get_hidden_screenshot_dir_path())
 
@@ -217,6 +217,9 @@ class XDGCopyThread(threading.Thread):
         self.completed_callback(self.dialog)
         
 def _copy_data_from_dot_folders_xdg_folders():
+    # distutils imports setuptools on some systems and that is slow, so it is imported only for this one time copy.
+    from distutils import dir_util, file_util
+
     # ---------------------- CONFIG
     print("Copying CONFIG...")
     file_util.copy_file(_dot_dir + "prefs", get_config_dir() + "prefs", verbose=1)
@@ -41,6 +41,8 @@ import editorstate
 
 _start_time = 0.0
 
+FINGERPRINT_CHUNK_SIZE = 65536
+
 # ---------------------------------- CLASSES
 class EmptyClass:
     pass
@@ -466,11 +468,27 @@ def do_nothing():
     pass
 
 def get_unique_name_for_audio_levels_file(media_file_path, profile):
+    # Audio levels files are named using audiolevels.get_levels_key() now,
+    # this is used to find files created by earlier versions.
     size_str = str(os.path.getsize(media_file_path))
     fps_str = str(profile.description())
     file_name = hashlib.md5((media_file_path + size_str + fps_str).encode('utf-8')).hexdigest()
     return file_name
 
+def get_media_content_fingerprint(media_file_path):
+    """
+    Returns hash of file size and data chunks from start, middle and end of file.
+    Fingerprint stays same when file is moved or renamed.
+    """
+    size = os.path.getsize(media_file_path)
+    fingerprint = hashlib.md5(str(size).encode('utf-8'))
+    offsets = [0, max(0, size // 2 - FINGERPRINT_CHUNK_SIZE // 2), max(0, size - FINGERPRINT_CHUNK_SIZE)]
+    with open(media_file_path, "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            fingerprint.update(f.read(FINGERPRINT_CHUNK_SIZE))
+    return fingerprint.hexdigest()
+
 def get_img_seq_glob_lookup_name(asset_file_name):
     parts1 = asset_file_name.split("%")
     start = parts1[0]